@@ -1,34 +1,61 @@
 from django.contrib import admin
-from .models import User, Company, Department, Employee
+from .changelists import AutocompleteFilter, ScalableAdminMixin
+from .models import User, Company, Department, Employee, Job, ManagerScope
+from .search import search_employees
+
+
+class ManagerScopeInline(admin.TabularInline):
+    model = ManagerScope
+    extra = 0
+    # Select widgets would list every company and department.
+    autocomplete_fields = ('company', 'department')
+
+    def get_queryset(self, request):
+        # Each row is labelled with `ManagerScope.__str__`, which reads these.
+        return super().get_queryset(request).select_related('user', 'company', 'department__company')
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    inlines = (ManagerScopeInline,)
     list_display = ('email', 'role', 'is_staff', 'is_superuser')
     list_filter = ('role', 'is_staff', 'is_superuser')
     search_fields = ('email', 'role')
-    ordering = ('email',)
 
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
-    list_display = ('name', 'num_departments', 'num_employees')
+    list_display = ('name', 'num_departments', 'num_employees', 'deleting_at')
     search_fields = ('name',)
-    readonly_fields = ('num_departments', 'num_employees')
+    readonly_fields = ('num_departments', 'num_employees', 'deleting_at')
 
 
 @admin.register(Department)
-class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ('name', 'company', 'num_employees')
-    list_filter = ('company',)
+class DepartmentAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'company', 'num_employees', 'deleting_at')
+    list_filter = (('company', AutocompleteFilter),)
+    list_select_related = ('company',)
+    autocomplete_fields = ('company',)
     search_fields = ('name', 'company__name')
-    readonly_fields = ('num_employees',)
+    readonly_fields = ('num_employees', 'deleting_at')
+
+
+@admin.register(Job)
+class JobAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'done_rows', 'total_rows', 'run_at', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = (
+        'attempts', 'started_at', 'finished_at', 'locked_by', 'last_error', 'total_rows', 'done_rows', 'heartbeat_at',
+    )
 
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ('id','name', 'email', 'status', 'company', 'department', 'hired_on', 'days_employed')
-    list_filter = ('status', 'company', 'department')
+    list_filter = ('status', ('company', AutocompleteFilter), ('department', AutocompleteFilter))
+    # Department.__str__ shows its company's name.
+    list_select_related = ('company', 'department__company')
+    autocomplete_fields = ('company', 'department', 'user')
     search_fields = ('name', 'email', 'company__name', 'department__name', 'designation')
     readonly_fields = ('days_employed', 'hired_on')
     fieldsets = (
@@ -43,6 +70,20 @@ class EmployeeAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_tenure()
+
+    @admin.display(description='Days employed', ordering='-hired_on')
+    def days_employed(self, obj):
+        # Computed in SQL by `with_tenure()`; sorts on the indexed `hired_on`.
+        return obj.days_employed
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the same indexed full-text/trigram search as the API
+        if not search_term.strip():
+            return queryset, False
+        return search_employees(queryset, search_term), False
+
     def save_model(self, request, obj, form, change):
         # If the Employee does not already have a user, create one
         if not obj.user:
@@ -0,0 +1,210 @@
+"""
+Dashboard analytics, computed in one grouped pass over employees and cached
+under the current table versions (see `core.versioning`), and status trends
+read from the daily rollups of the status event log (see `core.events`).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.utils.timezone import now
+
+from . import versioning
+from .routers import staleness_scope
+from .models import Company, Department, Employee, EmployeeStatusRollup, ManagerScope
+
+def _querysets(companies, departments, employees):
+    """Default each unscoped queryset to the rows not marked for deletion."""
+    return (
+        (Company.objects.live() if companies is None else companies).order_by(),
+        (Department.objects.live() if departments is None else departments).order_by(),
+        (Employee.objects.live() if employees is None else employees).order_by(),
+    )
+
+
+def _status_groups(employees):
+    # No joins (only the anti-join on the few departments being deleted):
+    # grouped on the partition key alone, a partitioned employee table is
+    # aggregated partition by partition.
+    return employees.values('company_id', 'department_id', 'status').annotate(count=Count('id'))
+
+
+def _names(departments):
+    return departments.values_list('id', 'name', 'company_id', 'company__name')
+
+
+def _totals(company_ids, names):
+    # Count the live departments listed, as every scope does: the companies'
+    # department counters still include departments being deleted, and a
+    # scope may hold departments without their company.
+    return {
+        'total_companies': len({*company_ids, *(company_id for _, _, company_id, _ in names)}),
+        'total_departments': len(names),
+    }
+
+
+def compute_dashboard(companies=None, departments=None, employees=None):
+    """
+    Build the dashboard payload with three queries: one for the ids of the
+    (few) companies, one for the department and company names, and one
+    GROUP BY over employees that yields the overall, per-company and
+    per-department status breakdowns. Pass querysets to restrict any of them
+    (e.g. to a Manager's scope); the totals then count the companies and
+    departments in `companies` and `departments` and those departments' companies.
+    """
+    companies, departments, employees = _querysets(companies, departments, employees)
+    names = list(_names(departments))
+    totals = _totals(companies.values_list('id', flat=True), names)
+    return _fold(totals, _status_groups(employees), names)
+
+
+async def acompute_dashboard(companies=None, departments=None, employees=None):
+    """Async counterpart of `compute_dashboard`."""
+    companies, departments, employees = _querysets(companies, departments, employees)
+    names = [row async for row in _names(departments)]
+    totals = _totals([pk async for pk in companies.values_list('id', flat=True)], names)
+    return _fold(totals, [group async for group in _status_groups(employees)], names)
+
+
+def _fold(totals, groups, names):
+    department_names, company_names = {}, {}
+    for department_id, name, company_id, company_name in names:
+        department_names[department_id] = name
+        company_names[company_id] = company_name
+    overall = defaultdict(int)
+    companies = {}
+    departments = {}
+    for group in groups:
+        status, count = group['status'], group['count']
+        overall[status] += count
+        company = companies.setdefault(group['company_id'], {
+            'id': group['company_id'],
+            'name': company_names.get(group['company_id']),
+            'total_employees': 0,
+            'status_breakdown': defaultdict(int),
+        })
+        company['total_employees'] += count
+        company['status_breakdown'][status] += count
+        department = departments.setdefault(group['department_id'], {
+            'id': group['department_id'],
+            'name': department_names.get(group['department_id']),
+            'company': group['company_id'],
+            'total_employees': 0,
+            'status_breakdown': defaultdict(int),
+        })
+        department['total_employees'] += count
+        department['status_breakdown'][status] += count
+
+    for entry in (*companies.values(), *departments.values()):
+        entry['status_breakdown'] = dict(entry['status_breakdown'])
+
+    return {
+        'total_companies': totals['total_companies'],
+        'total_departments': totals['total_departments'],
+        'total_employees': sum(overall.values()),
+        'employee_status_breakdown': [
+            {'status': status, 'count': count} for status, count in sorted(overall.items())
+        ],
+        'companies': sorted(companies.values(), key=lambda entry: entry['id']),
+        'departments': sorted(departments.values(), key=lambda entry: entry['id']),
+    }
+
+
+SNAPSHOT_MODELS = (Company, Department, Employee, ManagerScope)
+
+
+def _snapshot_key(versions, scope):
+    # Snapshots read from a replica are only reused within one lag window.
+    return 'core:dashboard:' + ':'.join((*(str(version) for version in versions), scope, staleness_scope()))
+
+
+def dashboard_snapshot(scope='', **querysets):
+    """
+    Return `(payload, computed_at)`, serving from cache while none of the
+    underlying tables has changed since the snapshot was taken. `querysets`
+    restrict the dashboard as in `compute_dashboard`; `scope` then names
+    that restriction, and snapshots are kept per scope.
+    """
+    key = _snapshot_key(versioning.get_versions(*SNAPSHOT_MODELS), scope)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = (compute_dashboard(**querysets), now())
+        cache.set(key, snapshot, timeout=settings.DASHBOARD_CACHE_TTL)
+    return snapshot
+
+
+async def adashboard_snapshot(scope='', **querysets):
+    """Async counterpart of `dashboard_snapshot`."""
+    key = _snapshot_key(await versioning.aget_versions(*SNAPSHOT_MODELS), scope)
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        snapshot = (await acompute_dashboard(**querysets), now())
+        await cache.aset(key, snapshot, timeout=settings.DASHBOARD_CACHE_TTL)
+    return snapshot
+
+
+def status_timeseries(start, end, company_id=None, department_id=None, rollups=None):
+    """
+    Daily headcount per status from `start` to `end` (inclusive), with the
+    employees entering and leaving each status per day, plus a funnel of
+    entries, exits and average days spent in each status over the range.
+    Two grouped queries over `EmployeeStatusRollup`, or over `rollups`.
+    """
+    rollups = (EmployeeStatusRollup.objects.all() if rollups is None else rollups).order_by()
+    if company_id is not None:
+        rollups = rollups.filter(company_id=company_id)
+    if department_id is not None:
+        rollups = rollups.filter(department_id=department_id)
+    statuses = [status for status, _ in Employee.STATUS_CHOICES]
+
+    headcount = dict.fromkeys(statuses, 0)
+    net = Sum(F('entered') + F('moved_in') - F('exited') - F('moved_out'))
+    for row in rollups.filter(day__lt=start).values('status').annotate(net=net):
+        headcount[row['status']] = row['net']
+
+    days = defaultdict(dict)
+    funnel = {status: {'status': status, 'entered': 0, 'exited': 0, 'stage_seconds': 0.0, 'timed_exits': 0}
+              for status in statuses}
+    groups = rollups.filter(day__range=(start, end)).values('day', 'status').annotate(
+        net=net, entered_total=Sum('entered'), exited_total=Sum('exited'),
+        stage_seconds_total=Sum('stage_seconds'), timed_exits_total=Sum('timed_exits'),
+    )
+    for row in groups:
+        days[row['day']][row['status']] = row
+        stage = funnel[row['status']]
+        stage['entered'] += row['entered_total']
+        stage['exited'] += row['exited_total']
+        stage['stage_seconds'] += row['stage_seconds_total']
+        stage['timed_exits'] += row['timed_exits_total']
+
+    series = []
+    day = start
+    while day <= end:
+        rows = days.get(day, {})
+        for status, row in rows.items():
+            headcount[status] = headcount.get(status, 0) + row['net']
+        series.append({
+            'date': day,
+            'headcount': dict(headcount),
+            'entered': {status: row['entered_total'] for status, row in rows.items() if row['entered_total']},
+            'exited': {status: row['exited_total'] for status, row in rows.items() if row['exited_total']},
+        })
+        day += timedelta(days=1)
+
+    return {
+        'start': start,
+        'end': end,
+        'series': series,
+        'funnel': [
+            {
+                'status': stage['status'],
+                'entered': stage['entered'],
+                'exited': stage['exited'],
+                'avg_days_in_stage': round(stage['stage_seconds'] / stage['timed_exits'] / 86400, 2)
+                if stage['timed_exits'] else None,
+            }
+            for stage in funnel.values()
+        ],
+    }
@@ -0,0 +1,188 @@
+"""
+Async (ASGI) read endpoints.
+
+These mirror the `list` / `retrieve` actions of the core viewsets and the
+dashboard, but run on the event loop with Django's async ORM, so a slow
+query does not hold a worker thread. Under WSGI they still work, each
+request getting its own event loop.
+
+Querysets are built with the same filters, search, ordering, field shaping,
+keyset pagination and replica routing as the synchronous views, and
+responses carry the same kind of ETags. Building them may query (the
+replica's lag, the partitioning of the employee table), so that happens in
+a thread through `sync_to_async`; only the reads themselves run on the loop.
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.utils.timezone import now
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import partitioning
+from .analytics import adashboard_snapshot
+from .authentication import CachedJWTAuthentication
+from .conditional import aconditional_get
+from .fieldsets import shape_for_read
+from .filters import EmployeeFilter, EmployeeOrderingFilter, EmployeeSearchFilter
+from .models import Company, Department, Employee, ManagerScope, User
+from .pagination import KeysetPagination
+from .permissions import (
+    dashboard_scope,
+    request_role,
+    scope_companies,
+    scope_departments,
+    scope_employees,
+)
+from .routers import routing
+from .serializers import CompanySerializer, DepartmentSerializer, EmployeeSerializer
+
+MANAGER_ROLES = ('Admin', 'Manager')
+
+
+class AsyncReadView(View):
+    """
+    Base class: authenticates the bearer token, checks `allowed_roles` and
+    answers conditional requests before calling `read()`, which subclasses
+    must define as `async def read(self, request, ...)`.
+    """
+    http_method_names = ['get', 'head', 'options']
+    allowed_roles = None
+    etag_models = ()
+    renderer = JSONRenderer()
+
+    def etag_scope(self):
+        return ''
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not inspect.iscoroutinefunction(getattr(cls, 'read', None)):
+            raise TypeError(f"{cls.__name__} must define `async def read(self, request, ...)`.")
+
+    async def get(self, request, *args, **kwargs):
+        self.request = drf_request = Request(request)
+        with routing() as state:
+            try:
+                authenticated = await CachedJWTAuthentication().aauthenticate(request)
+                if authenticated is None:
+                    raise exceptions.NotAuthenticated()
+                drf_request.user, drf_request.auth = authenticated
+                if self.allowed_roles is not None and request_role(drf_request) not in self.allowed_roles:
+                    raise exceptions.PermissionDenied()
+                await state.aenable(drf_request.user.pk)
+                # Choosing a replica may check its lag; later reads reuse the choice.
+                await sync_to_async(state.read_alias)()
+                return await aconditional_get(
+                    drf_request, self.etag_models, lambda: self.read(drf_request, *args, **kwargs),
+                    scope=self.etag_scope(),
+                )
+            except Http404:
+                return self.error_response(exceptions.NotFound())
+            except exceptions.APIException as exc:
+                return self.error_response(exc)
+
+    def render(self, data, status=200):
+        return HttpResponse(self.renderer.render(data), status=status, content_type='application/json')
+
+    def error_response(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+
+
+class AsyncModelReadView(AsyncReadView):
+    """
+    `list` (no `pk`) and `retrieve` (with `pk`) for one model, built the same
+    way as the matching `ModelViewSet`.
+    """
+    queryset = None
+    serializer_class = None
+    filter_backends = ()
+    keyset_ordering = ()
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def build_queryset(self, request):
+        """The shaped read queryset, bound to the database it reads from."""
+        queryset = shape_for_read(self.serializer_class, self.filter_queryset(self.get_queryset()), request, self)
+        return queryset.using(queryset.db)
+
+    async def read(self, request, pk=None):
+        queryset = await sync_to_async(self.build_queryset)(request)
+        context = {'request': request, 'view': self}
+        if pk is not None:
+            try:
+                instance = await queryset.aget(pk=pk)
+            except queryset.model.DoesNotExist:
+                raise Http404
+            return self.render(self.serializer_class(instance, context=context).data)
+
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        data = self.serializer_class(page, many=True, context=context).data
+        return self.render(paginator.get_paginated_data(data))
+
+
+class AsyncCompanyView(AsyncModelReadView):
+    queryset = Company.objects.all()
+    serializer_class = CompanySerializer
+    allowed_roles = MANAGER_ROLES
+    etag_models = (Company, Department, Employee, User, ManagerScope)
+
+    def get_queryset(self):
+        return scope_companies(super().get_queryset(), self.request)
+
+
+class AsyncDepartmentView(AsyncModelReadView):
+    queryset = Department.objects.all()
+    serializer_class = DepartmentSerializer
+    allowed_roles = MANAGER_ROLES
+    keyset_ordering = ('company_id', 'id')
+    etag_models = (Department, ManagerScope)
+
+    def get_queryset(self):
+        return scope_departments(super().get_queryset(), self.request)
+
+
+class AsyncEmployeeView(AsyncModelReadView):
+    queryset = Employee.objects.select_related('user')
+    serializer_class = EmployeeSerializer
+    filter_backends = (EmployeeFilter, EmployeeSearchFilter, EmployeeOrderingFilter)
+    etag_models = (Employee, User, ManagerScope)
+
+    def etag_scope(self):
+        # `days_employed` grows by a day without any write.
+        return str(now().date())
+
+    def get_queryset(self):
+        # Scoped by role and narrowed to one partition, as in `EmployeeViewSet`.
+        queryset = scope_employees(super().get_queryset().with_tenure(), self.request)
+        if str(self.kwargs.get('pk', '')).isdigit():
+            queryset = partitioning.narrow_to_partition(queryset, 'employee_id', self.kwargs['pk'])
+        return queryset
+
+
+class AsyncDashboardView(AsyncReadView):
+    allowed_roles = MANAGER_ROLES
+    etag_models = (Company, Department, Employee, ManagerScope)
+
+    async def read(self, request):
+        scope = await sync_to_async(dashboard_scope)(request)
+        payload, computed_at = await adashboard_snapshot(**scope)
+        return self.render({
+            **payload,
+            'computed_at': computed_at,
+            'snapshot_age_seconds': round((now() - computed_at).total_seconds(), 3),
+        })
@@ -0,0 +1,124 @@
+"""
+JWT authentication backed by a small in-process user cache.
+
+Access tokens carry signed `role` and `employee_id` claims (see
+`CustomTokenObtainPairSerializer.get_token`), which permission checks read
+through `core.permissions.request_role`. The `User` row itself is served
+from a bounded, TTL'd LRU cache, so most requests run no auth query at all.
+
+Each entry is tagged with its user's row version from `core.versioning`,
+which that user's saves and deletes bump in the shared cache (the core.E001
+check refuses several workers on a per-process one). A write in any worker
+thus drops that user, and only that user, from every worker's cache.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import versioning
+from .metrics import AUTH_USER_CACHE_LOOKUPS
+
+
+class UserCache:
+    """Thread-safe LRU of users keyed by primary key."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, pk, version):
+        with self.lock:
+            entry = self.entries.get(pk)
+            if entry is None:
+                AUTH_USER_CACHE_LOOKUPS.labels('miss').inc()
+                return None
+            user, cached_version, expires = entry
+            if cached_version != version or expires < time.monotonic():
+                del self.entries[pk]
+                AUTH_USER_CACHE_LOOKUPS.labels('miss').inc()
+                return None
+            self.entries.move_to_end(pk)
+        AUTH_USER_CACHE_LOOKUPS.labels('hit').inc()
+        # Requests may annotate or modify their user; never hand out the shared instance.
+        return copy.copy(user)
+
+    def set(self, pk, version, user):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[pk] = (copy.copy(user), version, time.monotonic() + self.ttl)
+            self.entries.move_to_end(pk)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """`JWTAuthentication` that loads users through `user_cache`."""
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        version = versioning.get_row_version(self.user_model, user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = self.load_user(user_id)
+            user_cache.set(user_id, version, user)
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """Async counterpart of `authenticate`, for the ASGI views."""
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        user_id = self.get_user_id(validated_token)
+        version = await versioning.aget_row_version(self.user_model, user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = await self.aload_user(user_id)
+            user_cache.set(user_id, version, user)
+        return self.check_user(user, validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def load_user(self, user_id):
+        try:
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+    async def aload_user(self, user_id):
+        try:
+            return await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+    def check_user(self, user, validated_token):
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        return user
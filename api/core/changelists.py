@@ -0,0 +1,194 @@
+"""
+Admin changelists that stay fast on tables with millions of rows.
+
+- `EstimatedCountPaginator` counts exactly only small results; larger ones
+  take PostgreSQL's planner estimate instead of a full `COUNT(*)`.
+- `KeysetChangeList` pages a primary-key ordered list with `?after=<pk>`
+  and `?before=<pk>` seeks instead of growing OFFSETs.
+- `AutocompleteFilter` filters on a foreign key through the admin's
+  autocomplete view instead of listing every related row in the sidebar.
+
+`ScalableAdminMixin` puts them together for a `ModelAdmin`.
+"""
+import json
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import ShowFacets
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+
+
+def estimate_count(queryset):
+    """The planner's row estimate for `queryset`, or None when unavailable."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts exactly while the planner expects fewer than
+    `ADMIN_EXACT_COUNT_LIMIT` rows; above that, reports the estimate.
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        self.estimated = True
+        return estimate
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Pages with `?after=<pk>` (next) and `?before=<pk>` (previous) while the
+    list is ordered by primary key only (the default ordering of the admins
+    using it), so every page costs an index seek or two. Lists sorted on
+    other columns fall back to numbered pages.
+    """
+    keyset = False
+    next_url = None
+    previous_url = None
+    first_url = None
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(AFTER_VAR, None)
+        params.pop(BEFORE_VAR, None)
+        return params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering or searching starts again from the first page.
+        cursors = {AFTER_VAR, BEFORE_VAR} - set(new_params or ())
+        return super().get_query_string(new_params, [*(remove or []), *sorted(cursors)])
+
+    def _keyset_descending(self):
+        """True/False for a descending/ascending pk ordering, else None."""
+        pk_names = {'pk', self.lookup_opts.pk.name}
+        # The admin appends '-pk' to orderings it cannot prove total, even '-pk'.
+        directions = set()
+        for part in self.queryset.query.order_by:
+            if not isinstance(part, str) or part.removeprefix('-') not in pk_names:
+                return None
+            directions.add(part.startswith('-'))
+        return directions.pop() if len(directions) == 1 else None
+
+    def get_results(self, request):
+        descending = self._keyset_descending()
+        if descending is None or self.show_all:
+            return super().get_results(request)
+
+        after, before = self.params.get(AFTER_VAR), self.params.get(BEFORE_VAR)
+        later, earlier = ('pk__lt', 'pk__gt') if descending else ('pk__gt', 'pk__lt')
+        queryset = self.queryset
+        has_previous = False
+        try:
+            if after:
+                queryset = queryset.filter(**{later: self.lookup_opts.pk.to_python(after)})
+                has_previous = True
+            elif before:
+                # Walk back over the keys alone to find where the previous page starts.
+                back = list(
+                    queryset.filter(**{earlier: self.lookup_opts.pk.to_python(before)})
+                    .reverse().values_list('pk', flat=True)[:self.list_per_page + 1]
+                )
+                has_previous = len(back) > self.list_per_page
+                if has_previous:
+                    queryset = queryset.filter(**{f'{later}e': back[self.list_per_page - 1], earlier: before})
+        except forms.ValidationError:
+            after = before = None
+        result_list = queryset[:self.list_per_page]
+        rows = list(result_list)
+
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = has_previous or bool(before) or len(rows) == self.list_per_page
+        self.keyset = True
+        if len(rows) == self.list_per_page:
+            self.next_url = self.get_query_string({AFTER_VAR: rows[-1].pk})
+        if has_previous and rows:
+            self.previous_url = self.get_query_string({BEFORE_VAR: rows[0].pk})
+            self.first_url = self.get_query_string()
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign-key filter rendered as an autocomplete select. Only the chosen
+    row is loaded; candidates are searched through the related admin's
+    `search_fields`, which must be set.
+    """
+    template = 'admin/core/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.lookup_val = get_last_value_from_parameters(self.used_parameters, self.lookup_kwarg)
+        choice_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+        self.widget = choice_field.widget.render(
+            self.lookup_kwarg, self.lookup_val, attrs={'id': f'id_filter_{field_path}', 'style': 'width: 100%'},
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+        }
+        yield {
+            'widget': self.widget,
+            'lookup': self.lookup_kwarg,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+        }
+
+
+class ScalableAdminMixin:
+    """
+    `ModelAdmin` mixin: estimated counts, keyset pages and no facet or
+    unfiltered counts. Pair with `list_select_related`, `autocomplete_fields`
+    and `AutocompleteFilter` for the foreign keys.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = ShowFacets.NEVER
+    ordering = ('-pk',)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    @property
+    def media(self):
+        # Filters have no media of their own; the changelist takes the admin's.
+        return super().media + AutocompleteSelect(None, self.admin_site).media + forms.Media(
+            js=['core/admin/autocomplete_filter.js'],
+        )
@@ -0,0 +1,36 @@
+"""
+System checks for the deployment settings the API relies on.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Table versions (see `core.versioning`), dashboard snapshots and cached
+    users live in the default cache. With a cache of its own, each worker
+    would miss the others' writes and answer with stale 304s and dashboards.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.WEB_CONCURRENCY > 1 and backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"{settings.WEB_CONCURRENCY} workers cannot share the per-process cache {backend}.",
+            hint="Set CACHE_URL to a cache all workers share (e.g. redis:// or memcache://), or WEB_CONCURRENCY=1.",
+            id='core.E001',
+        )]
+    return []
+
+
+@register()
+def check_metrics_token(app_configs, **kwargs):
+    """`/metrics` is only served behind a token."""
+    if settings.METRICS and not settings.METRICS_TOKEN:
+        return [Warning(
+            "METRICS is on but METRICS_TOKEN is empty, so /metrics is not served.",
+            hint="Set METRICS_TOKEN and have scrapers send 'Authorization: Bearer <token>'.",
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,106 @@
+"""
+Conditional GET support based on per-table versions.
+
+An ETag is derived from the versions of the tables a response reads, the
+request path (including the query string) and the caller's identity, so
+deciding whether a client copy is still fresh costs one cache lookup and
+no queries, rendering or hashing of the body.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versioning
+from .routers import staleness_scope
+
+
+def compute_etag(request, models, scope=''):
+    return _etag(request, versioning.get_versions(*models), scope)
+
+
+async def acompute_etag(request, models, scope=''):
+    return _etag(request, await versioning.aget_versions(*models), scope)
+
+
+def _etag(request, versions, scope):
+    user = request.user
+    raw = '|'.join((
+        request.get_full_path(),
+        str(getattr(user, 'pk', '')),
+        str(getattr(user, 'role', '')),
+        scope,
+        staleness_scope(),
+        ','.join(str(version) for version in versions),
+    ))
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def is_not_modified(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix.
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag in candidates
+
+
+def finalize(response, etag):
+    response['ETag'] = etag
+    # Let browsers keep the body but revalidate it on every use.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def conditional_get(request, models, build_response, scope=''):
+    """
+    Return a bodiless 304 when the client's ETag is current, otherwise the
+    response from `build_response()` tagged with the ETag.
+    """
+    etag = compute_etag(request, models, scope)
+    if is_not_modified(request, etag):
+        return finalize(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+    response = build_response()
+    if response.status_code == status.HTTP_200_OK:
+        finalize(response, etag)
+    return response
+
+
+async def aconditional_get(request, models, build_response, scope=''):
+    """Async counterpart of `conditional_get`; `build_response` is a coroutine function."""
+    etag = await acompute_etag(request, models, scope)
+    if is_not_modified(request, etag):
+        return finalize(HttpResponseNotModified(), etag)
+    response = await build_response()
+    if response.status_code == status.HTTP_200_OK:
+        finalize(response, etag)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / If-None-Match handling to `list` and `retrieve`. Views list
+    every model their serializer reads in `etag_models`, and anything else
+    the response changes with in `etag_scope()`.
+    """
+    etag_models = ()
+
+    def etag_scope(self):
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        return conditional_get(
+            request, self.etag_models, lambda: build(request, *args, **kwargs), scope=self.etag_scope(),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        return conditional_get(
+            request, self.etag_models, lambda: build(request, *args, **kwargs), scope=self.etag_scope(),
+        )
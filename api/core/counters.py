@@ -0,0 +1,53 @@
+"""
+Denormalized counter maintenance for `Company` and `Department`.
+
+Writes call `adjust()` with signed deltas instead of recounting. Deltas are
+coalesced per transaction (per savepoint, so a rolled back savepoint drops
+its own deltas) and applied once the transaction commits, as one
+`UPDATE ... SET col = col + delta` per touched row. Rows are updated in a
+stable order so concurrent writers cannot deadlock on each other.
+
+Between a writer's commit and its deltas, its rows are visible but not yet
+counted. `manage.py reconcile_counters` leaves drift alone that changes
+within that window rather than recounting over a pending delta.
+"""
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+
+from . import deferred, versioning
+
+
+class _PendingCounters:
+    def __init__(self, using):
+        self.using = using
+        self.deltas = defaultdict(lambda: defaultdict(int))
+
+    def add(self, model, pk, deltas):
+        row = self.deltas[(model, pk)]
+        for field, delta in deltas.items():
+            row[field] += delta
+
+    def flush(self):
+        deferred.discard(self.using, self)
+        deltas, self.deltas = self.deltas, defaultdict(lambda: defaultdict(int))
+        with transaction.atomic(using=self.using):
+            for (model, pk), fields in sorted(deltas.items(), key=lambda item: (item[0][0]._meta.label, item[0][1])):
+                changes = {field: F(field) + delta for field, delta in fields.items() if delta}
+                if changes:
+                    model._default_manager.using(self.using).filter(pk=pk).update(**changes)
+        versioning.bump(*{model for model, _ in deltas}, using=self.using)
+
+
+def adjust(model, pk, using=DEFAULT_DB_ALIAS, **deltas):
+    """
+    Queue `field=delta` increments for the `model` row with primary key `pk`.
+    Outside of a transaction the increments are applied immediately.
+    """
+    if pk is None:
+        return
+    buffer = deferred.pending(using, 'counters', lambda: _PendingCounters(using))
+    buffer.add(model, pk, deltas)
+    if not connections[using].in_atomic_block:
+        buffer.flush()
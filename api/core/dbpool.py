@@ -0,0 +1,43 @@
+"""
+Metrics for the psycopg connection pools Django opens when a database has
+`OPTIONS['pool']` set (see settings.py). Pools are per process, so the
+numbers describe the worker that serves the request.
+"""
+from django.db import connections
+
+
+def pool_stats(connection):
+    """
+    Return a snapshot of `connection`'s pool, or None when it is not pooled
+    (or has not been opened yet). `timeouts_total` counts requests that gave
+    up waiting for a connection; all `*_total` values grow monotonically.
+    """
+    pool = getattr(connection, 'pool', None)
+    if pool is None or pool.closed:
+        return None
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    available = stats.get('pool_available', 0)
+    return {
+        'min_size': stats.get('pool_min', pool.min_size),
+        'max_size': stats.get('pool_max', pool.max_size),
+        'size': size,
+        'in_use': size - available,
+        'idle': available,
+        'waiting': stats.get('requests_waiting', 0),
+        'requests_total': stats.get('requests_num', 0),
+        'requests_queued_total': stats.get('requests_queued', 0),
+        'wait_ms_total': stats.get('requests_wait_ms', 0),
+        'timeouts_total': stats.get('requests_errors', 0),
+        'connections_total': stats.get('connections_num', 0),
+        'connections_lost_total': stats.get('connections_lost', 0),
+    }
+
+
+def all_pool_stats():
+    """`{alias: pool_stats(...)}` for every configured pooled database."""
+    return {
+        alias: pool_stats(connections[alias])
+        for alias in connections
+        if connections.settings[alias].get('OPTIONS', {}).get('pool')
+    }
@@ -0,0 +1,32 @@
+"""
+Per-transaction buffers for work that should run once, after commit.
+
+`pending()` returns one buffer per (connection, savepoint, name). The first
+call registers the buffer's `flush` with `transaction.on_commit`, so a
+rolled back savepoint discards its own buffer along with its callbacks.
+Outside of a transaction the caller is expected to flush immediately.
+"""
+from django.db import connections, transaction
+
+
+def pending(using, name, factory):
+    connection = connections[using]
+    registered = {callback for _, callback, _ in connection.run_on_commit}
+    buffers = connection.__dict__.setdefault('_deferred_buffers', {})
+    key = (name, tuple(connection.savepoint_ids))
+    buffer = buffers.get(key)
+    if buffer is None or buffer.flush not in registered:
+        # Buffers whose flush is no longer queued belong to rolled back blocks.
+        for stale in [k for k, b in buffers.items() if b.flush not in registered]:
+            del buffers[stale]
+        buffer = buffers[key] = factory()
+        if connection.in_atomic_block:
+            transaction.on_commit(buffer.flush, using=using)
+    return buffer
+
+
+def discard(using, buffer):
+    """Forget `buffer` once it has been flushed."""
+    buffers = connections[using].__dict__.get('_deferred_buffers', {})
+    for key in [k for k, b in buffers.items() if b is buffer]:
+        del buffers[key]
@@ -0,0 +1,133 @@
+"""
+Employee status history and its daily rollups.
+
+`record()` queues an `EmployeeStatusEvent` for a status change or a move.
+As with core.counters, events are buffered per transaction (per savepoint)
+and written once it commits: one bulk INSERT for the events, then the
+`EmployeeStatusRollup` rows they touch are created if missing, locked in
+primary-key order and incremented with one bulk UPDATE. Reports read the
+rollups only, never the events or the employee table.
+"""
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils.timezone import localdate
+
+from . import deferred, versioning
+
+BATCH_SIZE = 1000
+ROLLUP_FIELDS = ('entered', 'exited', 'moved_in', 'moved_out', 'stage_seconds', 'timed_exits')
+
+
+class _PendingEvents:
+    def __init__(self, using):
+        self.using = using
+        self.events = []
+
+    def flush(self):
+        # Imported here: core.models imports this module.
+        from .models import EmployeeStatusEvent, EmployeeStatusRollup
+
+        deferred.discard(self.using, self)
+        events, self.events = self.events, []
+        if not events:
+            return
+        with transaction.atomic(using=self.using):
+            EmployeeStatusEvent.objects.using(self.using).bulk_create(events, batch_size=BATCH_SIZE)
+            apply_rollups(rollup_deltas(events), using=self.using)
+        versioning.bump(EmployeeStatusRollup, using=self.using)
+
+
+def record(using=DEFAULT_DB_ALIAS, **fields):
+    """
+    Queue an `EmployeeStatusEvent(**fields)`. Outside of a transaction it is
+    written immediately.
+    """
+    from .models import EmployeeStatusEvent
+
+    buffer = deferred.pending(using, 'status_events', lambda: _PendingEvents(using))
+    buffer.events.append(EmployeeStatusEvent(**fields))
+    if not connections[using].in_atomic_block:
+        buffer.flush()
+
+
+def record_created(employees, using=DEFAULT_DB_ALIAS):
+    """Queue the creation events of employees inserted with `bulk_create`."""
+    for employee in employees:
+        record(
+            using, employee_id=employee.pk, company_id=employee.company_id, department_id=employee.department_id,
+            to_status=employee.status, occurred_at=employee.status_changed_at,
+        )
+
+
+def rollup_deltas(events):
+    """
+    Fold `events` into `{(day, company_id, department_id, status): {field:
+    delta}}`. An event that keeps the status but changes the placement is a
+    move: it counts as `moved_out`/`moved_in`, not as a stage exit/entry.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for event in events:
+        day = localdate(event.occurred_at)
+        moved = event.from_status == event.to_status
+        if event.from_status:
+            row = deltas[(day, event.from_company_id, event.from_department_id, event.from_status)]
+            if moved:
+                row['moved_out'] += 1
+            else:
+                row['exited'] += 1
+                if event.stage_seconds is not None:
+                    row['stage_seconds'] += event.stage_seconds
+                    row['timed_exits'] += 1
+        if event.to_status:
+            row = deltas[(day, event.company_id, event.department_id, event.to_status)]
+            row['moved_in' if moved else 'entered'] += 1
+    return deltas
+
+
+def apply_rollups(deltas, using=DEFAULT_DB_ALIAS):
+    """Add `deltas` (from `rollup_deltas`) to the rollup rows."""
+    from .models import EmployeeStatusRollup
+
+    if not deltas:
+        return
+    rollups = EmployeeStatusRollup.objects.using(using)
+    keys = sorted(deltas)
+    rollups.bulk_create(
+        [EmployeeStatusRollup(day=day, company_id=company_id, department_id=department_id, status=status)
+         for day, company_id, department_id, status in keys],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # Lock a superset of the touched rows in a stable order, so concurrent
+    # flushes serialize instead of deadlocking.
+    rows = rollups.select_for_update().filter(
+        day__in={key[0] for key in keys},
+        company_id__in={key[1] for key in keys},
+        department_id__in={key[2] for key in keys},
+    ).order_by('pk')
+    changed = []
+    for row in rows:
+        delta = deltas.get((row.day, row.company_id, row.department_id, row.status))
+        if delta:
+            for field, value in delta.items():
+                setattr(row, field, getattr(row, field) + value)
+            changed.append(row)
+    rollups.bulk_update(changed, ROLLUP_FIELDS, batch_size=BATCH_SIZE)
+
+
+def rebuild_rollups(using=DEFAULT_DB_ALIAS):
+    """Recompute every rollup from the event log; returns the number of rows."""
+    from .models import EmployeeStatusEvent, EmployeeStatusRollup
+
+    with transaction.atomic(using=using):
+        rollups = EmployeeStatusRollup.objects.using(using)
+        rollups.all().delete()
+        deltas = rollup_deltas(EmployeeStatusEvent.objects.using(using).order_by('id').iterator(chunk_size=BATCH_SIZE))
+        rollups.bulk_create(
+            [EmployeeStatusRollup(day=day, company_id=company_id, department_id=department_id, status=status, **delta)
+             for (day, company_id, department_id, status), delta in sorted(deltas.items())],
+            batch_size=BATCH_SIZE,
+        )
+    versioning.bump(EmployeeStatusRollup, using=using)
+    return len(deltas)
@@ -0,0 +1,120 @@
+"""
+Sparse fieldsets (`?fields=`) and opt-in expansion (`?expand=`) for reads.
+
+`DynamicFieldsMixin` trims a serializer to the requested shape, and
+`ShapedQuerysetMixin` derives the matching `only()` / `select_related()` /
+`prefetch_related()` calls, so columns and relations nobody asked for are
+never fetched.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import SAFE_METHODS
+
+from . import timing
+
+
+def _split(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def requested_shape(request):
+    """Return `(fields, expand)`; `fields` is None when every field is wanted."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    fields = _split(request.query_params.get('fields'))
+    expand = _split(request.query_params.get('expand'))
+    return fields or None, expand
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin. Subclasses may declare:
+
+    - `expandable_fields`: name -> callable returning the nested serializer
+      to add when the name is listed in `?expand=`.
+    - `field_sources`: serializer field -> model columns it reads, when that
+      is not simply the field of the same name.
+    - `select_related_fields` / `prefetch_fields`: field -> relation to load
+      eagerly when that field is rendered.
+
+    Only the root serializer reads the query string; nested serializers are
+    always rendered in full.
+    """
+    expandable_fields = {}
+    field_sources = {}
+    select_related_fields = {}
+    prefetch_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested_shape(self._context.get('request'))
+        for name in expand & self.expandable_fields.keys():
+            self.fields[name] = self.expandable_fields[name]()
+        if fields is not None:
+            for name in set(self.fields) - fields - expand:
+                self.fields.pop(name)
+
+    def to_representation(self, instance):
+        if timing.active() is None:
+            return super().to_representation(instance)
+        # Time top-level objects only; nested serializers are part of their parent.
+        parent = self.parent
+        if parent is None or (parent is self.root and isinstance(parent, serializers.ListSerializer)):
+            with timing.measure('serialize'):
+                return super().to_representation(instance)
+        return super().to_representation(instance)
+
+    @classmethod
+    def shape_queryset(cls, queryset, request, extra_columns=()):
+        serializer = cls(context={'request': request})
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        for name in (*extra_columns, *(
+            source for field in serializer.fields for source in cls.field_sources.get(field, (field,))
+        )):
+            try:
+                columns.add(model._meta.get_field(name.lstrip('-')).name)
+            except FieldDoesNotExist:
+                continue
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        related = [cls.select_related_fields[f] for f in serializer.fields if f in cls.select_related_fields]
+        prefetch = [cls.prefetch_fields[f]() for f in serializer.fields if f in cls.prefetch_fields]
+        queryset = queryset.only(*columns, *related).prefetch_related(*prefetch)
+        # select_related() without arguments would follow every foreign key.
+        return queryset.select_related(*related) if related else queryset
+
+
+def ordering_columns(queryset, request, view):
+    """
+    The columns `view` sorts on, as its ordering filters resolve them (e.g.
+    `days_employed` to `hired_on`, `company` to `company_id`).
+    """
+    columns = list(getattr(view, 'keyset_ordering', ()))
+    for backend in getattr(view, 'filter_backends', ()):
+        if issubclass(backend, OrderingFilter):
+            columns.extend(backend().get_ordering(request, queryset, view) or ())
+    return columns
+
+
+def shape_for_read(serializer_class, queryset, request, view):
+    """Shape `queryset` for a list/retrieve of `view` rendered with `serializer_class`."""
+    # Keep the sort columns loaded; the paginator reads them to build cursors.
+    return serializer_class.shape_queryset(
+        queryset, request, extra_columns=ordering_columns(queryset, request, view),
+    )
+
+
+class ShapedQuerysetMixin:
+    """
+    Viewset mixin: shapes the queryset for `list`/`retrieve` from the
+    serializer's requested fields. Writes keep the full queryset.
+    """
+    shaped_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.shaped_actions and self.request.method in SAFE_METHODS:
+            queryset = shape_for_read(self.get_serializer_class(), queryset, self.request, self)
+        return queryset
@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+from django.utils.dateparse import parse_date
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from .models import Employee
+from .search import search_employees
+
+
+class EmployeeSearchFilter(BaseFilterBackend):
+    """
+    `?q=` full-text and fuzzy employee search, ranked best match first.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        return search_employees(queryset, term) if term.strip() else queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Search employees by name, email, designation, company or department.',
+            'schema': {'type': 'string'},
+        }]
+
+
+class EmployeeFilter(BaseFilterBackend):
+    """
+    Indexed server-side filters for employees:
+    `status`, `company`, `department` (comma-separated lists are accepted),
+    `designation`, a `hired_on_after` / `hired_on_before` date range, and a
+    `days_employed_min` / `days_employed_max` tenure range, applied to
+    `hired_on` so it uses the same indexes.
+    """
+    list_params = {'status': 'status', 'company': 'company_id', 'department': 'department_id'}
+    params = (*list_params, 'designation', 'hired_on_after', 'hired_on_before', 'days_employed_min', 'days_employed_max')
+
+    def filter_queryset(self, request, queryset, view):
+        return self.apply(queryset, request.query_params)
+
+    def apply(self, queryset, params):
+        """Filter `queryset` by a mapping of the query parameters above."""
+        errors = {}
+        filters = {}
+
+        for param, column in self.list_params.items():
+            values = [value.strip() for value in str(params.get(param, '')).split(',') if value.strip()]
+            if not values:
+                continue
+            if param == 'status':
+                unknown = set(values) - {choice for choice, _ in Employee.STATUS_CHOICES}
+                if unknown:
+                    errors[param] = [f"Unknown status: {', '.join(sorted(unknown))}."]
+                    continue
+            elif not all(value.isdigit() for value in values):
+                errors[param] = ["Expected a comma-separated list of ids."]
+                continue
+            filters[f'{column}__in' if len(values) > 1 else column] = values if len(values) > 1 else values[0]
+
+        if params.get('designation'):
+            filters['designation'] = params['designation']
+
+        for param, lookup in (('hired_on_after', 'hired_on__gte'), ('hired_on_before', 'hired_on__lte')):
+            if params.get(param):
+                value = parse_date_param(params[param])
+                if value is None:
+                    errors[param] = ["Expected a date in YYYY-MM-DD format."]
+                else:
+                    filters[lookup] = value
+
+        # Tenure ranges become hired_on bounds, which may tighten the dates above.
+        tenure = {}
+        for param, lookup in (('days_employed_min', 'hired_on__lte'), ('days_employed_max', 'hired_on__gte')):
+            value = str(params.get(param, '')).strip()
+            if not value:
+                continue
+            if not value.isdigit():
+                errors[param] = ["Expected a whole number of days."]
+            else:
+                tenure[lookup] = now().date() - timedelta(days=int(value))
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**filters).filter(**tenure)
+
+    def get_schema_operation_parameters(self, view):
+        descriptions = {
+            'status': 'Filter by status (comma-separated).',
+            'company': 'Filter by company id (comma-separated).',
+            'department': 'Filter by department id (comma-separated).',
+            'designation': 'Filter by exact designation.',
+            'hired_on_after': 'Only employees hired on or after this date.',
+            'hired_on_before': 'Only employees hired on or before this date.',
+            'days_employed_min': 'Only hired employees employed for at least this many days.',
+            'days_employed_max': 'Only hired employees employed for at most this many days.',
+        }
+        return [
+            {'name': name, 'required': False, 'in': 'query', 'description': description,
+             'schema': {'type': 'string'}}
+            for name, description in descriptions.items()
+        ]
+
+
+class EmployeeOrderingFilter(OrderingFilter):
+    """
+    `?ordering=` on indexed employee columns. Relations order by their key
+    column so keyset pagination never has to load the related row, and
+    `days_employed` orders by `hired_on` reversed (employees who are not
+    hired have no tenure and come last for `-days_employed`).
+    """
+    ordering_fields = ('id', 'name', 'status', 'designation', 'hired_on', 'days_employed', 'company', 'department')
+    column_aliases = {'company': 'company_id', 'department': 'department_id'}
+    reversed_aliases = {'days_employed': 'hired_on'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        columns = []
+        for field in ordering:
+            descending, name = field.startswith('-'), field.lstrip('-')
+            if name in self.reversed_aliases:
+                descending, name = not descending, self.reversed_aliases[name]
+            columns.append(('-' if descending else '') + self.column_aliases.get(name, name))
+        return columns
+
+    def get_valid_fields(self, queryset, fields, request, **kwargs):
+        return [(field, field) for field in self.ordering_fields]
+
+
+def parse_date_param(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
@@ -0,0 +1,212 @@
+"""
+Streaming bulk import of employees (and their users) from CSV or NDJSON.
+
+Rows are parsed lazily and handled in fixed-size batches, so memory stays
+bounded by the batch size rather than the file size. Each batch is
+validated with `EmployeeImportSerializer` plus a handful of set-based
+lookups, then written with `bulk_create` inside one transaction.
+
+Passwords are not imported. Hashing one per row would cap an import at a
+few rows per second per core, so imported users get an unusable password
+and set their own through the password reset (`/auth/users/reset_password/`).
+Passwords given in the file are dropped and counted in the report.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework import serializers
+
+from . import counters, events, versioning
+from .models import Company, Department, Employee, User
+from .serializers import EmployeeImportSerializer, validate_employee_rules
+
+FORMATS = ('csv', 'ndjson')
+
+
+class _UnparsableRow(str):
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+
+def iter_csv(stream):
+    """Yield dict rows from a binary or text CSV stream."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(stream)
+
+
+def iter_ndjson(stream):
+    """Yield dict rows from a newline-delimited JSON stream; blank lines are skipped."""
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield _UnparsableRow(str(exc))
+
+
+def iter_rows(stream, format):
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported import format {format!r}; expected one of {', '.join(FORMATS)}.")
+    return iter_csv(stream) if format == 'csv' else iter_ndjson(stream)
+
+
+def _normalize(row):
+    """Flatten API-shaped rows (`{"user": {...}}`) and drop empty CSV cells."""
+    if not isinstance(row, dict):
+        return row
+    row = dict(row)
+    user = row.pop('user', None)
+    if isinstance(user, dict):
+        for field in ('email', 'password', 'role'):
+            row.setdefault(field, user.get(field))
+    return {key: value for key, value in row.items() if value not in ('', None)}
+
+
+class ImportReport:
+    """
+    Running totals for an import. Only the first `max_errors` row errors are
+    kept in memory; the rest are counted and passed to `on_error`.
+    """
+    def __init__(self, max_errors=1000, on_error=None):
+        self.created = 0
+        self.failed = 0
+        self.passwords_dropped = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.on_error = on_error
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row_number, 'errors': errors})
+        if self.on_error:
+            self.on_error(row_number, errors)
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'passwords_dropped': self.passwords_dropped,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+class EmployeeImporter:
+    def __init__(self, batch_size=1000, max_errors=1000, on_error=None, departments=None):
+        self.batch_size = batch_size
+        # Rows may only name these departments (e.g. a Manager's scope).
+        self.departments = Department.objects.all() if departments is None else departments
+        self.report = ImportReport(max_errors=max_errors, on_error=on_error)
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self.report
+
+    def import_batch(self, batch):
+        valid = self.validate_batch(batch)
+        if not valid:
+            return
+
+        users, dropped = [], 0
+        for _, data in valid:
+            dropped += bool(data.pop('password', None))
+            user = User(email=data.pop('email'), role=data.pop('role'))
+            user.set_unusable_password()
+            users.append(user)
+        created_at = now()
+        employees = [
+            Employee(
+                email=user.email,
+                company_id=data.pop('company'),
+                department_id=data.pop('department'),
+                status_changed_at=created_at,
+                **data,
+            )
+            for user, (_, data) in zip(users, valid)
+        ]
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                for user, employee in zip(users, employees):
+                    employee.user = user
+                Employee.objects.bulk_create(employees)
+                events.record_created(employees)
+                versioning.bump(User, Employee)
+                # One counter update per company/department for the whole batch.
+                for company_id, total in Counter(e.company_id for e in employees).items():
+                    counters.adjust(Company, company_id, num_employees=total)
+                for department_id, total in Counter(e.department_id for e in employees).items():
+                    counters.adjust(Department, department_id, num_employees=total)
+        except IntegrityError as exc:
+            # A concurrent writer claimed one of the emails after validation.
+            for row_number, _ in valid:
+                self.report.add_error(row_number, {'non_field_errors': [f"Batch rolled back: {exc}"]})
+            return
+        self.report.created += len(employees)
+        self.report.passwords_dropped += dropped
+
+    def validate_batch(self, batch):
+        """
+        Return `[(row_number, validated_data)]` for the rows that pass, and
+        record errors for the rest. Costs three queries per batch.
+        """
+        candidates = []
+        for row_number, row in batch:
+            if not isinstance(row, dict):
+                self.report.add_error(row_number, {'non_field_errors': [f"Invalid row: {row}"]})
+                continue
+            serializer = EmployeeImportSerializer(data=_normalize(row))
+            if serializer.is_valid():
+                data = dict(serializer.validated_data)
+                data['email'] = User.objects.normalize_email(data['email'])
+                candidates.append((row_number, data))
+            else:
+                self.report.add_error(row_number, serializer.errors)
+
+        departments = dict(
+            self.departments.filter(pk__in={data['department'] for _, data in candidates})
+            .values_list('pk', 'company_id')
+        )
+        emails = [data['email'] for _, data in candidates]
+        taken = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken |= set(Employee.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        valid = []
+        for row_number, data in candidates:
+            errors = {}
+            if data['department'] not in departments:
+                errors['department'] = [f"Invalid pk \"{data['department']}\" - object does not exist."]
+            else:
+                try:
+                    validate_employee_rules(
+                        company_id=data['company'],
+                        department_company_id=departments[data['department']],
+                        status=data['status'],
+                        hired_on=data.get('hired_on'),
+                    )
+                except serializers.ValidationError as exc:
+                    errors.update(exc.detail)
+            if data['email'] in taken:
+                errors['email'] = ["A user with this email already exists."]
+            if errors:
+                self.report.add_error(row_number, errors)
+                continue
+            taken.add(data['email'])
+            valid.append((row_number, data))
+        return valid
@@ -0,0 +1,135 @@
+"""
+Database-backed background jobs.
+
+`enqueue()` inserts a `Job` row in the caller's transaction, so a job only
+becomes visible to workers once the write that asked for it commits, and is
+dropped with it on rollback. `manage.py run_worker` processes run `claim()`
+and `execute()` in a loop:
+
+- `claim()` locks the oldest due job with `SELECT ... FOR UPDATE SKIP
+  LOCKED`, so any number of workers can poll the table without handing the
+  same job to two of them, and marks it running.
+- A failing job is retried after `JOBS_RETRY_DELAY * 2 ** (attempts - 1)`
+  seconds until it has run `max_attempts` times, then marked failed with
+  the last traceback.
+- Jobs left running by a worker that died are requeued once they have not
+  reported for `JOBS_STALE_AFTER` seconds, so tasks must be idempotent.
+
+Tasks are plain functions registered with `@task('name')` (see core.tasks)
+that take the job's JSON payload as keyword arguments. A task runs in one
+transaction, unless registered with `atomic=False`: long tasks then commit
+their own batches and report each with `progress()`, which also keeps the
+job from being taken for stale. A retried or requeued task resumes from
+whatever its committed batches left.
+"""
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .models import Job
+
+TASKS = {}
+
+_running = threading.local()
+
+
+def task(name, atomic=True):
+    """Register the decorated function as the job task `name`."""
+    def register(func):
+        func.atomic = atomic
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, max_attempts=None, total_rows=None, created_by=None, **payload):
+    if name not in TASKS:
+        raise KeyError(f"Unknown job task {name!r}.")
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        total_rows=total_rows,
+        created_by=created_by,
+    )
+
+
+def run_or_enqueue(name, rows, created_by=None, **payload):
+    """
+    Run task `name` now when it touches at most `JOBS_INLINE_LIMIT` rows,
+    otherwise enqueue it. Returns the job, or None when it ran inline.
+    """
+    if rows <= settings.JOBS_INLINE_LIMIT:
+        TASKS[name](**payload)
+        return None
+    return enqueue(name, total_rows=rows, created_by=created_by, **payload)
+
+
+def progress(rows):
+    """
+    Count `rows` more as done by the running job and refresh its heartbeat,
+    in the caller's transaction. Does nothing for a task run inline.
+    """
+    job = getattr(_running, 'job', None)
+    if job is not None:
+        Job.objects.filter(pk=job.pk).update(done_rows=F('done_rows') + rows, heartbeat_at=now())
+
+
+def claim(worker):
+    """Lock the next due job, mark it running for `worker` and return it, or None."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=now())
+            .order_by('run_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.started_at = job.heartbeat_at = now()
+        job.locked_by = worker
+        job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at', 'locked_by'])
+    return job
+
+
+def execute(job):
+    """Run a claimed job (in its own transaction unless non-atomic) and record the outcome."""
+    func = TASKS[job.task]
+    _running.job = job
+    try:
+        if getattr(func, 'atomic', True):
+            with transaction.atomic():
+                func(**job.payload)
+        else:
+            func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = min(settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1), 3600)
+            job.status, job.run_at = Job.QUEUED, now() + timedelta(seconds=delay)
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status, job.last_error = Job.SUCCEEDED, ''
+    finally:
+        _running.job = None
+    job.finished_at = now()
+    job.save(update_fields=['status', 'run_at', 'last_error', 'finished_at'])
+    return job
+
+
+def requeue_stale():
+    """Requeue running jobs whose worker stopped reporting; returns how many."""
+    cutoff = now() - timedelta(seconds=settings.JOBS_STALE_AFTER)
+    stale = Job.objects.alias(seen_at=Coalesce('heartbeat_at', 'started_at'))
+    return stale.filter(status=Job.RUNNING, seen_at__lt=cutoff).update(
+        status=Job.QUEUED, run_at=now(), locked_by='',
+    )
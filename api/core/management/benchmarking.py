@@ -0,0 +1,17 @@
+"""Helpers shared by the benchmark management commands."""
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies_ms):
+    """p50 / p99 / mean of a list of millisecond timings, rounded for display."""
+    if not latencies_ms:
+        return {'p50_ms': None, 'p99_ms': None, 'mean_ms': None}
+    return {
+        'p50_ms': round(percentile(latencies_ms, 0.50), 3),
+        'p99_ms': round(percentile(latencies_ms, 0.99), 3),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 3),
+    }
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from core.dbpool import pool_stats
+from core.management.benchmarking import summarize
+
+MODES = ('per-request', 'persistent', 'pooled')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure a short request's database cost (one small query between "
+        "request start and end) with a new connection per request, persistent "
+        "connections and a connection pool, using the default database's settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', choices=MODES, help="Mode to test (default: all). Repeatable.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per thread.")
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--json', dest='as_json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, mode, requests, threads, pool_size, as_json, **options):
+        base = connections['default'].settings_dict
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError("This benchmark needs the PostgreSQL backend.")
+
+        results = []
+        for name in mode or MODES:
+            settings_dict = {**base, 'OPTIONS': {k: v for k, v in base['OPTIONS'].items() if k != 'pool'}}
+            if name == 'per-request':
+                settings_dict['CONN_MAX_AGE'] = 0
+            elif name == 'persistent':
+                settings_dict['CONN_MAX_AGE'] = None
+            else:
+                settings_dict['CONN_MAX_AGE'] = 0
+                settings_dict['OPTIONS']['pool'] = {'min_size': pool_size, 'max_size': pool_size}
+            results.append({'mode': name, **self.run(settings_dict, f'benchmark-{name}', requests, threads)})
+
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'mode':<12} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'opened':>7}")
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<12} {result['p50_ms']:>9} {result['p99_ms']:>9} {result['mean_ms']:>9} "
+                f"{result['connections_opened']:>7}"
+            )
+
+    def run(self, settings_dict, alias, requests, threads):
+        backend = load_backend(settings_dict['ENGINE'])
+        tickets = count()
+        total = requests * threads
+        latencies = []
+        wrappers = []
+        # Physical connections seen; holding them keeps their identities distinct.
+        opened = set()
+
+        def worker():
+            # Like request handling: one connection object per thread, checked
+            # at request start and end as `close_old_connections` does.
+            connection = backend.DatabaseWrapper(settings_dict, alias=alias)
+            wrappers.append(connection)
+            while next(tickets) < total:
+                started = time.perf_counter()
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                opened.add(connection.connection)
+                connection.close_if_unusable_or_obsolete()
+                latencies.append((time.perf_counter() - started) * 1000)
+            connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        result = {**summarize(latencies), 'connections_opened': len(opened)}
+        if wrappers and settings_dict['OPTIONS'].get('pool'):
+            result['pool'] = pool_stats(wrappers[0])
+            wrappers[0].close_pool()
+        return result
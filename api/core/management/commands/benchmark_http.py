@@ -0,0 +1,99 @@
+import http.client
+import json
+import threading
+import time
+from itertools import count
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.management.benchmarking import summarize
+from core.models import User
+
+ENDPOINTS = ('dashboard/', 'employees/', 'companies/', 'departments/')
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the read endpoints of one or more running servers and report "
+        "requests/sec and latency percentiles. Compare the WSGI and ASGI paths with "
+        "--target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001/async"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='LABEL=URL',
+                            help="Base URL to test, e.g. asgi=http://127.0.0.1:8001/async. Repeatable.")
+        parser.add_argument('--email', required=True, help="Manager or admin account to issue a token for.")
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS,
+                            help="Endpoint to test (default: all). Repeatable.")
+        parser.add_argument('--concurrency', type=int, default=128)
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per endpoint and target.")
+        parser.add_argument('--json', dest='as_json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, target, email, endpoint, concurrency, requests, as_json, **options):
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {email!r}.")
+        token = str(AccessToken.for_user(user))
+
+        results = []
+        for spec in target:
+            label, sep, base_url = spec.partition('=')
+            if not sep or not base_url:
+                raise CommandError(f"Invalid --target {spec!r}; expected LABEL=URL.")
+            for path in endpoint or ENDPOINTS:
+                url = base_url.rstrip('/') + '/' + path
+                results.append({'target': label, 'endpoint': path,
+                                **self.run(url, token, concurrency, requests)})
+
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'target':<8} {'endpoint':<14} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for result in results:
+            self.stdout.write(
+                f"{result['target']:<8} {result['endpoint']:<14} {result['requests_per_second']:>9} "
+                f"{result['p50_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}"
+            )
+
+    def run(self, url, token, concurrency, total):
+        """Issue `total` GETs to `url` from `concurrency` keep-alive connections."""
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+        tickets = count()
+        latencies = []
+        errors = []
+
+        def worker():
+            connection = connection_class(parts.netloc, timeout=60)
+            try:
+                while next(tickets) < total:
+                    started = time.perf_counter()
+                    try:
+                        connection.request('GET', parts.path, headers=headers)
+                        response = connection.getresponse()
+                        response.read()
+                        ok = response.status == 200
+                    except (OSError, http.client.HTTPException):
+                        connection.close()
+                        ok = False
+                    (latencies if ok else errors).append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            **summarize(latencies),
+            'errors': len(errors),
+        }
@@ -0,0 +1,72 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the employee list filters: time each one and report which "
+        "index the PostgreSQL plan uses. Run it against a seeded database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--json', dest='as_json', action='store_true', help="Print results as JSON.")
+
+    def cases(self, page_size):
+        sample = Employee.objects.order_by('id').values('company_id', 'department_id').first()
+        if sample is None:
+            raise CommandError("No employees found; seed the database first.")
+        since = date.today() - timedelta(days=365)
+        return {
+            'company+status': (
+                Employee.objects.filter(company_id=sample['company_id'], status='Hired'),
+                'employee_company_status_idx',
+            ),
+            'department+status': (
+                Employee.objects.filter(department_id=sample['department_id'], status='Interview Scheduled'),
+                'employee_dept_status_idx',
+            ),
+            'status+hired_on range': (
+                Employee.objects.filter(status='Hired', hired_on__gte=since),
+                'employee_status_hired_idx',
+            ),
+        }
+
+    def handle(self, *args, repeat, page_size, as_json, **options):
+        results = []
+        for name, (queryset, expected_index) in self.cases(page_size).items():
+            queryset = queryset.order_by('id')[:page_size]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - started) * 1000)
+            plan = queryset.explain() if connection.vendor == 'postgresql' else ''
+            results.append({
+                'case': name,
+                'expected_index': expected_index,
+                'uses_index': expected_index in plan,
+                'best_ms': round(min(timings), 3),
+                'median_ms': round(sorted(timings)[len(timings) // 2], 3),
+                'plan': plan,
+            })
+
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            verdict = 'uses' if result['uses_index'] else 'does NOT use'
+            self.stdout.write(
+                f"{result['case']:<24} {result['median_ms']:>9.3f} ms median  "
+                f"{verdict} {result['expected_index']}"
+            )
+            if options['verbosity'] > 1:
+                self.stdout.write(result['plan'])
+
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.exporters import FORMATS, stream_employees
+from core.models import Employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream all employees as CSV or NDJSON using a server-side cursor. Like "
+        "the HTTP export, employees of departments being deleted are left out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help="Destination file (defaults to stdout).")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--company', type=int, help="Only export this company's employees.")
+
+    def handle(self, *args, format, output, chunk_size, company, **options):
+        queryset = Employee.objects.live()
+        if company is not None:
+            queryset = queryset.filter(company_id=company)
+
+        stream = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+        try:
+            for line in stream_employees(queryset, format, chunk_size=chunk_size):
+                stream.write(line)
+        finally:
+            if output:
+                stream.close()
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import FORMATS, EmployeeImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Stream employees (and their users) from a CSV or NDJSON file in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        format = format or path.rsplit('.', 1)[-1].lower()
+        if format not in FORMATS:
+            raise CommandError(f"Cannot infer the format of {path}; pass --format.")
+
+        def on_error(row_number, errors):
+            self.stderr.write(json.dumps({'row': row_number, 'errors': errors}))
+
+        importer = EmployeeImporter(batch_size=batch_size, max_errors=0, on_error=on_error)
+        with open(path, 'rb') as stream:
+            report = importer.run(iter_rows(stream, format))
+        if report.passwords_dropped:
+            self.stderr.write(
+                f"Dropped {report.passwords_dropped} password(s): imported users set theirs through the password reset."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} employee(s); {report.failed} row(s) failed."
+        ))
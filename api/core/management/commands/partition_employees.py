@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError
+
+from core import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Partition core_employee by company_id online (PostgreSQL only). With "
+        "--add-partitions, give companies of a LIST-partitioned table that are "
+        "still in the default partition their own partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--method', choices=partitioning.METHODS,
+                            default=settings.EMPLOYEE_PARTITIONING or 'hash')
+        parser.add_argument('--partitions', type=int, default=settings.EMPLOYEE_HASH_PARTITIONS,
+                            help="Number of hash partitions.")
+        parser.add_argument('--batch-size', type=int, default=partitioning.BATCH_SIZE,
+                            help="Rows copied per transaction.")
+        parser.add_argument('--drop-old', action='store_true',
+                            help=f"Drop the old table instead of keeping it as {partitioning.OLD_TABLE}.")
+        parser.add_argument('--add-partitions', action='store_true')
+
+    def handle(self, *args, method, partitions, batch_size, drop_old, add_partitions, **options):
+        try:
+            if add_partitions:
+                added = partitioning.add_company_partitions()
+                self.stdout.write(self.style.SUCCESS(f"Added {len(added)} company partition(s)."))
+                return
+            partitioning.partition_employees(
+                method, partitions, batch_size=batch_size, drop_old=drop_old, log=self.stdout.write,
+            )
+        except (NotSupportedError, ValueError) as exc:
+            raise CommandError(exc)
+        for name, rows, size in partitioning.partition_sizes():
+            self.stdout.write(f"{name:<32} ~{max(rows, 0):>10} rows {size // 1024:>10} KiB")
+        self.stdout.write(self.style.SUCCESS(f"core_employee is now {method} partitioned."))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils.timezone import now
+
+from core import events
+from core.models import Employee, EmployeeStatusEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily status rollups from the status event log. With "
+        "--backfill, first log the current status of employees that have no "
+        "events yet (e.g. rows created before the log existed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=events.BATCH_SIZE)
+
+    def handle(self, *args, backfill, batch_size, **options):
+        if backfill:
+            self.stdout.write(f"Logged {self.backfill(batch_size)} missing employees.")
+        rows = events.rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows."))
+
+    def backfill(self, batch_size):
+        missing = (
+            Employee.objects.filter(~Exists(EmployeeStatusEvent.objects.filter(employee_id=OuterRef('pk'))))
+            .order_by('pk')
+            .values_list('pk', 'company_id', 'department_id', 'status', 'status_changed_at')
+        )
+        logged_at = now()
+        created = 0
+        with transaction.atomic():
+            batch = []
+            for pk, company_id, department_id, status, changed_at in missing.iterator(chunk_size=batch_size):
+                batch.append(EmployeeStatusEvent(
+                    employee_id=pk, company_id=company_id, department_id=department_id,
+                    to_status=status, occurred_at=changed_at or logged_at,
+                ))
+                if len(batch) >= batch_size:
+                    created += len(EmployeeStatusEvent.objects.bulk_create(batch))
+                    batch = []
+            created += len(EmployeeStatusEvent.objects.bulk_create(batch))
+        return created
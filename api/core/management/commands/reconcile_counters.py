@@ -0,0 +1,109 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Company, Department, Employee
+
+
+def _count_of(model, fk, **correlated):
+    """
+    Correlated `SELECT COUNT(*) FROM model WHERE fk = outer.id`. `correlated`
+    adds `field=outer.column` conditions, e.g. the partition key.
+    """
+    conditions = {fk: OuterRef('pk'), **{field: OuterRef(column) for field, column in correlated.items()}}
+    counts = (
+        model.objects.filter(**conditions)
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute drifted Company/Department counters in keyset-ordered chunks. "
+        "Writers apply their counter deltas just after they commit (see core.counters), "
+        "so a row can briefly look drifted. Each chunk is therefore counted twice, "
+        "--settle seconds apart, and only drift seen unchanged both times is fixed. "
+        "A delta that takes longer than --settle to be applied can still be counted twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+        parser.add_argument('--settle', type=float, default=1.0,
+                            help="Seconds between the two counts of a chunk.")
+
+    def handle(self, *args, chunk_size, dry_run, settle, **options):
+        self.settle = settle
+        fixed = self.reconcile(
+            Company,
+            {
+                'num_departments': _count_of(Department, 'company'),
+                'num_employees': _count_of(Employee, 'company'),
+            },
+            chunk_size,
+            dry_run,
+        )
+        fixed += self.reconcile(
+            Department,
+            # Departments and their employees share a company, so only that
+            # company's partition is scanned when core_employee is partitioned.
+            {'num_employees': _count_of(Employee, 'department', company_id='company_id')},
+            chunk_size,
+            dry_run,
+        )
+        verb = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} drifted row(s)."))
+
+    def reconcile(self, model, counters, chunk_size, dry_run):
+        fixed = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                return fixed
+            last_pk = chunk[-1]
+
+            first = self._drift(model.objects.filter(pk__in=chunk), counters)
+            if not first:
+                continue
+            time.sleep(self.settle)
+            with transaction.atomic():
+                # Lock the chunk so deltas applied from now on queue behind the fix,
+                # and land on top of the counts taken here.
+                second = self._drift(model.objects.select_for_update().filter(pk__in=chunk), counters)
+                # Drift that moved between the counts was a delta still being applied.
+                drifted = [pk for pk, values in second.items() if first.get(pk) == values]
+                if not dry_run:
+                    for pk in drifted:
+                        model.objects.filter(pk=pk).update(
+                            **{field: actual for field, (_, actual) in zip(counters, second[pk])}
+                        )
+            for pk in drifted:
+                self.stdout.write(f"{model.__name__} {pk}: counters drifted")
+            fixed += len(drifted)
+
+    def _drift(self, rows, counters):
+        """`{pk: ((stored, actual), ...)}` for the `rows` whose counters are off."""
+        drifted = rows.annotate(
+            **{f'actual_{field}': expression for field, expression in counters.items()}
+        ).filter(self._drift_condition(counters))
+        return {
+            row[0]: tuple(zip(row[1::2], row[2::2]))
+            for row in drifted.values_list('pk', *(name for field in counters for name in (field, f'actual_{field}')))
+        }
+
+    @staticmethod
+    def _drift_condition(counters):
+        condition = Q()
+        for field in counters:
+            condition |= ~Q(**{field: F(f'actual_{field}')})
+        return condition
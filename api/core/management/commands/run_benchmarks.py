@@ -0,0 +1,185 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils.timezone import now
+
+from core import partitioning, seeding, versioning
+from core.authentication import user_cache
+from core.management.benchmarking import summarize
+from core.models import Company, Employee, ManagerScope, User
+from core.serializers import CustomTokenObtainPairSerializer
+
+MANAGER_EMAIL = 'manager@bench.example'
+
+# (name, method, path, clear cache before each request)
+ENDPOINTS = (
+    ('employees list', 'GET', '/employees/', False),
+    ('employees filtered', 'GET', '/employees/?status=Hired&ordering=-hired_on', False),
+    ('employees search', 'GET', '/employees/?q=chen', False),
+    ('employee detail', 'GET', '/employees/{employee}/', False),
+    ('company employees', 'GET', '/employees/?company={company}', False),
+    ('company by tenure', 'GET', '/employees/?company={company}&ordering=-days_employed', False),
+    ('companies list', 'GET', '/companies/', False),
+    ('company expanded', 'GET', '/companies/{company}/?expand=departments', False),
+    ('departments list', 'GET', '/departments/', False),
+    ('dashboard', 'GET', '/dashboard/', False),
+    ('dashboard uncached', 'GET', '/dashboard/', True),
+    ('jwt create', 'POST', '/auth/jwt/create/', False),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the core endpoints and jwt/create/ at several data sizes in a "
+        "throwaway database, and write the results as JSON. Pass --compare with "
+        "an earlier results file to print the change in median latency. With "
+        "--partitioning (PostgreSQL), the employee table is partitioned first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000',
+                            help="Comma-separated employee counts; 1 company per 100 employees, 5 departments each.")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per endpoint and size.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='benchmark-results.json')
+        parser.add_argument('--compare', metavar='BASELINE', help="Earlier results file to compare against.")
+        parser.add_argument('--partitioning', choices=partitioning.METHODS, dest='partition_method',
+                            help="Partition core_employee by company (PostgreSQL only).")
+        parser.add_argument('--partitions', type=int, default=16, help="Hash partition count.")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Replace a leftover benchmark database without asking.")
+
+    def handle(self, *args, sizes, repeat, seed, output, compare, partition_method, partitions, interactive, **options):
+        try:
+            sizes = sorted({int(size) for size in sizes.split(',') if size.strip()})
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        if partition_method and connection.vendor != 'postgresql':
+            raise CommandError("--partitioning needs PostgreSQL.")
+        baseline = self.load(compare) if compare else None
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=not interactive)
+        try:
+            # Keep the run away from shared caches and replicas of the real database.
+            with override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                    'LOCATION': 'benchmarks'}},
+                DATABASE_REPLICAS=[],
+            ):
+                user_cache.clear()
+                if partition_method:
+                    partitioning.partition_employees(partition_method, partitions, drop_old=True)
+                self.partitioned = partitioning.partitioning_method()
+                results = self.run(sizes, repeat, seed)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {'meta': self.meta(repeat, seed), 'results': results}
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+        self.print_table(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def run(self, sizes, repeat, seed):
+        manager = User.objects.create_user(email=MANAGER_EMAIL, password=seeding.DEFAULT_PASSWORD, role='Manager')
+        token = CustomTokenObtainPairSerializer.get_token(manager).access_token
+        client = Client(headers={'Authorization': f'Bearer {token}'})
+        anonymous = Client()
+
+        results = []
+        seeded = 0
+        for size in sizes:
+            started = time.perf_counter()
+            companies = max(1, (size - seeded) // 100)
+            seeding.seed(companies, companies * 5, size - seeded, seed=seed + size)
+            seeded = size
+            if self.partitioned == 'list':
+                partitioning.add_company_partitions()
+            # The Manager manages every company, so its requests cover all the seeded rows.
+            ManagerScope.objects.bulk_create([
+                ManagerScope(user=manager, company_id=company_id)
+                for company_id in Company.objects.exclude(manager_scopes__user=manager).values_list('id', flat=True)
+            ])
+            versioning.bump(ManagerScope)
+            self.stdout.write(f"Seeded {size} employees in {time.perf_counter() - started:.1f}s; timing...")
+
+            ids = {
+                'employee': Employee.objects.order_by('id').values_list('id', flat=True).first(),
+                'company': Company.objects.order_by('-num_employees').values_list('id', flat=True).first(),
+            }
+            for name, method, path, cold in ENDPOINTS:
+                if method == 'POST':
+                    send = lambda: anonymous.post(path, {'email': MANAGER_EMAIL, 'password': seeding.DEFAULT_PASSWORD})
+                else:
+                    url = path.format(**ids)
+                    send = lambda: client.get(url)
+                results.append({'size': size, 'endpoint': name, **self.measure(send, repeat, cold)})
+        return results
+
+    def measure(self, send, repeat, cold):
+        send()  # Warm up caches and connections.
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = send()
+        # Read the count now: later requests reset the query log.
+        query_count = len(queries)
+        timings = []
+        for _ in range(repeat):
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            send()
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'status': response.status_code,
+            'queries': query_count,
+            'bytes': len(response.content),
+            **summarize(timings),
+        }
+
+    def meta(self, repeat, seed):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'created_at': now().isoformat(),
+            'git_commit': commit,
+            'database': connection.vendor,
+            'partitioning': self.partitioned,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'repeat': repeat,
+            'seed': seed,
+        }
+
+    def load(self, path):
+        try:
+            with open(path) as file:
+                return {(r['size'], r['endpoint']): r for r in json.load(file)['results']}
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+
+    def print_table(self, results, baseline):
+        header = f"{'size':>8} {'endpoint':<20} {'p50 ms':>9} {'p99 ms':>9} {'queries':>7}"
+        self.stdout.write(header + (f" {'p50 vs base':>12}" if baseline else ''))
+        for result in results:
+            line = (f"{result['size']:>8} {result['endpoint']:<20} {result['p50_ms']:>9} "
+                    f"{result['p99_ms']:>9} {result['queries']:>7}")
+            before = baseline.get((result['size'], result['endpoint'])) if baseline else None
+            if before and before.get('p50_ms'):
+                line += f" {(result['p50_ms'] / before['p50_ms'] - 1) * 100:>+11.1f}%"
+            self.stdout.write(line)
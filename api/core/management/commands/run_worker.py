@@ -0,0 +1,53 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+from core.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Process background jobs (company deletions, department moves, ...) "
+        "until stopped. Run as many workers as needed; each job goes to one of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait when no job is due.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once no job is due instead of waiting for more.")
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help="Exit after this many jobs (0: no limit), e.g. to recycle the process.")
+
+    def handle(self, *args, poll_interval, once, max_jobs, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        # Finish the current job on SIGTERM/SIGINT instead of abandoning it.
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        processed = 0
+        while not self.stopping and not (max_jobs and processed >= max_jobs):
+            close_old_connections()
+            job = jobs.claim(worker)
+            if job is None:
+                if jobs.requeue_stale():
+                    continue
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            job = jobs.execute(job)
+            processed += 1
+            style = self.style.SUCCESS if job.status == Job.SUCCEEDED else self.style.WARNING
+            self.stdout.write(style(f"{job} after {job.attempts} attempt(s)"))
+        close_old_connections()
+        self.stdout.write(f"Worker {worker} processed {processed} job(s).")
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Add deterministic synthetic companies, departments and employees (with "
+        "users) for benchmarking. Users get the same password, 'benchmark' by default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=100)
+        parser.add_argument('--departments', type=int, default=500)
+        parser.add_argument('--employees', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--password', default=seeding.DEFAULT_PASSWORD)
+
+    def handle(self, *args, companies, departments, employees, seed, batch_size, password, **options):
+        started = time.perf_counter()
+        try:
+            created = seeding.seed(companies, departments, employees, seed, batch_size, password)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created['companies']} companies, {created['departments']} departments and "
+            f"{created['employees']} employees in {time.perf_counter() - started:.1f}s."
+        ))
+
@@ -0,0 +1,54 @@
+"""
+Prometheus metrics, exposed at `/metrics`.
+
+gunicorn and uvicorn serve requests from several worker processes. When the
+`PROMETHEUS_MULTIPROC_DIR` environment variable names a directory, each
+process writes its samples to memory-mapped files there and `/metrics` merges
+the files of all workers (prometheus_client's multiprocess mode). Empty the
+directory before the server starts; `gunicorn.conf.py` drops the in-flight
+gauge of workers that exit.
+"""
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import generate_latest, multiprocess
+
+from .timing import resolve_view
+
+REQUEST_DURATION = Histogram(
+    'api_request_duration_seconds', "Time to build the response.", ['view', 'action', 'status'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'api_requests_in_flight', "Requests being served.", multiprocess_mode='livesum',
+)
+DB_QUERIES = Counter(
+    'api_db_queries', "Database queries run while serving requests.", ['view', 'action'],
+)
+DB_QUERY_DURATION = Counter(
+    'api_db_query_duration_seconds', "Time spent in database queries while serving requests.", ['view', 'action'],
+)
+AUTH_USER_CACHE_LOOKUPS = Counter(
+    'api_auth_user_cache_lookups', "Authenticated-user cache lookups by result (hit or miss).", ['result'],
+)
+
+
+def observe_request(request, response, timer):
+    """Record a finished request; `timer` is its `core.timing.RequestTimer`."""
+    match = request.resolver_match
+    # Label by view, never by path, to keep the number of series bounded.
+    view, action = resolve_view(match.func, request.method) if match else ('unresolved', '')
+    REQUEST_DURATION.labels(view, action, response.status_code).observe(time.perf_counter() - timer.started)
+    if timer.queries:
+        DB_QUERIES.labels(view, action).inc(len(timer.queries))
+        DB_QUERY_DURATION.labels(view, action).inc(timer.db_time)
+
+
+def exposition():
+    """`(body, content_type)` of the current metrics in Prometheus text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
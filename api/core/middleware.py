@@ -0,0 +1,117 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, timing
+
+logger = logging.getLogger('core.timing')
+
+
+class MetricsMiddleware:
+    """
+    Records request latency, query counts and in-flight requests for
+    `/metrics` (see core.metrics). Disabled with METRICS=False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        timing.enable_query_recording()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with metrics.REQUESTS_IN_FLIGHT.track_inprogress(), timing.timing() as timer:
+            response = self.get_response(request)
+            metrics.observe_request(request, response, timer)
+        return response
+
+    async def __acall__(self, request):
+        with metrics.REQUESTS_IN_FLIGHT.track_inprogress(), timing.timing() as timer:
+            response = await self.get_response(request)
+            metrics.observe_request(request, response, timer)
+        return response
+
+
+class RequestTimingMiddleware:
+    """
+    Adds a `Server-Timing` header (db, serialize, view, total) to responses
+    and logs requests slower than REQUEST_TIMING_SLOW_MS, or issuing more than
+    REQUEST_TIMING_SLOW_QUERIES queries, with their slowest SQL.
+
+    Unless REQUEST_TIMING is set, Django drops the middleware at startup and
+    no query wrapper is installed, so it costs nothing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        timing.enable_query_recording()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with timing.timing() as timer:
+            response = self.get_response(request)
+            self.finish(request, response, timer)
+        return response
+
+    async def __acall__(self, request):
+        with timing.timing() as timer:
+            response = await self.get_response(request)
+            self.finish(request, response, timer)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = timing.active()
+        timer.view = timing.view_label(view_func, request.method)
+        timer.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; count rendering
+        # as serialization rather than view time.
+        timer = timing.active()
+        timer.view_finished = rendering_started = time.perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: timer.add('serialize', time.perf_counter() - rendering_started)
+        )
+        return response
+
+    def finish(self, request, response, timer):
+        finished = time.perf_counter()
+        total = finished - timer.started
+        view = (timer.view_finished or finished) - timer.view_started if timer.view_started else 0.0
+        metrics = [
+            f'db;dur={timer.db_time * 1000:.1f};desc="{len(timer.queries)} queries"',
+            f'serialize;dur={timer.durations.get("serialize", 0.0) * 1000:.1f}',
+            f'view;dur={view * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + metrics)
+
+        if total * 1000 >= settings.REQUEST_TIMING_SLOW_MS or len(timer.queries) > settings.REQUEST_TIMING_SLOW_QUERIES:
+            slowest = '\n'.join(
+                f'  {duration * 1000:.1f}ms {sql[:500]}'
+                for duration, sql in timer.slowest_queries(settings.REQUEST_TIMING_LOG_QUERIES)
+            )
+            logger.warning(
+                'Slow request %s %s (%s) -> %s: %s\n%s',
+                request.method, request.get_full_path(), timer.view, response.status_code,
+                response['Server-Timing'], slowest,
+            )
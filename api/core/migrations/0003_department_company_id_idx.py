@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_employee_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['company', 'id'], name='department_company_id_idx'),
+        ),
+    ]
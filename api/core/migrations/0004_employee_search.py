@@ -0,0 +1,55 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The search column and its indexes are PostgreSQL-only and are not part of
+# the model state; core.search reads the column directly and other backends
+# fall back to icontains lookups.
+FORWARD_SQL = [
+    """
+    ALTER TABLE core_employee ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(email, '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(designation, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_search_vector_idx "
+    "ON core_employee USING GIN (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_name_trgm_idx "
+    "ON core_employee USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS company_name_trgm_idx "
+    "ON core_company USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS department_name_trgm_idx "
+    "ON core_department USING GIN (name gin_trgm_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX CONCURRENTLY IF EXISTS department_name_trgm_idx",
+    "DROP INDEX CONCURRENTLY IF EXISTS company_name_trgm_idx",
+    "DROP INDEX CONCURRENTLY IF EXISTS employee_name_trgm_idx",
+    "DROP INDEX CONCURRENTLY IF EXISTS employee_search_vector_idx",
+    "ALTER TABLE core_employee DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_department_company_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(run_on_postgresql(FORWARD_SQL), run_on_postgresql(REVERSE_SQL)),
+    ]
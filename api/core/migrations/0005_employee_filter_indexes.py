@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_employee_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'status', 'id'], name='employee_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', 'status', 'id'], name='employee_dept_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['status', 'hired_on', 'id'], name='employee_status_hired_idx'),
+        ),
+    ]
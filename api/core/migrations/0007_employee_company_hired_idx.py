@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'hired_on', 'id'], name='employee_company_hired_idx'),
+        ),
+    ]
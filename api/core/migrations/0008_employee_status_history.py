@@ -0,0 +1,57 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_employee_company_hired_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='EmployeeStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_id', models.BigIntegerField()),
+                ('company_id', models.BigIntegerField()),
+                ('department_id', models.BigIntegerField()),
+                ('from_company_id', models.BigIntegerField(blank=True, null=True)),
+                ('from_department_id', models.BigIntegerField(blank=True, null=True)),
+                ('from_status', models.CharField(blank=True, max_length=50)),
+                ('to_status', models.CharField(blank=True, max_length=50)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('stage_seconds', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee_id', 'occurred_at'], name='status_event_employee_idx'), models.Index(fields=['occurred_at'], name='status_event_occurred_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('company_id', models.BigIntegerField()),
+                ('department_id', models.BigIntegerField()),
+                ('status', models.CharField(max_length=50)),
+                ('entered', models.PositiveIntegerField(default=0)),
+                ('exited', models.PositiveIntegerField(default=0)),
+                ('moved_in', models.PositiveIntegerField(default=0)),
+                ('moved_out', models.PositiveIntegerField(default=0)),
+                ('stage_seconds', models.FloatField(default=0)),
+                ('timed_exits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='status_rollup_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company_id', 'department_id', 'status', 'day'), name='status_rollup_unique')],
+            },
+        ),
+    ]
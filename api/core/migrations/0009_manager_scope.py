@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_manager_access(apps, schema_editor):
+    """
+    Managers used to see every company. Keep that for existing Managers
+    until their scopes are narrowed; new Managers start with none.
+    """
+    User = apps.get_model('core', 'User')
+    Company = apps.get_model('core', 'Company')
+    ManagerScope = apps.get_model('core', 'ManagerScope')
+    db = schema_editor.connection.alias
+    company_ids = list(Company.objects.using(db).values_list('pk', flat=True))
+    for user_id in User.objects.using(db).filter(role='Manager').values_list('pk', flat=True):
+        ManagerScope.objects.using(db).bulk_create(
+            [ManagerScope(user_id=user_id, company_id=company_id) for company_id in company_ids],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_employee_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManagerScope',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='manager_scopes', to='core.company')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='manager_scopes', to='core.department')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manager_scopes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('company__isnull', True), ('department__isnull', True), _connector='XOR'), name='manager_scope_company_xor_department'), models.UniqueConstraint(fields=('user', 'company'), name='manager_scope_company_unique'), models.UniqueConstraint(fields=('user', 'department'), name='manager_scope_department_unique')],
+            },
+        ),
+        migrations.RunPython(keep_manager_access, migrations.RunPython.noop),
+    ]
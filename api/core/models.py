@@ -1,8 +1,10 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import models, router
 from django_fsm import FSMField, transition
 from django.utils.timezone import now
 
+from . import counters, events, versioning
+
 
 class UserManager(BaseUserManager):
     """
@@ -63,27 +65,83 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        versioning.bump(User)
+        versioning.bump_rows(User, [self.pk])
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        versioning.bump(User, Employee)
+        versioning.bump_rows(User, [pk])
+        return result
+
     def __str__(self):
         return self.email
 
 
+class CompanyQuerySet(models.QuerySet):
+    def live(self):
+        """Leave out companies marked for deletion (see `mark_deleting`)."""
+        return self.filter(deleting_at__isnull=True)
+
+
 class Company(models.Model):
     name = models.CharField(max_length=255, unique=True)
     num_departments = models.IntegerField(default=0, editable=False)
     num_employees = models.IntegerField(default=0, editable=False)
+    # Set while a background job deletes the company; see core.tasks.
+    deleting_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = CompanyQuerySet.as_manager()
 
     def update_department_count(self):
+        """
+        Recount departments from scratch. Routine writes keep the counter
+        current through `core.counters`; this is only for reconciliation.
+        """
         self.num_departments = self.departments.count()
-        self.save()
+        Company.objects.filter(pk=self.pk).update(num_departments=self.num_departments)
 
     def update_employee_count(self):
+        """
+        Recount employees from scratch. Routine writes keep the counter
+        current through `core.counters`; this is only for reconciliation.
+        """
         self.num_employees = self.employees.count()
-        self.save()
+        Company.objects.filter(pk=self.pk).update(num_employees=self.num_employees)
+
+    def mark_deleting(self):
+        """
+        Hide the company, its departments and their employees from reads
+        until the deletion job removes them. Departments are marked too, so
+        employees are hidden by their department alone.
+        """
+        self.deleting_at = now()
+        Company.objects.filter(pk=self.pk).update(deleting_at=self.deleting_at)
+        self.departments.filter(deleting_at__isnull=True).update(deleting_at=self.deleting_at)
+        versioning.bump(Company, Department, Employee)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        versioning.bump(Company)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        versioning.bump(Company, Department, Employee)
+        return result
 
     def __str__(self):
         return self.name
 
 
+class DepartmentQuerySet(models.QuerySet):
+    def live(self):
+        """Leave out departments marked for deletion, alone or with their company."""
+        return self.filter(deleting_at__isnull=True)
+
+
 class Department(models.Model):
     company = models.ForeignKey(
         Company,
@@ -92,26 +150,154 @@ class Department(models.Model):
     )
     name = models.CharField(max_length=255)
     num_employees = models.IntegerField(default=0, editable=False)
+    # Set while a background job deletes the department or its company.
+    deleting_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = DepartmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs the (company_id, id) keyset seek used to page departments.
+            models.Index(fields=['company', 'id'], name='department_company_id_idx'),
+            # The few departments being deleted, anti-joined by `EmployeeQuerySet.live`.
+            models.Index(
+                fields=['id'], condition=models.Q(deleting_at__isnull=False), name='department_deleting_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored company so a move can be counted on save.
+        instance._loaded_company_id = dict(zip(field_names, values)).get('company_id')
+        return instance
 
     def update_employee_count(self):
+        """
+        Recount employees from scratch. Routine writes keep the counter
+        current through `core.counters`; this is only for reconciliation.
+        """
         self.num_employees = self.employees.count()
-        self.save()
+        Department.objects.filter(pk=self.pk).update(num_employees=self.num_employees)
+
+    def company_employees(self, company_id):
+        """
+        The department's employees, also filtered on `company_id` so that a
+        partitioned employee table reads a single partition.
+        """
+        return self.employees.filter(company_id=company_id)
+
+    def mark_deleting(self):
+        """Hide the department and its employees until the deletion job removes them."""
+        self.deleting_at = now()
+        Department.objects.filter(pk=self.pk).update(deleting_at=self.deleting_at)
+        versioning.bump(Department, Employee)
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super().save(*args, **kwargs)
         # Update the department count in the company
-        self.company.update_department_count()
+        previous_company_id = None if adding else getattr(self, '_loaded_company_id', self.company_id)
+        if previous_company_id != self.company_id:
+            # Employees follow in a background job (see core.tasks), so
+            # they still carry the previous company.
+            moved = 0 if adding else self.company_employees(previous_company_id).count()
+            counters.adjust(Company, previous_company_id, num_departments=-1, num_employees=-moved)
+            counters.adjust(Company, self.company_id, num_departments=1, num_employees=moved)
+            self._loaded_company_id = self.company_id
+        versioning.bump(Department)
 
     def delete(self, *args, **kwargs):
-        company = self.company
-        super().delete(*args, **kwargs)
-        # Update the department count in the company
-        company.update_department_count()
+        company_id = self.company_id
+        removed = self.company_employees(company_id).count()
+        result = super().delete(*args, **kwargs)
+        # Update the department count in the company, including the
+        # employees removed by the cascade.
+        counters.adjust(Company, company_id, num_departments=-1, num_employees=-removed)
+        versioning.bump(Department, Employee)
+        return result
 
     def __str__(self):
         return f"{self.name} ({self.company.name})"
 
 
+class ManagerScope(models.Model):
+    """
+    A company, or a single department, that a Manager manages. Managers only
+    see and change rows inside their scopes; see core.permissions.
+    """
+    user = models.ForeignKey(User, related_name='manager_scopes', on_delete=models.CASCADE)
+    company = models.ForeignKey(
+        Company, related_name='manager_scopes', on_delete=models.CASCADE, null=True, blank=True,
+    )
+    department = models.ForeignKey(
+        Department, related_name='manager_scopes', on_delete=models.CASCADE, null=True, blank=True,
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(company__isnull=True) ^ models.Q(department__isnull=True),
+                name='manager_scope_company_xor_department',
+            ),
+            # These back the (user_id, company_id/department_id) EXISTS probes.
+            models.UniqueConstraint(fields=['user', 'company'], name='manager_scope_company_unique'),
+            models.UniqueConstraint(fields=['user', 'department'], name='manager_scope_department_unique'),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        versioning.bump(ManagerScope)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        versioning.bump(ManagerScope)
+        return result
+
+    def __str__(self):
+        return f"{self.user.email}: {self.company or self.department}"
+
+
+class DaysSince(models.Func):
+    """Whole days from a date expression until `date`; NULL stays NULL."""
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, date, **extra):
+        super().__init__(models.Value(date, output_field=models.DateField()), expression, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)', arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+
+class EmployeeQuerySet(models.QuerySet):
+    def live(self):
+        """
+        Leave out employees of departments marked for deletion, which include
+        every department of a company being deleted.
+        """
+        return self.filter(~models.Exists(
+            Department.objects.filter(pk=models.OuterRef('department_id'), deleting_at__isnull=False)
+        ))
+
+    def with_tenure(self, today=None):
+        """
+        Annotate `days_employed` in SQL, so it can be returned for many rows
+        at once. Filter and order on `hired_on` instead: tenure is monotonic
+        in it and only hired employees have one, so those stay indexed.
+        """
+        today = today or now().date()
+        return self.annotate(days_employed=models.Case(
+            models.When(status='Hired', then=DaysSince('hired_on', today)),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Employee(models.Model):
     STATUS_CHOICES = (
         ('Application Received', 'Application Received'),
@@ -140,24 +326,118 @@ class Employee(models.Model):
     address = models.TextField()
     designation = models.CharField(max_length=100)
     hired_on = models.DateField(null=True, blank=True)
+    status_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EmployeeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Filter columns first, then id so keyset pages are read in index order.
+            models.Index(fields=['company', 'status', 'id'], name='employee_company_status_idx'),
+            models.Index(fields=['department', 'status', 'id'], name='employee_dept_status_idx'),
+            models.Index(fields=['status', 'hired_on', 'id'], name='employee_status_hired_idx'),
+            # Tenure ordering and ranges within a company (longest-serving first).
+            models.Index(fields=['company', 'hired_on', 'id'], name='employee_company_hired_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored placement and status so moves and status
+        # changes can be counted and logged on save.
+        loaded = dict(zip(field_names, values))
+        instance._loaded_placement = (loaded.get('company_id'), loaded.get('department_id'))
+        if 'status' in loaded:
+            instance._loaded_status = loaded['status']
+        return instance
 
     @property
     def days_employed(self):
         """
-        Calculate days employed only if the employee is hired.
+        Calculate days employed only if the employee is hired. Rows loaded
+        through `Employee.objects.with_tenure()` carry the value from SQL.
         """
+        if '_days_employed' in self.__dict__:
+            return self._days_employed
         if self.hired_on and self.status == 'Hired':
             return (now().date() - self.hired_on).days
         return None
 
+    @days_employed.setter
+    def days_employed(self, value):
+        # Set by the `with_tenure()` annotation.
+        self._days_employed = value
+
     def save(self, *args, **kwargs):
         """
         Ensure 'hired_on' is set only if the status is 'Hired'.
         """
         if self.status != 'Hired':
             self.hired_on = None  # Clear the hired_on field if not hired
+        adding = self._state.adding
+        previous_status = '' if adding else getattr(self, '_loaded_status', self.status)
+        changed_at = now()
+        stage_seconds = None
+        if previous_status != self.status:
+            if self.status_changed_at:
+                stage_seconds = (changed_at - self.status_changed_at).total_seconds()
+            self.status_changed_at = changed_at
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'status_changed_at'}
         super().save(*args, **kwargs)
 
+        # Keep the company and department headcounts in step with the row.
+        placement = (self.company_id, self.department_id)
+        previous = (None, None) if adding else getattr(self, '_loaded_placement', placement)
+        if previous[0] != placement[0]:
+            counters.adjust(Company, previous[0], num_employees=-1)
+            counters.adjust(Company, placement[0], num_employees=1)
+        if previous[1] != placement[1]:
+            counters.adjust(Department, previous[1], num_employees=-1)
+            counters.adjust(Department, placement[1], num_employees=1)
+        if previous_status != self.status or previous != placement:
+            events.record(
+                employee_id=self.pk, company_id=placement[0], department_id=placement[1],
+                from_company_id=previous[0], from_department_id=previous[1],
+                from_status=previous_status, to_status=self.status,
+                occurred_at=changed_at, stage_seconds=stage_seconds,
+            )
+        self._loaded_placement = placement
+        self._loaded_status = self.status
+        versioning.bump(Employee)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Also match the stored company, the partition key of a partitioned
+        # table (see core.partitioning), so one partition is updated. A row
+        # moved by someone else since it was loaded is found by pk alone.
+        company_id = getattr(self, '_loaded_placement', (None, None))[0]
+        if company_id is not None and super()._do_update(
+            base_qs.filter(company_id=company_id), using, pk_val, values, update_fields, forced_update,
+        ):
+            return True
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def delete(self, using=None, keep_parents=False):
+        company_id, department_id = self.company_id, self.department_id
+        employee_id, deleted_at = self.pk, now()
+        # Delete by pk and company, for the same reason as in `_do_update`.
+        using = using or router.db_for_write(Employee, instance=self)
+        result = Employee.objects.using(using).filter(pk=employee_id, company_id=company_id).delete()
+        if result[0]:
+            self.pk = None
+        else:
+            result = super().delete(using=using, keep_parents=keep_parents)
+        counters.adjust(Company, company_id, num_employees=-1)
+        counters.adjust(Department, department_id, num_employees=-1)
+        events.record(
+            employee_id=employee_id, company_id=company_id, department_id=department_id,
+            from_company_id=company_id, from_department_id=department_id,
+            from_status=self.status, to_status='', occurred_at=deleted_at,
+            stage_seconds=(deleted_at - self.status_changed_at).total_seconds() if self.status_changed_at else None,
+        )
+        versioning.bump(Employee)
+        return result
+
     @transition(field=status, source='Application Received', target='Interview Scheduled')
     def schedule_interview(self):
         pass
@@ -178,3 +458,103 @@ class Employee(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.designation} ({self.company.name})"
+
+
+class EmployeeStatusEvent(models.Model):
+    """
+    Append-only log of employee status changes and moves, written in batches
+    by core.events. `from_status` is '' for a new employee and `to_status`
+    is '' for a deleted one. Ids are plain columns so the history outlives
+    the rows it describes.
+    """
+    employee_id = models.BigIntegerField()
+    company_id = models.BigIntegerField()
+    department_id = models.BigIntegerField()
+    from_company_id = models.BigIntegerField(null=True, blank=True)
+    from_department_id = models.BigIntegerField(null=True, blank=True)
+    from_status = models.CharField(max_length=50, blank=True)
+    to_status = models.CharField(max_length=50, blank=True)
+    occurred_at = models.DateTimeField(default=now)
+    # Time spent in `from_status`, when its start is known.
+    stage_seconds = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee_id', 'occurred_at'], name='status_event_employee_idx'),
+            models.Index(fields=['occurred_at'], name='status_event_occurred_idx'),
+        ]
+
+    def __str__(self):
+        return f"Employee {self.employee_id}: {self.from_status or '-'} -> {self.to_status or '-'}"
+
+
+class EmployeeStatusRollup(models.Model):
+    """
+    Daily per-department counts of employees entering and leaving each
+    status, maintained incrementally from `EmployeeStatusEvent` by
+    core.events. The headcount in a status is the running sum of
+    `entered + moved_in - exited - moved_out`.
+    """
+    day = models.DateField()
+    company_id = models.BigIntegerField()
+    department_id = models.BigIntegerField()
+    status = models.CharField(max_length=50)
+    entered = models.PositiveIntegerField(default=0)
+    exited = models.PositiveIntegerField(default=0)
+    moved_in = models.PositiveIntegerField(default=0)
+    moved_out = models.PositiveIntegerField(default=0)
+    # Total time in `status` of the exits whose stage start is known.
+    stage_seconds = models.FloatField(default=0)
+    timed_exits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company_id', 'department_id', 'status', 'day'], name='status_rollup_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='status_rollup_day_idx'),
+        ]
+
+
+class Job(models.Model):
+    """
+    A unit of background work for `manage.py run_worker`; see core.jobs.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    # Progress of tasks that report it through `jobs.progress()`.
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    done_rows = models.PositiveIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # Who asked for the job; Managers see these and the jobs on their scopes.
+    created_by = models.ForeignKey(User, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due job of a status.
+            models.Index(fields=['status', 'run_at', 'id'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
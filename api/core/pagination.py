@@ -0,0 +1,210 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination that seeks on the ordering columns instead of
+    using OFFSET, and never issues a COUNT(*).
+
+    The ordering is taken from the queryset (so ordering filters keep working),
+    falling back to the view's `keyset_ordering` and finally to `('id',)`. The
+    primary key is always appended as the final tie-breaker, so every position
+    is unique and a page boundary is a single indexed range condition such as
+    `WHERE (company_id, id) > (%s, %s)`.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+        self.max_page_size = settings.REST_FRAMEWORK.get('MAX_PAGE_SIZE', 500)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of `paginate_queryset`, for the ASGI read views."""
+        return self.build_page([obj async for obj in self.get_page_queryset(queryset, request, view)])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.nullable = {
+            field.lstrip('-') for field in self.ordering if self._is_nullable(queryset, field.lstrip('-'))
+        }
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['r'])
+
+        queryset = queryset.order_by(*self._order_by(reverse=self.reverse))
+        if self.cursor:
+            queryset = queryset.filter(self._seek(self.cursor['p'], reverse=self.reverse))
+        # Fetch one extra row to find out whether another page exists.
+        return queryset[:self.page_size + 1]
+
+    def build_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = tuple(
+            field for field in queryset.query.order_by if isinstance(field, str)
+        ) or tuple(getattr(view, 'keyset_ordering', ())) or ('id',)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id',) if ordering[0].startswith('-') else ('id',)
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if len(cursor['p']) != len(self.ordering):
+                raise ValueError
+            return {'p': cursor['p'], 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        position = [self._position_value(instance, field) for field in self.ordering]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(remove_query_param(self.base_url, self.cursor_query_param),
+                                   self.cursor_query_param, encoded)
+
+    def _position_value(self, instance, field):
+        value = instance
+        for part in field.lstrip('-').split('__'):
+            value = getattr(value, 'pk' if part == 'pk' else part, None)
+            if value is None:
+                return None
+            if hasattr(value, '_meta'):
+                value = value.pk
+        return value
+
+    def _is_nullable(self, queryset, name):
+        if name in queryset.query.annotations:
+            return True
+        try:
+            return queryset.model._meta.get_field('id' if name == 'pk' else name).null
+        except FieldDoesNotExist:
+            return True
+
+    def _order_by(self, reverse):
+        order_by = []
+        for field in self.ordering:
+            descending = field.startswith('-') != reverse
+            expression = F(field.lstrip('-'))
+            # Pin NULL placement so the seek predicate matches on every backend.
+            order_by.append(expression.desc(nulls_first=True) if descending
+                            else expression.asc(nulls_last=True))
+        return order_by
+
+    def _seek(self, position, reverse):
+        """
+        Build `(a, b, c) > (x, y, z)` in its expanded OR-of-ANDs form, which
+        the planner turns into an index range scan on the leading column.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            if value is None:
+                # NULLs sort last ascending and first descending.
+                after = Q(**{f'{name}__isnull': False}) if descending else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if not descending and name in self.nullable:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if after is not None:
+                condition |= equal & after
+            equal &= same
+        return condition
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def get_schema_fields(self, view):
+        return []
+
@@ -0,0 +1,342 @@
+"""
+Optional PostgreSQL partitioning of `core_employee` on `company_id`.
+
+`partition_employees()` converts the table online:
+
+1. It creates `core_employee_new`, partitioned by HASH (a fixed number of
+   partitions) or LIST (one partition per company plus a DEFAULT one), with
+   the same columns, foreign keys and indexes (unique ones as plain
+   indexes). Ids come from a sequence it owns rather than an identity
+   column, which PostgreSQL only fully supports on partitioned tables
+   from version 17.
+2. A trigger on the old table mirrors every write into the new one, then
+   the existing rows are copied over in short keyset batches.
+3. In one brief ACCESS EXCLUSIVE transaction the tables swap names. The old
+   table is kept as `core_employee_unpartitioned` unless dropped.
+
+A partitioned table can only enforce unique constraints that include the
+partition key: the primary key becomes `(id, company_id)`, and the global
+uniqueness of `id`, `email` and `user_id` moves to `core_employee_unique`,
+maintained by a trigger. Violations still surface as IntegrityError.
+
+Queries that filter on `company_id` read a single partition. Lookups by one
+of the unique columns can get there too: `narrow_to_partition()` adds the
+company recorded for that key in `core_employee_unique`, which PostgreSQL
+uses to skip the other partitions at execution time. With LIST
+partitioning, employees of companies created later land in the DEFAULT
+partition until `add_company_partitions()` gives them their own.
+
+Nothing here runs on its own: the table is only converted by
+`manage.py partition_employees`.
+"""
+import re
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections, transaction
+from django.db.models.expressions import RawSQL
+
+TABLE = 'core_employee'
+NEW_TABLE = 'core_employee_new'
+OLD_TABLE = 'core_employee_unpartitioned'
+UNIQUE_TABLE = 'core_employee_unique'
+DEFAULT_PARTITION = 'core_employee_default'
+SEQUENCE = 'core_employee_id_seq'
+NEW_SEQUENCE = 'core_employee_new_id_seq'
+METHODS = ('hash', 'list')
+UNIQUE_COLUMNS = ('employee_id', 'email', 'user_id')
+BATCH_SIZE = 5000
+
+UNIQUE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {UNIQUE_TABLE} (
+        employee_id bigint PRIMARY KEY,
+        email varchar(254) NOT NULL UNIQUE,
+        user_id bigint UNIQUE,
+        company_id bigint NOT NULL
+    );
+    CREATE OR REPLACE FUNCTION core_employee_unique_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM {UNIQUE_TABLE} WHERE employee_id = OLD.id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {UNIQUE_TABLE} (employee_id, email, user_id, company_id)
+                VALUES (NEW.id, NEW.email, NEW.user_id, NEW.company_id);
+        END IF;
+        RETURN NULL;
+    END $$;
+"""
+
+MIRROR_SQL = """
+    CREATE OR REPLACE FUNCTION core_employee_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM {new} WHERE id = OLD.id AND company_id = OLD.company_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {new} ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END $$;
+    CREATE TRIGGER core_employee_mirror AFTER INSERT OR UPDATE OR DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION core_employee_mirror();
+"""
+
+
+def partitioning_method(using=DEFAULT_DB_ALIAS):
+    """'hash' or 'list' when `core_employee` is partitioned, otherwise None."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT partstrat FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return {'h': 'hash', 'l': 'list'}.get(row[0]) if row else None
+
+
+_partitioned = {}
+
+
+def _swap_key(using):
+    return f'core:partitioning-swap:{using}'
+
+
+def is_partitioned(using=DEFAULT_DB_ALIAS):
+    """
+    `partitioning_method(using)` is set. Looked up once per process and
+    alias, and again whenever `partition_employees()` has since published a
+    new swap token in the shared cache, so running workers need no restart.
+    """
+    if connections[using].vendor != 'postgresql':
+        return False
+    token = cache.get(_swap_key(using))
+    known = _partitioned.get(using)
+    if known is None or (token is not None and token != known[0]):
+        known = _partitioned[using] = (token, partitioning_method(using) is not None)
+    return known[1]
+
+
+def narrow_to_partition(queryset, column, value):
+    """
+    On a partitioned table, restrict an employee `queryset` to the company
+    of the row whose unique `column` ('employee_id', 'email' or 'user_id')
+    is `value`, so a lookup by that column reads one partition instead of
+    probing each. Returned unchanged when the table is not partitioned.
+    """
+    if column not in UNIQUE_COLUMNS:
+        raise ValueError(f"Column must be one of: {', '.join(UNIQUE_COLUMNS)}.")
+    if not is_partitioned(queryset.db):
+        return queryset
+    return queryset.filter(company_id=RawSQL(
+        f"SELECT company_id FROM {UNIQUE_TABLE} WHERE {column} = %s", [value],
+    ))
+
+
+def partition_employees(method='hash', partitions=16, batch_size=BATCH_SIZE, drop_old=False,
+                        using=DEFAULT_DB_ALIAS, log=lambda message: None):
+    """
+    Convert `core_employee` to a `method`-partitioned table without blocking
+    writes for longer than the final swap. Must run outside a transaction,
+    as every batch commits on its own.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise NotSupportedError("Employee partitioning needs PostgreSQL.")
+    if method not in METHODS:
+        raise ValueError(f"Partitioning method must be one of: {', '.join(METHODS)}.")
+    if partitioning_method(using):
+        raise ValueError(f"{TABLE} is already partitioned.")
+    if connection.in_atomic_block:
+        raise ValueError("partition_employees() commits in batches; call it outside a transaction.")
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        columns = _stored_columns(cursor, TABLE)
+        indexes = _create_table(cursor, method, partitions)
+        cursor.execute(MIRROR_SQL.format(
+            table=TABLE, new=NEW_TABLE, columns=', '.join(columns),
+            values=', '.join(f'NEW.{column}' for column in columns),
+        ))
+    log(f"Created {NEW_TABLE} ({method}); copying rows...")
+
+    copied = _copy_rows(connection, columns, batch_size, using, log)
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"DROP TRIGGER core_employee_mirror ON {TABLE}")
+        cursor.execute("DROP FUNCTION core_employee_mirror()")
+        _carry_over_sequence(cursor)
+        for name in indexes:
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {_suffixed(name, '_old')}")
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}")
+        for name in indexes:
+            cursor.execute(f"ALTER INDEX {_suffixed(name, '_new')} RENAME TO {name}")
+        if drop_old:
+            cursor.execute(f"DROP TABLE {OLD_TABLE}")
+        cursor.execute(f"ALTER SEQUENCE {NEW_SEQUENCE} RENAME TO {SEQUENCE}")
+    token = uuid.uuid4().hex
+    cache.set(_swap_key(using), token, timeout=None)
+    _partitioned[using] = (token, True)
+    log(f"Swapped in the partitioned table after copying {copied} rows.")
+    return copied
+
+
+def add_company_partitions(company_ids=None, using=DEFAULT_DB_ALIAS):
+    """
+    Give companies without a LIST partition their own, moving their rows
+    out of the DEFAULT partition one company per transaction. Returns the
+    ids of the companies that got a partition.
+    """
+    if partitioning_method(using) != 'list':
+        raise ValueError(f"{TABLE} is not LIST partitioned; hash partitions are fixed.")
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM core_company WHERE to_regclass('core_employee_c' || id) IS NULL ORDER BY id"
+        )
+        missing = [row[0] for row in cursor.fetchall()]
+        columns = ', '.join(_stored_columns(cursor, TABLE))
+    if company_ids is not None:
+        wanted = set(company_ids)
+        missing = [pk for pk in missing if pk in wanted]
+
+    for pk in missing:
+        partition = f'core_employee_c{int(pk)}'
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {partition} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)")
+            # Lets ATTACH skip validating the rows.
+            cursor.execute(f"ALTER TABLE {partition} ADD CONSTRAINT {partition}_company CHECK (company_id = {int(pk)})")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE company_id = %s RETURNING {columns}) "
+                f"INSERT INTO {partition} ({columns}) SELECT {columns} FROM moved",
+                [pk],
+            )
+            cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {partition} FOR VALUES IN ({int(pk)})")
+            # The DELETE above dropped the moved rows' uniqueness entries.
+            cursor.execute(
+                f"INSERT INTO {UNIQUE_TABLE} (employee_id, email, user_id, company_id) "
+                f"SELECT id, email, user_id, company_id FROM {partition} ON CONFLICT DO NOTHING"
+            )
+    return missing
+
+
+def partition_sizes(using=DEFAULT_DB_ALIAS):
+    """`[(partition, rows, bytes)]` for each partition of `core_employee`."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+            [TABLE],
+        )
+        return cursor.fetchall()
+
+
+def _stored_columns(cursor, table):
+    """Columns of `table` that can be written, in order (generated ones cannot)."""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER' "
+        "ORDER BY ordinal_position",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _create_table(cursor, method, partitions):
+    """Create the partitioned copy; returns the names of the indexes it copied."""
+    cursor.execute(
+        f"CREATE TABLE {NEW_TABLE} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING GENERATED) "
+        f"PARTITION BY {method.upper()} (company_id)"
+    )
+    cursor.execute(f"CREATE SEQUENCE {NEW_SEQUENCE} AS bigint OWNED BY {NEW_TABLE}.id")
+    cursor.execute(f"ALTER TABLE {NEW_TABLE} ALTER COLUMN id SET DEFAULT nextval('{NEW_SEQUENCE}')")
+    cursor.execute(f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT core_employee_partitioned_pkey PRIMARY KEY (id, company_id)")
+    if method == 'hash':
+        for remainder in range(partitions):
+            cursor.execute(
+                f"CREATE TABLE core_employee_p{remainder} PARTITION OF {NEW_TABLE} "
+                f"FOR VALUES WITH (MODULUS {int(partitions)}, REMAINDER {remainder})"
+            )
+    else:
+        cursor.execute("SELECT id FROM core_company ORDER BY id")
+        for (pk,) in cursor.fetchall():
+            cursor.execute(f"CREATE TABLE core_employee_c{int(pk)} PARTITION OF {NEW_TABLE} FOR VALUES IN ({int(pk)})")
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {NEW_TABLE} DEFAULT")
+
+    # Foreign and check constraints keep their names: those are per table.
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('f', 'c')",
+        [TABLE],
+    )
+    for name, definition in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {NEW_TABLE} ADD CONSTRAINT "{name}" {definition}')
+
+    # Index names are global, so copies get a suffix until the swap. Unique
+    # indexes (other than the primary key) stay as plain ones for lookups;
+    # core_employee_unique enforces them.
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = to_regclass(%s) AND NOT x.indisprimary",
+        [TABLE],
+    )
+    indexes = []
+    for name, definition in cursor.fetchall():
+        cursor.execute(re.sub(
+            r'^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ',
+            f'CREATE INDEX {_suffixed(name, "_new")} ON {NEW_TABLE} ',
+            definition,
+        ))
+        indexes.append(name)
+
+    cursor.execute(UNIQUE_SQL)
+    cursor.execute(
+        f"CREATE TRIGGER core_employee_unique_sync AFTER INSERT OR UPDATE OF id, email, user_id, company_id OR DELETE "
+        f"ON {NEW_TABLE} FOR EACH ROW EXECUTE FUNCTION core_employee_unique_sync()"
+    )
+    return indexes
+
+
+def _copy_rows(connection, columns, batch_size, using, log):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(min(id), 0), coalesce(max(id), 0) FROM {TABLE}")
+        low, high = cursor.fetchone()
+    columns = ', '.join(columns)
+    copied = 0
+    start = low - 1
+    while start < high:
+        end = start + batch_size
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            # FOR SHARE makes concurrent writers to these rows wait, so the
+            # mirror trigger always applies their change after the copy.
+            cursor.execute(
+                f"INSERT INTO {NEW_TABLE} ({columns}) SELECT {columns} FROM {TABLE} "
+                f"WHERE id > %s AND id <= %s FOR SHARE ON CONFLICT DO NOTHING",
+                [start, end],
+            )
+            copied += cursor.rowcount
+        start = end
+        log(f"  copied ids up to {min(end, high)}")
+    return copied
+
+
+def _carry_over_sequence(cursor):
+    """
+    Continue numbering where the old table stopped, and free the sequence
+    name for the new table's (identity or serial, the old one goes with it).
+    """
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+    old = cursor.fetchone()[0]
+    if old is None:
+        cursor.execute(f"SELECT setval(%s, coalesce(max(id), 0) + 1, false) FROM {TABLE}", [NEW_SEQUENCE])
+        return
+    cursor.execute(f"SELECT last_value, is_called FROM {old}")
+    last_value, is_called = cursor.fetchone()
+    cursor.execute("SELECT setval(%s, %s, %s)", [NEW_SEQUENCE, last_value, is_called])
+    cursor.execute(f"ALTER SEQUENCE {old} RENAME TO {OLD_TABLE}_id_seq")
+
+
+def _suffixed(name, suffix):
+    # PostgreSQL truncates identifiers to 63 bytes.
+    return name[:63 - len(suffix)] + suffix
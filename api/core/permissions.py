@@ -1,15 +1,141 @@
+from django.db.models import Exists, IntegerField, OuterRef, Q
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Coalesce
 from rest_framework.permissions import BasePermission , SAFE_METHODS
 
+from . import partitioning
+from .models import Company, Department, Employee, ManagerScope
+
+
+def request_role(request):
+    """
+    The caller's role, taken from the signed `role` token claim when the
+    request carries one, so permission checks need not load the user.
+    """
+    role = request.auth.get('role') if hasattr(request.auth, 'get') else None
+    return role or getattr(request.user, 'role', None)
+
 
 class IsAdminManagerOrReadOwnData(BasePermission):
-    def has_object_permission(self, request, view, obj):
-        if request.user.role in ['Admin', 'Manager']:
-            return True
-        if request.user.role == 'Employee' and request.method in SAFE_METHODS:
-            return obj.user == request.user
-        return False
+    """
+    Admins and Managers may write, Employees only read. Which rows each of
+    them sees is decided by the view's queryset (see `scope_employees`), so
+    no object is checked after it is fetched.
+    """
+    def has_permission(self, request, view):
+        role = request_role(request)
+        return role in ['Admin', 'Manager'] or (role == 'Employee' and request.method in SAFE_METHODS)
 
 
 class IsManager(BasePermission):
     def has_permission(self, request, view):
-        return request.user.role in ['Admin', 'Manager']
+        return request_role(request) in ['Admin', 'Manager']
+
+
+# Row scoping. Each function narrows a queryset to what the caller may see,
+# as EXISTS probes on the (user, company) and (user, department) unique
+# indexes of ManagerScope, so scoped lists stay one query. Rows marked for
+# deletion are hidden from everyone.
+
+def _scopes(request):
+    return ManagerScope.objects.filter(user_id=request.user.pk)
+
+
+def _managed(request, company_ref, department_ref=None):
+    scopes = _scopes(request)
+    condition = Exists(scopes.filter(company_id=OuterRef(company_ref)))
+    if department_ref is not None:
+        condition |= Exists(scopes.filter(department_id=OuterRef(department_ref)))
+    return condition
+
+
+def scope_companies(queryset, request):
+    """Admins see every company, Managers those they manage as a whole."""
+    queryset = queryset.live()
+    if request_role(request) == 'Admin':
+        return queryset
+    return queryset.filter(_managed(request, 'pk'))
+
+
+def scope_departments(queryset, request):
+    """Managers see the departments they manage and those of their companies."""
+    queryset = queryset.live()
+    if request_role(request) == 'Admin':
+        return queryset
+    return queryset.filter(_managed(request, 'company_id', 'pk'))
+
+
+def scope_employees(queryset, request):
+    """Employees see their own row, Managers the employees of their scopes."""
+    queryset = queryset.live()
+    role = request_role(request)
+    if role == 'Admin':
+        return queryset
+    if role == 'Employee':
+        queryset = queryset.filter(user_id=request.user.pk)
+        return partitioning.narrow_to_partition(queryset, 'user_id', request.user.pk)
+    queryset = queryset.filter(_managed(request, 'company_id', 'department_id'))
+    if partitioning.is_partitioned(queryset.db):
+        # The EXISTS probes are per row; listing the companies up front lets
+        # PostgreSQL read only their partitions.
+        company_ids = _scopes(request).using(queryset.db).values_list(
+            Coalesce('company_id', 'department__company_id'), flat=True,
+        )
+        queryset = queryset.filter(company_id__in=list(company_ids))
+    return queryset
+
+
+def scope_placements(queryset, request):
+    """
+    Scope rows that only carry `company_id`/`department_id` columns, such as
+    the status rollups, like employees.
+    """
+    if request_role(request) == 'Admin':
+        return queryset
+    return queryset.filter(_managed(request, 'company_id', 'department_id'))
+
+
+def scope_jobs(queryset, request):
+    """
+    Managers see the jobs they started and those acting on a company or
+    department of their scopes, as named by the job's payload.
+    """
+    if request_role(request) == 'Admin':
+        return queryset
+    queryset = queryset.annotate(
+        target_company=Cast(KeyTextTransform('company_id', 'payload'), IntegerField()),
+        target_department=Cast(KeyTextTransform('department_id', 'payload'), IntegerField()),
+    )
+    departments = Department.objects.filter(pk=OuterRef('target_department'))
+    return queryset.filter(
+        Q(created_by_id=request.user.pk)
+        | _managed(request, 'target_company')
+        | Exists(departments.filter(_managed(request, 'company_id', 'pk')))
+    )
+
+
+def assignable_companies(queryset, request):
+    """
+    Companies a caller may place departments or employees in: those visible
+    to them plus the companies of the departments they manage.
+    """
+    queryset = queryset.live()
+    if request_role(request) == 'Admin':
+        return queryset
+    scopes = _scopes(request)
+    return queryset.filter(
+        Exists(scopes.filter(company_id=OuterRef('pk')))
+        | Exists(scopes.filter(department__company_id=OuterRef('pk')))
+    )
+
+
+def dashboard_scope(request):
+    """Keyword arguments restricting `analytics.dashboard_snapshot()` to the caller."""
+    if request_role(request) == 'Admin':
+        return {}
+    return {
+        'scope': f'user:{request.user.pk}',
+        'companies': scope_companies(Company.objects.all(), request),
+        'departments': scope_departments(Department.objects.all(), request),
+        'employees': scope_employees(Employee.objects.all(), request),
+    }
@@ -0,0 +1,156 @@
+"""
+Read-replica routing.
+
+Replicas are listed in `settings.DATABASE_REPLICAS`. Only requests that opt
+in through `ReplicaReadMixin` (safe-method requests on the core views) read
+from a replica; everything else, and every write, uses `default`.
+
+- A request that writes reads from the primary for the rest of the request,
+  and the user stays pinned to the primary for
+  `DATABASE_PIN_PRIMARY_SECONDS` afterwards, so they see their own writes.
+- Each replica's lag is checked at most every
+  `DATABASE_REPLICA_CHECK_INTERVAL` seconds per process. Replicas lagging by
+  more than `DATABASE_REPLICA_MAX_LAG` seconds, or unreachable, are skipped;
+  with none left, reads fall back to the primary.
+- Responses built from a replica may be up to the maximum lag behind, so
+  `staleness_scope()` rotates ETags and cached snapshots once per lag window.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_routing = ContextVar('core_db_routing', default=None)
+_health = {}
+_health_lock = threading.Lock()
+
+
+class Routing:
+    """Routing state of one request."""
+
+    def __init__(self):
+        self.replica_reads = False
+        self.wrote = False
+        self.user_id = None
+        self.replica = None
+
+    def enable(self, user_id):
+        """Allow replica reads, unless `user_id` wrote recently."""
+        self.user_id = user_id
+        self.replica_reads = bool(settings.DATABASE_REPLICAS) and not cache.get(_pin_key(user_id))
+
+    async def aenable(self, user_id):
+        self.user_id = user_id
+        self.replica_reads = bool(settings.DATABASE_REPLICAS) and not await cache.aget(_pin_key(user_id))
+
+    def read_alias(self):
+        if not self.replica_reads or self.wrote:
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            # Stick to one replica so the request reads a consistent snapshot.
+            healthy = [alias for alias in settings.DATABASE_REPLICAS if replica_is_healthy(alias)]
+            self.replica = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+        return self.replica
+
+
+@contextmanager
+def routing():
+    """Track routing for the duration of a request; pins the user if it wrote."""
+    state = Routing()
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+        if state.wrote and state.user_id is not None and settings.DATABASE_REPLICAS:
+            cache.set(_pin_key(state.user_id), True, timeout=settings.DATABASE_PIN_PRIMARY_SECONDS)
+
+
+def _pin_key(user_id):
+    return f'core:db-pin:{user_id}'
+
+
+def staleness_scope():
+    """
+    '' when the current request reads from the primary, otherwise a token
+    that changes once per `DATABASE_REPLICA_MAX_LAG` window.
+    """
+    state = _routing.get()
+    if state is None or not state.replica_reads or state.wrote:
+        return ''
+    window = max(settings.DATABASE_REPLICA_MAX_LAG, 1)
+    return f'replica:{int(time.time() // window)}'
+
+
+def replica_lag(alias):
+    """Replication lag of `alias` in seconds (0 for a server that is not in recovery)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def replica_is_healthy(alias):
+    now = time.monotonic()
+    with _health_lock:
+        checked = _health.get(alias)
+    if checked is not None and checked[0] > now:
+        return checked[1]
+    try:
+        healthy = replica_lag(alias) <= settings.DATABASE_REPLICA_MAX_LAG
+    except (DatabaseError, ConnectionDoesNotExist):
+        healthy = False
+    with _health_lock:
+        _health[alias] = (now + settings.DATABASE_REPLICA_CHECK_INTERVAL, healthy)
+    return healthy
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        return state.read_alias() if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    View mixin: safe-method requests read from a replica once the user is
+    authenticated; authentication itself and unsafe methods use the primary.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        with routing() as state:
+            self.routing = state
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            self.routing.enable(request.user.pk)
+        else:
+            self.routing.user_id = request.user.pk
@@ -0,0 +1,56 @@
+"""
+Employee search shared by the API (`?q=`) and the admin.
+
+On PostgreSQL this matches the generated, GIN-indexed `search_vector`
+column (name, email, designation) and falls back to trigram similarity on
+employee, company and department names, so typos still find results.
+Matches are ranked by the better of the two scores. Other backends use
+plain `icontains` lookups.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+from .models import Company, Department
+
+SEARCH_CONFIG = 'simple'
+
+
+def search_employees(queryset, term):
+    """
+    Filter `queryset` to employees matching `term`, ordered best match
+    first (ties broken by id) and annotated with `search_rank`.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            Q(name__icontains=term)
+            | Q(email__icontains=term)
+            | Q(designation__icontains=term)
+            | Q(company__name__icontains=term)
+            | Q(department__name__icontains=term)
+        ).order_by('id')
+
+    query = SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+    vector = RawSQL('core_employee.search_vector', [], output_field=SearchVectorField())
+    # Company and department names are short lookup tables; resolving them
+    # first turns those matches into indexed company_id/department_id filters.
+    companies = Company.objects.filter(name__trigram_similar=term).values('id')
+    departments = Department.objects.filter(name__trigram_similar=term).values('id')
+    return queryset.alias(search_vector=vector).annotate(
+        search_rank=Greatest(SearchRank(vector, query), TrigramSimilarity('name', term)),
+    ).filter(
+        Q(search_vector=query)
+        | Q(name__trigram_similar=term)
+        | Q(company_id__in=Subquery(companies))
+        | Q(department_id__in=Subquery(departments))
+    ).order_by('-search_rank', '-id')
@@ -0,0 +1,125 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+`seed()` adds companies, departments and employees (each with a user) with
+`bulk_create`, committing each batch on its own, so large data sets load
+in seconds with bounded memory. The same `seed` value always produces the
+same rows. Company sizes are skewed (a few large companies, many small
+ones) and statuses follow a hiring funnel, so filters and aggregates see
+realistic selectivity.
+"""
+import random
+from collections import Counter
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import counters, events, versioning
+from .models import Company, Department, Employee, User
+
+EMAIL_DOMAIN = 'bench.example'
+DEFAULT_PASSWORD = 'benchmark'
+
+STATUS_WEIGHTS = {
+    'Application Received': 0.20,
+    'Interview Scheduled': 0.15,
+    'Hired': 0.55,
+    'Not Accepted': 0.10,
+}
+DEPARTMENT_NAMES = (
+    'Engineering', 'Sales', 'Marketing', 'Finance', 'Support', 'Operations',
+    'Legal', 'People', 'Product', 'Design', 'Research', 'Security',
+)
+DESIGNATIONS = (
+    'Engineer', 'Senior Engineer', 'Manager', 'Analyst', 'Designer',
+    'Account Executive', 'Support Specialist', 'Recruiter', 'Director',
+)
+FIRST_NAMES = (
+    'Ava', 'Ben', 'Chloe', 'Daniel', 'Emma', 'Farid', 'Grace', 'Hiro', 'Isla',
+    'Jonas', 'Kavya', 'Liam', 'Maya', 'Noah', 'Olga', 'Priya', 'Quinn', 'Rosa',
+)
+LAST_NAMES = (
+    'Anders', 'Brown', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hughes',
+    'Ivanova', 'Johnson', 'Kim', 'Lopez', 'Müller', 'Nowak', 'Okafor', 'Patel',
+)
+
+
+def seed(companies, departments, employees, seed=0, batch_size=2000, password=DEFAULT_PASSWORD):
+    """
+    Add `companies` companies, `departments` departments spread over them
+    and `employees` employees with users. Returns the number of rows created
+    per model. Can be called repeatedly; names and emails continue from the
+    rows a previous call left, including an interrupted call's whole batches.
+    """
+    if companies < 1 or departments < companies:
+        raise ValueError("Need at least one company and at least one department per company.")
+    rng = random.Random(seed)
+    # One hash for every user: hashing per row would dominate the run time.
+    password_hash = make_password(password)
+    offset = User.objects.filter(email__endswith='@' + EMAIL_DOMAIN).count()
+    company_offset = Company.objects.filter(name__startswith='Bench Company ').count()
+
+    with transaction.atomic():
+        company_objs = Company.objects.bulk_create(
+            [Company(name=f'Bench Company {company_offset + i + 1}') for i in range(companies)],
+            batch_size=batch_size,
+        )
+        # Every company gets a department, the rest go to random companies.
+        owners = company_objs + [rng.choice(company_objs) for _ in range(departments - companies)]
+        department_objs = Department.objects.bulk_create(
+            [Department(company=company, name=rng.choice(DEPARTMENT_NAMES)) for company in owners],
+            batch_size=batch_size,
+        )
+        by_company = {}
+        for department in department_objs:
+            by_company.setdefault(department.company_id, []).append(department)
+        for company in company_objs:
+            company.num_departments = len(by_company[company.id])
+        Company.objects.bulk_update(company_objs, ['num_departments'], batch_size=batch_size)
+        versioning.bump(Company, Department)
+
+    # Zipf-like company sizes.
+    company_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(company_objs))))
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    today = date.today()
+    created_at = now()
+
+    # One transaction per batch, so the status events and counter deltas
+    # buffered for it are flushed at its commit rather than all at the end.
+    for start in range(0, employees, batch_size):
+        count = min(batch_size, employees - start)
+        users, rows = [], []
+        for n in range(offset + start + 1, offset + start + count + 1):
+            company = rng.choices(company_objs, cum_weights=company_weights)[0]
+            department = rng.choice(by_company[company.id])
+            status = rng.choices(statuses, status_weights)[0]
+            email = f'employee{n}@{EMAIL_DOMAIN}'
+            users.append(User(email=email, password=password_hash, role='Employee'))
+            rows.append(Employee(
+                company=company,
+                department=department,
+                status=status,
+                name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                email=email,
+                mobile=f'555{rng.randrange(10 ** 7):07d}',
+                address=f'{rng.randrange(1, 999)} Bench Street',
+                designation=rng.choice(DESIGNATIONS),
+                hired_on=today - timedelta(days=rng.randrange(3650)) if status == 'Hired' else None,
+                status_changed_at=created_at,
+            ))
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            for user, employee in zip(users, rows):
+                employee.user = user
+            Employee.objects.bulk_create(rows)
+            events.record_created(rows)
+            for company_id, total in Counter(e.company_id for e in rows).items():
+                counters.adjust(Company, company_id, num_employees=total)
+            for department_id, total in Counter(e.department_id for e in rows).items():
+                counters.adjust(Department, department_id, num_employees=total)
+            versioning.bump(Employee, User)
+
+    return {'companies': len(company_objs), 'departments': len(department_objs), 'employees': employees}
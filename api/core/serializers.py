@@ -1,21 +1,34 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from djoser.serializers import (
     UserCreateSerializer as BaseUserCreateSerializer,
     UserSerializer as BaseUserSerializer,
 )
-from .models import Company, Department, Employee, User
+from .fieldsets import DynamicFieldsMixin
+from .filters import EmployeeFilter
+from .models import Company, Department, Employee, Job, User
+from .permissions import assignable_companies, scope_companies, scope_departments
+from .transitions import employee_transitions
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Signed claims let permission checks skip loading the user.
+        token = super().get_token(user)
+        token["role"] = user.role
+        token["employee_id"] = getattr(getattr(user, "employee", None), "id", None)
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
 
         # Add additional fields to the response
         user = self.user
         data["role"] = user.role
-        data["employee_id"] = getattr(user.employee, "id", None)
+        data["employee_id"] = getattr(getattr(user, "employee", None), "id", None)
 
         return data
 
@@ -40,19 +53,56 @@ class UserSerializer(BaseUserSerializer):
         ref_name = 'CustomUserSerializer'
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class ScopedRelationsMixin:
+    """
+    Serializer mixin: `scoped_relations` maps related fields to a scoping
+    function from core.permissions, which limits the rows a request may
+    point them at. Others fail validation as if they did not exist.
+    """
+    scoped_relations = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self._context.get('request')
+        if request is None:
+            return
+        for name, scope in self.scoped_relations.items():
+            field = self.fields.get(name)
+            if field is not None and not field.read_only:
+                field.queryset = scope(field.queryset, request)
+
+
+def validate_employee_rules(company_id, department_company_id, status, hired_on):
+    """
+    Cross-field rules shared by EmployeeSerializer and bulk imports.
+    """
+    # Ensure the department belongs to the specified company
+    if department_company_id != company_id:
+        raise serializers.ValidationError(
+            {"department": "Department must belong to the specified company."}
+        )
+    # Validate the hired_on date
+    if status != 'Hired' and hired_on:
+        raise serializers.ValidationError(
+            {"hired_on": "Hired date can only be set when the status is 'Hired'."}
+        )
+
+
+class DepartmentSerializer(ScopedRelationsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Department model, includes employee count.
     """
     num_employees = serializers.IntegerField(read_only=True)
 
+    scoped_relations = {'company': scope_companies}
+
     class Meta:
         model = Department
         fields = '__all__'
         read_only_fields = ('num_employees',)
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(ScopedRelationsMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Employee model with status validation.
     """
@@ -60,33 +110,112 @@ class EmployeeSerializer(serializers.ModelSerializer):
     status = serializers.ChoiceField(choices=Employee.STATUS_CHOICES)
     days_employed = serializers.IntegerField(read_only=True)
 
+    field_sources = {'days_employed': ('status', 'hired_on')}
+    select_related_fields = {'user': 'user'}
+    scoped_relations = {'company': assignable_companies, 'department': scope_departments}
+
     class Meta:
         model = Employee
         fields = '__all__'
         read_only_fields = ('days_employed',)
 
     def validate(self, data):
-        # Ensure the department belongs to the specified company
-        if data['department'].company != data['company']:
-            raise serializers.ValidationError(
-                {"department": "Department must belong to the specified company."}
-            )
-        # Validate the hired_on date
-        if data['status'] != 'Hired' and data.get('hired_on'):
-            raise serializers.ValidationError(
-                {"hired_on": "Hired date can only be set when the status is 'Hired'."}
-            )
+        # Fall back to the stored values on partial updates
+        def current(field):
+            return data[field] if field in data else getattr(self.instance, field, None)
+
+        department, company = current('department'), current('company')
+        validate_employee_rules(
+            company_id=company.id if company else None,
+            department_company_id=department.company_id if department else None,
+            status=current('status'),
+            hired_on=current('hired_on'),
+        )
         return data
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class EmployeeImportSerializer(serializers.ModelSerializer):
     """
-    Serializer for Company model, includes related departments and employees.
+    Row-level validation for bulk employee imports. Relations and uniqueness
+    are resolved per batch by `core.importers`, so this serializer itself
+    never touches the database. A `password` column is accepted but not
+    imported: imported users get an unusable password and set theirs
+    through the password reset.
     """
-    departments = DepartmentSerializer(many=True, read_only=True)
-    employees = EmployeeSerializer(many=True, read_only=True)
+    email = serializers.EmailField()
+    password = serializers.CharField(required=False, allow_blank=True, write_only=True)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, default='Employee')
+    company = serializers.IntegerField()
+    department = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Employee.STATUS_CHOICES, default='Application Received')
+
+    class Meta:
+        model = Employee
+        fields = (
+            'email', 'password', 'role', 'name', 'company', 'department',
+            'status', 'mobile', 'address', 'designation', 'hired_on',
+        )
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    """
+    Input for bulk workflow transitions: a transition name plus either a
+    list of employee `ids` or a `filter` using the employee list parameters.
+    """
+    transition = serializers.ChoiceField(choices=[])
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=10000)
+    filter = serializers.DictField(required=False, allow_empty=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['transition'].choices = sorted(employee_transitions())
+
+    def validate_filter(self, value):
+        # Without a single condition the filter would select every employee in scope.
+        unknown = sorted(set(value) - set(EmployeeFilter.params))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filter: {', '.join(unknown)}.")
+        if not any(str(value[param]).strip() for param in value):
+            raise serializers.ValidationError("Give at least one non-empty filter.")
+        return value
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide exactly one of 'ids' or 'filter'.")
+        return data
+
+
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for Company model. Related departments and employees are
+    included with `?expand=departments,employees`.
+    """
+    expandable_fields = {
+        'departments': lambda: DepartmentSerializer(many=True, read_only=True),
+        'employees': lambda: EmployeeSerializer(many=True, read_only=True),
+    }
+    # Leave out departments (and their employees) marked for deletion, as the lists do.
+    prefetch_fields = {
+        'departments': lambda: Prefetch('departments', queryset=Department.objects.live()),
+        'employees': lambda: Prefetch('employees', queryset=Employee.objects.live().select_related('user')),
+    }
 
     class Meta:
         model = Company
         fields = '__all__'
         read_only_fields = ('num_departments', 'num_employees')
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Read-only view of a background job, returned when a request hands its
+    work to the job queue.
+    """
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'task', 'status', 'attempts', 'max_attempts', 'run_at',
+            'created_at', 'started_at', 'finished_at', 'last_error',
+            'total_rows', 'done_rows', 'heartbeat_at',
+        )
+        read_only_fields = fields
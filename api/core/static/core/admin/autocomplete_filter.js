@@ -0,0 +1,15 @@
+'use strict';
+{
+    // Reload the changelist when an AutocompleteFilter (core.changelists) changes.
+    const $ = django.jQuery;
+    $(function() {
+        $('.autocomplete-filter select').on('change', function() {
+            const item = this.closest('.autocomplete-filter');
+            const params = new URLSearchParams(item.dataset.queryString);
+            if (this.value) {
+                params.set(item.dataset.lookup, this.value);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
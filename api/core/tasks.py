@@ -0,0 +1,125 @@
+"""
+Background job tasks (see core.jobs). Each may run more than once, so each
+first checks whether its work is still needed.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import counters, events, jobs, versioning
+from .jobs import task
+from .models import Company, Department, Employee, ManagerScope, User
+
+
+def delete_employees(employees, batch_size=None):
+    """
+    Delete `employees` `JOBS_DELETE_BATCH_SIZE` rows per transaction, with
+    the login of each one that is a plain Employee, keeping the headcounts
+    and status history as `Employee.delete` does. Returns how many were
+    deleted; an interrupted run leaves whole batches and can be repeated.
+    """
+    batch_size = batch_size or settings.JOBS_DELETE_BATCH_SIZE
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                employees.select_for_update().order_by('pk')
+                .values('pk', 'company_id', 'department_id', 'user_id', 'status', 'status_changed_at')[:batch_size]
+            )
+            if not batch:
+                return deleted
+            employees.filter(pk__in=[row['pk'] for row in batch]).delete()
+            user_ids = [row['user_id'] for row in batch]
+            User.objects.filter(pk__in=user_ids, role='Employee').delete()
+
+            deleted_at = now()
+            for row in batch:
+                events.record(
+                    employee_id=row['pk'], company_id=row['company_id'], department_id=row['department_id'],
+                    from_company_id=row['company_id'], from_department_id=row['department_id'],
+                    from_status=row['status'], to_status='', occurred_at=deleted_at,
+                    stage_seconds=(
+                        (deleted_at - row['status_changed_at']).total_seconds() if row['status_changed_at'] else None
+                    ),
+                )
+            for company_id, removed in Counter(row['company_id'] for row in batch).items():
+                counters.adjust(Company, company_id, num_employees=-removed)
+            for department_id, removed in Counter(row['department_id'] for row in batch).items():
+                counters.adjust(Department, department_id, num_employees=-removed)
+            versioning.bump(Employee, User)
+            versioning.bump_rows(User, user_ids)
+            jobs.progress(len(batch))
+        deleted += len(batch)
+
+
+@task('delete_company', atomic=False)
+def delete_company(company_id):
+    """
+    Delete a company bottom-up in bounded transactions: its employees, then
+    its departments, then the company itself, which is then empty.
+    """
+    delete_employees(Employee.objects.filter(company_id=company_id))
+    batch_size = settings.JOBS_DELETE_BATCH_SIZE
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Department.objects.select_for_update().filter(company_id=company_id)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Cascades to their manager scopes (and to any employee added since).
+            Department.objects.filter(pk__in=ids).delete()
+            counters.adjust(Company, company_id, num_departments=-len(ids))
+            versioning.bump(Department, Employee, ManagerScope)
+            jobs.progress(len(ids))
+    with transaction.atomic():
+        company = Company.objects.filter(pk=company_id).first()
+        if company is not None:
+            company.delete()
+
+
+@task('delete_department', atomic=False)
+def delete_department(department_id):
+    """Delete a department's employees in bounded transactions, then the department."""
+    delete_employees(Employee.objects.filter(department_id=department_id))
+    with transaction.atomic():
+        department = Department.objects.filter(pk=department_id).first()
+        if department is not None:
+            department.delete()
+
+
+@task('move_department_employees', atomic=False)
+def move_department_employees(department_id):
+    """
+    Point a moved department's employees at its new company,
+    `JOBS_DELETE_BATCH_SIZE` rows per transaction, logging each move so the
+    status rollups follow them. The headcounts were already moved with the
+    department (see `Department.save`).
+    """
+    batch_size = settings.JOBS_DELETE_BATCH_SIZE
+    while True:
+        with transaction.atomic():
+            department = Department.objects.filter(pk=department_id).first()
+            if department is None:
+                return
+            batch = list(
+                Employee.objects.select_for_update().filter(department_id=department_id)
+                .exclude(company_id=department.company_id)
+                .order_by('pk').values('pk', 'company_id', 'status')[:batch_size]
+            )
+            if not batch:
+                return
+            Employee.objects.filter(pk__in=[row['pk'] for row in batch]).update(company_id=department.company_id)
+
+            moved_at = now()
+            for row in batch:
+                events.record(
+                    employee_id=row['pk'], company_id=department.company_id, department_id=department_id,
+                    from_company_id=row['company_id'], from_department_id=department_id,
+                    from_status=row['status'], to_status=row['status'], occurred_at=moved_at,
+                )
+            versioning.bump(Employee)
+            jobs.progress(len(batch))
@@ -1,7 +1,30 @@
-from rest_framework.test import APITestCase
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
-from .models import Company, Department, Employee
+from rest_framework_simplejwt.tokens import AccessToken
+from prometheus_client import REGISTRY
+from . import events, jobs, partitioning, seeding
+from .admin import EmployeeAdmin
+from .authentication import UserCache, user_cache
+from .dbpool import pool_stats
+from .routers import _health
+from .transitions import bulk_transition
+from .models import Company, Department, Employee, EmployeeStatusEvent, EmployeeStatusRollup, Job, ManagerScope
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import F, Sum
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
 
 User = get_user_model()
 
@@ -21,13 +44,22 @@ class AuthenticationTests(APITestCase):
 
 class BasePermissionTest(APITestCase):
     def setUp(self):
-        self.admin_user = User.objects.create_user(email='admin@example.com', password='adminpass', role='Admin')
-        self.manager_user = User.objects.create_user(email='manager@example.com', password='managerpass', role='Manager')
+        cache.clear()
+        user_cache.clear()
+        # Run the deferred counter/version work now, so later captures start clean.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_user = User.objects.create_user(email='admin@example.com', password='adminpass', role='Admin')
+            self.manager_user = User.objects.create_user(email='manager@example.com', password='managerpass', role='Manager')
 
     def authenticate_user(self, email, password):
         response = self.client.post('/auth/jwt/create/', {'email': email, 'password': password})
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
 
+    def manage(self, *objects, user=None):
+        """Put companies or departments in the scope of `user` (the test Manager)."""
+        for obj in objects:
+            ManagerScope.objects.create(user=user or self.manager_user, **{obj._meta.model_name: obj})
+
 
 class CompanyTests(BasePermissionTest):
     def setUp(self):
@@ -55,6 +87,7 @@ class DepartmentTests(BasePermissionTest):
         super().setUp()
         self.company = Company.objects.create(name='Test Company')
         self.department = Department.objects.create(name='Test Department', company=self.company)
+        self.manage(self.company)
 
     def test_create_department_as_admin(self):
         self.authenticate_user('admin@example.com', 'adminpass')
@@ -182,3 +215,1351 @@ class DashboardTests(BasePermissionTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('total_companies', response.data)
         self.assertIn('total_employees', response.data)
+
+
+class PaginationTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.companies = [Company.objects.create(name=f'Company {i}') for i in range(5)]
+
+    def test_list_is_cursor_paginated(self):
+        self.authenticate_user('admin@example.com', 'adminpass')
+        response = self.client.get('/companies/', {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+        self.assertNotIn('count', response.data)
+
+        seen = [c['id'] for c in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [c['id'] for c in response.data['results']]
+            next_url = response.data['next']
+        self.assertEqual(seen, sorted(c.id for c in self.companies))
+
+    def test_previous_link_returns_prior_page(self):
+        self.authenticate_user('admin@example.com', 'adminpass')
+        first = self.client.get('/companies/', {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_invalid_cursor(self):
+        self.authenticate_user('admin@example.com', 'adminpass')
+        response = self.client.get('/companies/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryBudgetTestCase(BasePermissionTest):
+    """
+    Guards read endpoints against N+1 queries: an endpoint must stay within
+    its query budget, and that count must not change as rows are added.
+    """
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Budget Company')
+            self.department = Department.objects.create(name='Budget Department', company=self.company)
+        self.client.force_authenticate(self.admin_user)
+
+    def add_rows(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_rows(count)
+
+    def _add_rows(self, count):
+        for _ in range(count):
+            n = Employee.objects.count()
+            company = Company.objects.create(name=f'Budget Company {n}')
+            department = Department.objects.create(name=f'Budget Department {n}', company=company)
+            for target_company, target_department in ((company, department), (self.company, self.department)):
+                n = Employee.objects.count()
+                Employee.objects.create(
+                    user=User.objects.create_user(email=f'budget{n}@example.com', password='x'),
+                    name=f'Budget Employee {n}',
+                    email=f'budget{n}@example.com',
+                    company=target_company,
+                    department=target_department,
+                    mobile='0000000000',
+                    address='Budget Street',
+                    designation='Engineer',
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return len(context)
+
+    def assertQueryBudget(self, url, budget):
+        """`url` may be a callable when the target row only exists after seeding."""
+        resolve = url if callable(url) else lambda: url
+        self.add_rows(1)
+        small = self.count_queries(resolve())
+        self.add_rows(5)
+        url = resolve()
+        large = self.count_queries(url)
+        self.assertLessEqual(large, budget, f'{url} exceeded its query budget')
+        self.assertEqual(small, large, f'{url} query count grows with the number of rows')
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_employee_list(self):
+        self.assertQueryBudget('/employees/', 1)
+
+    def test_employee_detail(self):
+        self.assertQueryBudget(lambda: f'/employees/{Employee.objects.latest("id").id}/', 1)
+
+    def test_company_list(self):
+        self.assertQueryBudget('/companies/', 1)
+
+    def test_company_list_expanded(self):
+        self.assertQueryBudget('/companies/?expand=departments,employees', 3)
+
+    def test_company_detail(self):
+        self.assertQueryBudget(f'/companies/{self.company.id}/?expand=departments,employees', 3)
+
+    def test_department_list(self):
+        self.assertQueryBudget('/departments/', 1)
+
+    def test_dashboard(self):
+        # Totals, names, and the join-free GROUP BY over employees.
+        self.assertQueryBudget('/dashboard/', 3)
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Counter Company')
+        self.other_company = Company.objects.create(name='Other Company')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department = Department.objects.create(name='Counter Department', company=self.company)
+            self.other_department = Department.objects.create(name='Other Department', company=self.other_company)
+
+    def create_employee(self, email, department):
+        user = User.objects.create_user(email=email, password='x')
+        return Employee.objects.create(
+            user=user, name=email, email=email, company=department.company, department=department,
+            mobile='0000000000', address='Counter Street', designation='Engineer',
+        )
+
+    def assertCounts(self, company, departments, employees):
+        company.refresh_from_db()
+        self.assertEqual((company.num_departments, company.num_employees), (departments, employees))
+
+    def test_writes_are_coalesced_and_applied_on_commit(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for i in range(3):
+                        self.create_employee(f'counter{i}@example.com', self.department)
+                    self.assertCounts(self.company, 1, 0)
+        company_updates = [q for q in queries if q['sql'].startswith('UPDATE "core_company"')]
+        self.assertEqual(len(company_updates), 1)
+        self.assertCounts(self.company, 1, 3)
+        self.department.refresh_from_db()
+        self.assertEqual(self.department.num_employees, 3)
+
+    def test_rolled_back_writes_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_employee('rolledback@example.com', self.department)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertCounts(self.company, 1, 0)
+
+    def test_moving_and_deleting_employees(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            employee = self.create_employee('mover@example.com', self.department)
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.company = self.other_company
+            employee.department = self.other_department
+            employee.save()
+        self.assertCounts(self.company, 1, 0)
+        self.assertCounts(self.other_company, 1, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.delete()
+        self.assertCounts(self.other_company, 1, 0)
+
+    def test_deleting_department_discounts_its_employees(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_employee('cascade@example.com', self.department)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.delete()
+        self.assertCounts(self.company, 0, 0)
+
+    def test_reconcile_counters_command(self):
+        Company.objects.filter(pk=self.company.pk).update(num_departments=7, num_employees=9)
+        call_command('reconcile_counters', chunk_size=1, settle=0, stdout=StringIO())
+        self.assertCounts(self.company, 1, 0)
+
+    def test_reconcile_counters_recounts_departments_within_their_company(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_employee('recount@example.com', self.department)
+        Department.objects.filter(pk=self.department.pk).update(num_employees=5)
+        call_command('reconcile_counters', settle=0, stdout=StringIO())
+        self.department.refresh_from_db()
+        self.assertEqual(self.department.num_employees, 1)
+
+    def test_reconcile_counters_skips_deltas_still_being_applied(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_employee('pending@example.com', self.department)
+        pending = list(callbacks)
+
+        def apply_deltas(seconds):
+            # The writer's deltas land while the command waits between its counts.
+            while pending:
+                pending.pop()()
+
+        with mock.patch('core.management.commands.reconcile_counters.time.sleep', side_effect=apply_deltas):
+            call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounts(self.company, 1, 1)
+        self.department.refresh_from_db()
+        self.assertEqual(self.department.num_employees, 1)
+
+
+class EmployeeImportTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Import Company')
+        self.other_company = Company.objects.create(name='Other Company')
+        self.department = Department.objects.create(name='Import Department', company=self.company)
+        self.manage(self.company)
+        self.authenticate_user('manager@example.com', 'managerpass')
+
+    def upload(self, name, content, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/employees/import/', {
+                'file': SimpleUploadedFile(name, content.encode('utf-8')), **extra,
+            }, format='multipart')
+
+    def test_csv_import_reports_row_errors(self):
+        content = (
+            'email,password,name,company,department,status,mobile,address,designation,hired_on\n'
+            f'a@example.com,,A,{self.company.id},{self.department.id},Hired,1,Street,Dev,2024-01-01\n'
+            f'p@example.com,securepassword123,P,{self.company.id},{self.department.id},,1,Street,Dev,\n'
+            f'b@example.com,,B,{self.other_company.id},{self.department.id},Hired,1,Street,Dev,\n'
+            f'a@example.com,,A again,{self.company.id},{self.department.id},,1,Street,Dev,\n'
+            f'c@example.com,,C,{self.company.id},{self.department.id},,1,Street,Dev,\n'
+        )
+        response = self.upload('employees.csv', content, batch_size=2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['passwords_dropped'], 1)
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 4])
+        self.assertIn('department', response.data['errors'][0]['errors'])
+        self.assertIn('email', response.data['errors'][1]['errors'])
+
+        # Passwords are not imported; imported users set theirs through the password reset.
+        for email in ('a@example.com', 'p@example.com', 'c@example.com'):
+            self.assertFalse(User.objects.get(email=email).has_usable_password())
+        self.company.refresh_from_db()
+        self.department.refresh_from_db()
+        self.assertEqual((self.company.num_employees, self.department.num_employees), (3, 3))
+
+    def test_ndjson_import_accepts_api_shaped_rows(self):
+        content = '\n'.join([
+            '{"user": {"email": "n@example.com", "role": "Employee"}, "name": "N", '
+            f'"company": {self.company.id}, "department": {self.department.id}, '
+            '"mobile": "1", "address": "Street", "designation": "Dev"}',
+            '',
+            'not json',
+        ])
+        response = self.upload('employees.ndjson', content)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertTrue(Employee.objects.filter(email='n@example.com', user__email='n@example.com').exists())
+
+    def test_import_requires_manager(self):
+        employee_user = User.objects.create_user(email='plain@example.com', password='plainpass')
+        self.authenticate_user(employee_user.email, 'plainpass')
+        response = self.upload('employees.csv', 'email\n')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class EmployeeExportTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Export Company')
+        self.department = Department.objects.create(name='Export Department', company=self.company)
+        self.employees = []
+        for i in range(3):
+            user = User.objects.create_user(email=f'export{i}@example.com', password='exportpass')
+            self.employees.append(Employee.objects.create(
+                user=user, name=f'Export {i}', email=user.email, company=self.company,
+                department=self.department, mobile='1', address='Street', designation='Dev',
+            ))
+
+    def test_csv_export_streams_all_rows(self):
+        self.authenticate_user('admin@example.com', 'adminpass')
+        response = self.client.get('/employees/export/', {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,name,email'))
+        self.assertEqual(len(lines), 4)
+
+    def test_ndjson_export_is_scoped_to_own_data(self):
+        self.authenticate_user('export1@example.com', 'exportpass')
+        response = self.client.get('/employees/export/', {'format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.employees[1].id])
+        self.assertEqual(rows[0]['company_name'], 'Export Company')
+
+    def test_command_skips_rows_being_deleted(self):
+        doomed = Department.objects.create(name='Doomed', company=self.company)
+        Employee.objects.create(
+            user=User.objects.create_user(email='doomed@example.com', password='x'), name='Doomed',
+            email='doomed@example.com', company=self.company, department=doomed,
+            mobile='1', address='Street', designation='Dev',
+        )
+        doomed.mark_deleting()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'employees.ndjson')
+            call_command('export_employees', format='ndjson', output=path)
+            with open(path, encoding='utf-8') as exported:
+                rows = [json.loads(line) for line in exported]
+        self.assertEqual(sorted(row['id'] for row in rows), [e.id for e in self.employees])
+
+
+class DashboardCacheTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Dashboard Company')
+            self.department = Department.objects.create(name='Dashboard Department', company=self.company)
+            self.manage(self.company)
+        self.client.force_authenticate(self.manager_user)
+
+    def hire(self, email):
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(
+                user=User.objects.create_user(email=email, password='x'), name=email, email=email,
+                company=self.company, department=self.department, status='Hired',
+                mobile='1', address='Street', designation='Dev',
+            )
+
+    def test_snapshot_is_cached_until_a_write(self):
+        self.hire('first@example.com')
+        first = self.client.get('/dashboard/')
+        self.assertEqual(first.data['total_employees'], 1)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/dashboard/')
+        self.assertEqual(cached.data['computed_at'], first.data['computed_at'])
+        self.assertGreaterEqual(cached.data['snapshot_age_seconds'], 0)
+
+        self.hire('second@example.com')
+        fresh = self.client.get('/dashboard/')
+        self.assertEqual(fresh.data['total_employees'], 2)
+        self.assertEqual(fresh.data['companies'][0]['status_breakdown'], {'Hired': 2})
+        self.assertEqual(fresh.data['departments'][0]['total_employees'], 2)
+
+
+class ConditionalGetTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='ETag Company')
+        self.client.force_authenticate(self.admin_user)
+
+    def test_unchanged_list_returns_304_without_queries(self):
+        response = self.client.get('/companies/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(0):
+            response = self.client.get('/companies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(response.content)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(f'/companies/{self.company.id}/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name='New Department', company=self.company)
+        response = self.client.get(f'/companies/{self.company.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        etag = self.client.get('/dashboard/')['ETag']
+        self.client.force_authenticate(self.manager_user)
+        response = self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_employee_etags_change_with_the_date(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin_user)}')
+        for path in ('/employees/', '/async/employees/'):
+            etag = self.client.get(path)['ETag']
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+            tomorrow = now() + timedelta(days=1)
+            with mock.patch('core.views.now', return_value=tomorrow), \
+                    mock.patch('core.async_views.now', return_value=tomorrow):
+                response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, path)
+
+
+class SparseFieldsetTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Sparse Company')
+        self.department = Department.objects.create(name='Sparse Department', company=self.company)
+        self.client.force_authenticate(self.admin_user)
+
+    def test_fields_limits_payload_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/companies/', {'fields': 'id,name,num_employees'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'num_employees'})
+        self.assertNotIn('num_departments', queries[0]['sql'])
+
+    def test_nested_relations_are_opt_in(self):
+        response = self.client.get(f'/companies/{self.company.id}/')
+        self.assertNotIn('departments', response.data)
+        response = self.client.get(f'/companies/{self.company.id}/', {'expand': 'departments'})
+        self.assertEqual([d['id'] for d in response.data['departments']], [self.department.id])
+        self.assertNotIn('employees', response.data)
+
+    def test_employee_fields_skip_user_join(self):
+        user = User.objects.create_user(email='sparse@example.com', password='x')
+        Employee.objects.create(
+            user=user, name='Sparse', email=user.email, company=self.company, department=self.department,
+            mobile='1', address='Street', designation='Dev',
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/employees/', {'fields': 'id,name,days_employed'})
+        self.assertEqual(response.data['results'][0], {'id': user.employee.id, 'name': 'Sparse', 'days_employed': None})
+        self.assertNotIn('core_user', queries[0]['sql'])
+
+
+class EmployeeSearchTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Acme Widgets')
+        self.department = Department.objects.create(name='Research', company=self.company)
+        for name, designation in (('Grace Hopper', 'Rear Admiral'), ('Alan Turing', 'Mathematician')):
+            email = f"{name.split()[0].lower()}@example.com"
+            Employee.objects.create(
+                user=User.objects.create_user(email=email, password='x'), name=name, email=email,
+                company=self.company, department=self.department, mobile='1', address='Street',
+                designation=designation,
+            )
+        self.client.force_authenticate(self.admin_user)
+
+    def search(self, term):
+        response = self.client.get('/employees/', {'q': term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [employee['name'] for employee in response.data['results']]
+
+    def test_search_by_name_and_designation(self):
+        self.assertEqual(self.search('hopper'), ['Grace Hopper'])
+        self.assertEqual(self.search('mathematician'), ['Alan Turing'])
+
+    def test_search_by_company(self):
+        self.assertEqual(len(self.search('Acme Widgets')), 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigram matching needs PostgreSQL')
+    def test_search_tolerates_typos(self):
+        self.assertEqual(self.search('Grase Hoper'), ['Grace Hopper'])
+
+
+class EmployeeFilterTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Filter Company')
+        self.other_company = Company.objects.create(name='Other Filter Company')
+        self.department = Department.objects.create(name='Filter Department', company=self.company)
+        self.other_department = Department.objects.create(name='Other Department', company=self.other_company)
+        rows = (
+            ('a', self.department, 'Hired', '2023-01-10', 'Engineer'),
+            ('b', self.department, 'Hired', '2024-06-01', 'Designer'),
+            ('c', self.department, 'Application Received', None, 'Engineer'),
+            ('d', self.other_department, 'Hired', '2022-03-15', 'Engineer'),
+        )
+        for name, department, employee_status, hired_on, designation in rows:
+            Employee.objects.create(
+                user=User.objects.create_user(email=f'{name}@example.com', password='x'),
+                name=name, email=f'{name}@example.com', company=department.company, department=department,
+                status=employee_status, hired_on=hired_on, mobile='1', address='Street', designation=designation,
+            )
+        self.client.force_authenticate(self.admin_user)
+
+    def names(self, **params):
+        response = self.client.get('/employees/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [employee['name'] for employee in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.names(company=self.company.id, status='Hired'), ['a', 'b'])
+        self.assertEqual(self.names(department=self.other_department.id), ['d'])
+        self.assertEqual(self.names(status='Hired,Application Received', designation='Engineer'), ['a', 'c', 'd'])
+        self.assertEqual(self.names(hired_on_after='2023-01-01', hired_on_before='2023-12-31'), ['a'])
+
+    def test_invalid_filter_values(self):
+        response = self.client.get('/employees/', {'status': 'Retired', 'hired_on_after': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'status', 'hired_on_after'})
+
+    def test_ordering_pages_with_keyset_cursor(self):
+        response = self.client.get('/employees/', {'ordering': '-hired_on', 'page_size': 2, 'fields': 'name'})
+        names = [employee['name'] for employee in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            names += [employee['name'] for employee in response.data['results']]
+        # NULL hire dates sort first when descending.
+        self.assertEqual(names, ['c', 'b', 'a', 'd'])
+
+    def test_tenure_annotation_filters_and_ordering(self):
+        today = date.today()
+        response = self.client.get('/employees/', {'ordering': '-days_employed', 'fields': 'name,days_employed'})
+        self.assertEqual(
+            [(e['name'], e['days_employed']) for e in response.data['results']],
+            [('d', (today - date(2022, 3, 15)).days), ('a', (today - date(2023, 1, 10)).days),
+             ('b', (today - date(2024, 6, 1)).days), ('c', None)],
+        )
+        longest = (today - date(2022, 3, 15)).days
+        self.assertEqual(self.names(days_employed_min=longest), ['d'])
+        self.assertEqual(self.names(days_employed_max=longest - 1, ordering='days_employed'), ['b', 'a'])
+        self.assertEqual(self.names(company=self.company.id, ordering='-days_employed', page_size=1), ['a'])
+
+    def test_sparse_fields_keep_ordering_columns_loaded(self):
+        params = {'fields': 'name', 'ordering': 'days_employed', 'page_size': 1}
+        with self.assertNumQueries(1):
+            response = self.client.get('/employees/', params)
+        self.assertEqual([e['name'] for e in response.data['results']], ['c'])
+        self.assertIsNotNone(response.data['next'])
+
+        self.authenticate_user('admin@example.com', 'adminpass')
+        response = self.client.get('/async/employees/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page = json.loads(response.content)
+        self.assertEqual(page['results'], [{'name': 'c'}])
+        self.assertIsNotNone(page['next'])
+
+    def test_tenure_matches_property(self):
+        for employee in Employee.objects.with_tenure():
+            self.assertEqual(employee.days_employed, Employee.objects.get(pk=employee.pk).days_employed)
+
+
+class BulkTransitionTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name='Transition Company')
+        self.department = Department.objects.create(name='Transition Department', company=self.company)
+        self.employees = {}
+        for name, employee_status in (('a', 'Interview Scheduled'), ('b', 'Interview Scheduled'),
+                                      ('c', 'Application Received')):
+            self.employees[name] = Employee.objects.create(
+                user=User.objects.create_user(email=f'{name}@example.com', password='x'),
+                name=name, email=f'{name}@example.com', company=self.company, department=self.department,
+                status=employee_status, mobile='1', address='Street', designation='Dev',
+            )
+        self.manage(self.company)
+        self.authenticate_user('manager@example.com', 'managerpass')
+
+    def test_hire_by_ids_rejects_invalid_sources(self):
+        ids = [e.id for e in self.employees.values()] + [999999]
+        response = self.client.post('/employees/transition/', {'transition': 'hire', 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(response.data['rejected_ids'], [self.employees['c'].id, 999999])
+        hired = Employee.objects.get(pk=self.employees['a'].pk)
+        self.assertEqual(hired.status, 'Hired')
+        self.assertIsNotNone(hired.hired_on)
+
+    def test_reject_by_filter(self):
+        response = self.client.post('/employees/transition/', {
+            'transition': 'reject', 'filter': {'status': 'Interview Scheduled', 'company': self.company.id},
+        }, format='json')
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(Employee.objects.filter(status='Not Accepted').count(), 2)
+
+    def test_reject_skips_already_rejected(self):
+        rejected = self.employees['c']
+        self.client.post('/employees/transition/', {'transition': 'reject', 'ids': [rejected.id]}, format='json')
+        changed_at = Employee.objects.get(pk=rejected.pk).status_changed_at
+        events = EmployeeStatusEvent.objects.count()
+
+        response = self.client.post(
+            '/employees/transition/', {'transition': 'reject', 'ids': [rejected.id]}, format='json',
+        )
+        self.assertEqual(response.data['updated_count'], 0)
+        self.assertEqual(response.data['rejected_ids'], [rejected.id])
+        self.assertEqual(Employee.objects.get(pk=rejected.pk).status_changed_at, changed_at)
+        self.assertEqual(EmployeeStatusEvent.objects.count(), events)
+
+    def test_requires_ids_or_filter(self):
+        response = self.client.post('/employees/transition/', {'transition': 'hire'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/employees/transition/', {'transition': 'promote', 'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_filters_that_select_everyone(self):
+        for selection in ({}, {'status': ' '}, {'stauts': 'Interview Scheduled'}):
+            response = self.client.post(
+                '/employees/transition/', {'transition': 'reject', 'filter': selection}, format='json',
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, selection)
+            self.assertIn('filter', response.data)
+        self.assertFalse(Employee.objects.filter(status='Not Accepted').exists())
+
+
+class AsyncReadViewTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Async Company')
+            self.department = Department.objects.create(name='Async Department', company=self.company)
+            self.employee_user = User.objects.create_user(email='async@example.com', password='asyncpass', role='Employee')
+            self.employee = Employee.objects.create(
+                user=self.employee_user, name='Async Employee', email='async@example.com', company=self.company,
+                department=self.department, status='Application Received', mobile='1', address='Street', designation='Dev',
+            )
+            Employee.objects.create(
+                user=User.objects.create_user(email='other@example.com', password='x'), name='Other',
+                email='other@example.com', company=self.company, department=self.department,
+                status='Application Received', mobile='1', address='Street', designation='Dev',
+            )
+            self.manage(self.company)
+
+    def test_responses_match_sync_views(self):
+        self.authenticate_user('admin@example.com', 'adminpass')
+        for path in ('companies/', f'companies/{self.company.id}/?expand=departments,employees',
+                     'departments/', 'employees/?ordering=-name&fields=id,name', f'employees/{self.employee.id}/'):
+            sync = self.client.get(f'/{path}')
+            response = self.client.get(f'/async/{path}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, path)
+            self.assertEqual(json.loads(response.content), json.loads(sync.content), path)
+
+    def test_dashboard_and_conditional_get(self):
+        self.authenticate_user('manager@example.com', 'managerpass')
+        response = self.client.get('/async/dashboard/')
+        self.assertEqual(json.loads(response.content)['total_employees'], 2)
+        with self.assertNumQueries(0):
+            response = self.client.get('/async/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_authentication_and_roles(self):
+        self.assertEqual(self.client.get('/async/employees/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.authenticate_user('async@example.com', 'asyncpass')
+        self.assertEqual(self.client.get('/async/companies/').status_code, status.HTTP_403_FORBIDDEN)
+        results = json.loads(self.client.get('/async/employees/').content)['results']
+        self.assertEqual([e['id'] for e in results], [self.employee.id])
+
+    def test_invalid_filter_is_rejected(self):
+        self.authenticate_user('admin@example.com', 'adminpass')
+        response = self.client.get('/async/employees/', {'hired_on_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(DATABASE_REPLICAS=['replica_missing'])
+    def test_replica_check_runs_off_the_event_loop(self):
+        def lag(alias):
+            connection.cursor().close()  # Raises SynchronousOnlyOperation on the event loop.
+            return float('inf')
+
+        self.authenticate_user('manager@example.com', 'managerpass')
+        self.client.get('/async/companies/')  # Caches the user, so authenticating reads nothing.
+        paths = ('/async/employees/?q=Async', f'/async/employees/{self.employee.id}/', '/async/dashboard/')
+        with mock.patch('core.routers.replica_lag', side_effect=lag) as replica_lag:
+            for path in paths:
+                _health.clear()
+                self.assertEqual(self.client.get(path).status_code, status.HTTP_200_OK, path)
+        self.assertEqual(replica_lag.call_count, len(paths))
+
+    def test_read_is_required(self):
+        from .async_views import AsyncReadView
+
+        with self.assertRaises(TypeError):
+            type('NoRead', (AsyncReadView,), {})
+
+
+class SharedCacheCheckTests(APITestCase):
+    def test_several_workers_need_a_shared_cache(self):
+        from .checks import check_shared_cache
+
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=locmem, WEB_CONCURRENCY=1):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES=locmem, WEB_CONCURRENCY=4):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+        with override_settings(CACHES=redis, WEB_CONCURRENCY=4):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class CachedAuthenticationTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Auth Company')
+        self.authenticate_user('manager@example.com', 'managerpass')
+
+    def test_token_carries_role_claims(self):
+        response = self.client.post('/auth/jwt/create/', {'email': 'manager@example.com', 'password': 'managerpass'})
+        claims = AccessToken(response.data['access'])
+        self.assertEqual(claims['role'], 'Manager')
+        self.assertIsNone(claims['employee_id'])
+
+    def test_cached_user_needs_no_auth_query(self):
+        self.client.get('/companies/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/companies/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_save_invalidates_cache(self):
+        self.client.get('/companies/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.manager_user.is_active = False
+            self.manager_user.save()
+        self.assertEqual(self.client.get('/companies/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_users_writes_keep_cache(self):
+        self.client.get('/companies/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_user.set_password('changed')
+            self.admin_user.save()
+            User.objects.create_user(email='newcomer@example.com', password='x')
+        with self.assertNumQueries(1):
+            self.client.get('/companies/')
+
+    def test_cache_is_bounded_lru(self):
+        users = UserCache(maxsize=2, ttl=60)
+        for pk in (1, 2):
+            users.set(pk, 'v1', self.manager_user)
+        users.get(1, 'v1')
+        users.set(3, 'v1', self.manager_user)
+        self.assertIsNone(users.get(2, 'v1'))
+        self.assertIsNotNone(users.get(1, 'v1'))
+        self.assertIsNone(users.get(1, 'v2'))
+
+
+class DatabasePoolTests(BasePermissionTest):
+    def test_pool_metrics_endpoint(self):
+        self.client.force_authenticate(self.manager_user)
+        response = self.client.get('/db-pool/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pooled = {alias for alias in connections if connections.settings[alias].get('OPTIONS', {}).get('pool')}
+        self.assertEqual(set(response.data['pools']), pooled)
+
+    def test_unpooled_connection_has_no_stats(self):
+        self.assertIsNone(pool_stats(connection))
+
+
+@skipUnless(
+    'replica_1' in connections and not connections.settings['replica_1']['TEST'].get('MIRROR'),
+    "Needs a second, unreplicated test database aliased 'replica_1'.",
+)
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTests(BasePermissionTest):
+    # The runner sets up every listed alias even when the class is skipped.
+    databases = {'default'} | ({'replica_1'} if 'replica_1' in connections else set())
+
+    def setUp(self):
+        super().setUp()
+        _health.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.create(name='On Primary')
+        # Stands in for a replica that has not seen the primary's rows.
+        Company.objects.using('replica_1').create(name='On Replica')
+        self.client.force_authenticate(self.admin_user)
+
+    def company_names(self):
+        return [c['name'] for c in self.client.get('/companies/').data['results']]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.company_names(), ['On Replica'])
+
+    def test_user_reads_primary_after_writing(self):
+        response = self.client.post('/companies/', {'name': 'Written'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.company_names(), ['On Primary', 'Written'])
+
+    def test_export_streams_from_the_replica(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            company = Company.objects.get(name='On Primary')
+            Employee.objects.create(
+                company=company, department=Department.objects.create(company=company, name='Ops'), name='Primary',
+                user=User.objects.create_user(email='primary@example.com', password='x'),
+                email='primary@example.com', mobile='1', address='Street', designation='Clerk',
+            )
+        response = self.client.get('/employees/export/', {'format': 'ndjson'})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    @override_settings(DATABASE_REPLICA_MAX_LAG=-1)
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.assertEqual(self.company_names(), ['On Primary'])
+
+
+class ReplicaFallbackTests(BasePermissionTest):
+    @override_settings(DATABASE_REPLICAS=['replica_missing'])
+    def test_unreachable_replica_falls_back_to_primary(self):
+        _health.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.create(name='Primary Only')
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get('/companies/')
+        self.assertEqual([c['name'] for c in response.data['results']], ['Primary Only'])
+
+
+class SeedBenchmarkTests(APITestCase):
+    def test_seed_creates_consistent_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_benchmark', companies=3, departments=7, employees=120, batch_size=50, stdout=StringIO())
+        self.assertEqual(Employee.objects.count(), 120)
+        self.assertEqual(User.objects.filter(employee__isnull=False).count(), 120)
+        for company in Company.objects.all():
+            self.assertEqual(company.num_employees, company.employees.count())
+            self.assertEqual(company.num_departments, company.departments.count())
+        for department in Department.objects.all():
+            self.assertEqual(department.num_employees, department.employees.count())
+        self.assertFalse(Employee.objects.exclude(department__company=F('company')).exists())
+        self.assertFalse(Employee.objects.filter(status='Hired', hired_on__isnull=True).exists())
+
+    def test_same_seed_gives_same_data(self):
+        first = seeding.seed(2, 2, 30, seed=7)
+        names = list(Employee.objects.order_by('id').values_list('name', 'status', 'designation'))
+        seeding.seed(2, 2, 30, seed=7)
+        self.assertEqual(first['employees'], 30)
+        self.assertEqual(list(Employee.objects.order_by('id').values_list('name', 'status', 'designation'))[30:], names)
+
+
+class RequestTimingTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        Company.objects.create(name='Timed')
+        self.client.force_authenticate(self.manager_user)
+
+    def test_no_header_when_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get('/companies/'))
+
+    @override_settings(REQUEST_TIMING=True, REQUEST_TIMING_SLOW_MS=60000, REQUEST_TIMING_SLOW_QUERIES=1000)
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/companies/?fields=id,name')
+        header = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', header)
+        self.assertEqual([metric.split(';')[0] for metric in header.split(', ')], ['db', 'serialize', 'view', 'total'])
+
+    @override_settings(REQUEST_TIMING=True, REQUEST_TIMING_SLOW_MS=60000, REQUEST_TIMING_SLOW_QUERIES=0)
+    def test_slow_request_is_logged_with_its_sql(self):
+        with self.assertLogs('core.timing', 'WARNING') as logs:
+            self.client.get('/companies/')
+        self.assertIn('CompanyViewSet.list', logs.output[0])
+        self.assertIn('core_company', logs.output[0])
+
+
+@override_settings(METRICS=True, METRICS_TOKEN='scrape')
+class MetricsTests(BasePermissionTest):
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_latency_and_queries_by_view(self):
+        labels = {'view': 'CompanyViewSet', 'action': 'list'}
+        before = self.sample('api_request_duration_seconds_count', status='200', **labels)
+        queries_before = self.sample('api_db_queries_total', **labels)
+        self.client.force_authenticate(self.manager_user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/companies/')
+        self.assertEqual(self.sample('api_request_duration_seconds_count', status='200', **labels), before + 1)
+        self.assertEqual(self.sample('api_db_queries_total', **labels), queries_before + len(queries))
+
+    def test_auth_cache_hits_are_counted(self):
+        self.authenticate_user('manager@example.com', 'managerpass')
+        self.client.get('/companies/')
+        hits = self.sample('api_auth_user_cache_lookups_total', result='hit')
+        self.client.get('/companies/')
+        self.assertEqual(self.sample('api_auth_user_cache_lookups_total', result='hit'), hits + 1)
+
+    def test_exposition(self):
+        self.client.force_authenticate(self.manager_user)
+        self.client.get('/companies/')
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'api_requests_in_flight', response.content)
+        self.assertIn(b'api_request_duration_seconds_bucket{action="list",le="+Inf",status="200",view="CompanyViewSet"}',
+                      response.content)
+
+    def test_token_protects_exposition(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_exposition_is_off_without_a_token(self):
+        for overrides in ({'METRICS_TOKEN': ''}, {'METRICS': False}):
+            with override_settings(**overrides):
+                response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, overrides)
+
+
+class JobQueueTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Queued Co')
+            self.department = Department.objects.create(company=self.company, name='Ops')
+            for n in range(3):
+                user = User.objects.create_user(email=f'queued{n}@example.com', password='pass')
+                Employee.objects.create(
+                    company=self.company, department=self.department, user=user, name=f'Queued {n}',
+                    email=f'queued{n}@example.com', mobile='1234567890', address='Somewhere', designation='Clerk',
+                )
+            self.manage(self.company)
+        self.client.force_authenticate(self.manager_user)
+
+    def run_worker(self, **options):
+        # The test's transaction turns autocommit off, which makes close_old_connections()
+        # close the connection as obsolete (the test client disconnects it for requests too).
+        with mock.patch('core.management.commands.run_worker.close_old_connections'):
+            call_command('run_worker', once=True, stdout=StringIO(), **options)
+
+    def test_small_company_is_deleted_inline(self):
+        response = self.client.delete(f'/companies/{self.company.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Company.objects.filter(pk=self.company.pk).exists())
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_INLINE_LIMIT=1)
+    def test_large_company_is_deleted_by_worker(self):
+        response = self.client.delete(f'/companies/{self.company.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        self.assertTrue(Company.objects.filter(pk=self.company.pk).exists())
+
+        self.run_worker()
+        self.assertFalse(Company.objects.filter(pk=self.company.pk).exists())
+        self.assertFalse(Employee.objects.filter(company_id=self.company.pk).exists())
+        job = self.client.get(f"/jobs/{response.data['id']}/").data
+        self.assertEqual((job['status'], job['attempts']), (Job.SUCCEEDED, 1))
+
+    @override_settings(JOBS_INLINE_LIMIT=1, JOBS_DELETE_BATCH_SIZE=2)
+    def test_company_being_deleted_is_hidden_and_progress_reported(self):
+        response = self.client.delete(f'/companies/{self.company.id}/')
+        self.assertEqual(response.data['total_rows'], 4)
+        self.assertEqual(self.client.get(f'/companies/{self.company.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/employees/').data['results'], [])
+        self.assertEqual(self.client.get('/departments/').data['results'], [])
+
+        self.run_worker()
+        job = self.client.get(f"/jobs/{response.data['id']}/").data
+        self.assertEqual((job['status'], job['done_rows']), (Job.SUCCEEDED, 4))
+        self.assertFalse(Department.objects.filter(company_id=self.company.pk).exists())
+        self.assertFalse(User.objects.filter(email__startswith='queued').exists())
+
+    @override_settings(JOBS_INLINE_LIMIT=1, JOBS_DELETE_BATCH_SIZE=1, JOBS_RETRY_DELAY=0)
+    def test_interrupted_department_deletion_resumes(self):
+        response = self.client.delete(f'/departments/{self.department.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        report, batches = jobs.progress, []
+
+        def crash_on_second_batch(rows):
+            batches.append(rows)
+            if len(batches) == 2:
+                raise RuntimeError('crash')
+            report(rows)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with mock.patch('core.jobs.progress', side_effect=crash_on_second_batch):
+                self.run_worker(max_jobs=1)
+            self.assertEqual(self.department.employees.count(), 2)
+            self.run_worker()
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.attempts, job.done_rows), (Job.SUCCEEDED, 2, 3))
+        self.assertFalse(Department.objects.filter(pk=self.department.pk).exists())
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.num_departments, self.company.num_employees), (0, 0))
+
+    @override_settings(JOBS_INLINE_LIMIT=1)
+    def test_department_being_deleted_is_left_out_of_expansions(self):
+        kept = Department.objects.create(company=self.company, name='Kept')
+        self.department.mark_deleting()
+        self.authenticate_user('manager@example.com', 'managerpass')  # For the async view.
+        for path in (f'/companies/{self.company.id}/', f'/async/companies/{self.company.id}/'):
+            data = json.loads(self.client.get(path, {'expand': 'departments,employees'}).content)
+            self.assertEqual([department['id'] for department in data['departments']], [kept.id], path)
+            self.assertEqual(data['employees'], [], path)
+
+    @override_settings(JOBS_INLINE_LIMIT=1, JOBS_DELETE_BATCH_SIZE=2)
+    def test_department_move_realigns_employees(self):
+        other = Company.objects.create(name='Other Co')
+        self.manage(other)
+        response = self.client.patch(f'/departments/{self.department.id}/', {'company': other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_worker()
+        self.assertEqual(set(self.department.employees.values_list('company_id', flat=True)), {other.id})
+        self.assertEqual(Job.objects.get(task='move_department_employees').done_rows, 3)
+        # The moves are in the rollups: out of the old company, into the new one.
+        moves = EmployeeStatusRollup.objects.filter(department_id=self.department.pk).values('company_id').annotate(
+            moved_in=Sum('moved_in'), moved_out=Sum('moved_out'),
+        )
+        self.assertEqual(
+            {(row['company_id'], row['moved_in'], row['moved_out']) for row in moves},
+            {(self.company.pk, 0, 3), (other.pk, 3, 0)},
+        )
+
+    @override_settings(JOBS_RETRY_DELAY=0)
+    def test_failing_job_is_retried_then_failed(self):
+        flaky = mock.Mock(side_effect=[RuntimeError('boom'), RuntimeError('boom again')])
+        with mock.patch.dict(jobs.TASKS, {'flaky': flaky}):
+            job = jobs.enqueue('flaky', max_attempts=2, value=1)
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn('boom again', job.last_error)
+        flaky.assert_called_with(value=1)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        with mock.patch.dict(jobs.TASKS, {'noop': lambda: None}):
+            jobs.enqueue('noop')
+            self.assertIsNotNone(jobs.claim('a'))
+            self.assertIsNone(jobs.claim('b'))
+
+
+class StatusHistoryTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='History Co')
+            self.department = Department.objects.create(company=self.company, name='Recruiting')
+            self.other_department = Department.objects.create(company=self.company, name='Sales')
+            self.employees = [
+                Employee.objects.create(
+                    company=self.company, department=self.department, name=f'History {n}',
+                    user=User.objects.create_user(email=f'history{n}@example.com', password='x'),
+                    email=f'history{n}@example.com', mobile='1', address='Street', designation='Clerk',
+                )
+                for n in range(3)
+            ]
+            self.manage(self.company)
+        self.client.force_authenticate(self.manager_user)
+
+    def rollup_totals(self):
+        return {
+            (row.department_id, row.status): (row.entered, row.exited, row.moved_in, row.moved_out)
+            for row in EmployeeStatusRollup.objects.all()
+        }
+
+    def test_transitions_and_moves_are_logged_and_rolled_up(self):
+        first, second, _ = self.employees
+        with self.captureOnCommitCallbacks(execute=True):
+            first.schedule_interview()
+            first.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Employee.objects.filter(pk=second.pk), 'reject')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.department = self.other_department
+            first.save()
+
+        self.assertEqual(EmployeeStatusEvent.objects.filter(employee_id=first.pk).count(), 3)
+        self.assertEqual(self.rollup_totals(), {
+            (self.department.id, 'Application Received'): (3, 2, 0, 0),
+            (self.department.id, 'Interview Scheduled'): (1, 0, 0, 1),
+            (self.department.id, 'Not Accepted'): (1, 0, 0, 0),
+            (self.other_department.id, 'Interview Scheduled'): (0, 0, 1, 0),
+        })
+        rows = self.rollup_totals()
+        events.rebuild_rollups()
+        self.assertEqual(self.rollup_totals(), rows)
+
+    def test_timeseries_endpoint_reads_rollups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Employee.objects.filter(pk=self.employees[0].pk), 'schedule_interview')
+        today = date.today()
+        with self.assertNumQueries(2):
+            response = self.client.get('/dashboard/status-timeseries/', {
+                'start': str(today - timedelta(days=1)), 'company': self.company.id,
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([point['headcount']['Application Received'] for point in response.data['series']], [0, 2])
+        self.assertEqual(response.data['series'][-1]['entered'], {'Application Received': 3, 'Interview Scheduled': 1})
+        funnel = {stage['status']: stage for stage in response.data['funnel']}
+        self.assertEqual(funnel['Application Received']['exited'], 1)
+        self.assertIsNotNone(funnel['Application Received']['avg_days_in_stage'])
+
+        response = self.client.get('/dashboard/status-timeseries/', {'start': str(today), 'end': str(today - timedelta(days=1))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+class ManagerScopeTests(BasePermissionTest):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Managed Co')
+            self.other_company = Company.objects.create(name='Other Co')
+            self.department = Department.objects.create(company=self.company, name='Managed')
+            self.other_department = Department.objects.create(company=self.other_company, name='Unmanaged')
+            self.side_department = Department.objects.create(company=self.other_company, name='Side')
+            self.employees = {
+                department.name: Employee.objects.create(
+                    company=department.company, department=department, name=department.name,
+                    user=User.objects.create_user(email=f'{department.name}@example.com', password='x'),
+                    email=f'{department.name}@example.com', mobile='1', address='Street', designation='Clerk',
+                )
+                for department in (self.department, self.other_department, self.side_department)
+            }
+            self.manage(self.company, self.side_department)
+        self.client.force_authenticate(self.manager_user)
+
+    def ids(self, path):
+        return sorted(row['id'] for row in self.client.get(path).data['results'])
+
+    def test_lists_are_scoped_in_one_query(self):
+        with self.assertNumQueries(1):
+            employees = self.ids('/employees/')
+        self.assertEqual(employees, sorted([self.employees['Managed'].id, self.employees['Side'].id]))
+        self.assertEqual(self.ids('/companies/'), [self.company.id])
+        self.assertEqual(self.ids('/departments/'), [self.department.id, self.side_department.id])
+        self.authenticate_user('manager@example.com', 'managerpass')
+        results = json.loads(self.client.get('/async/employees/').content)['results']
+        self.assertEqual(sorted(row['id'] for row in results), employees)
+
+    def test_rows_out_of_scope_are_not_found(self):
+        self.assertEqual(self.client.get(f'/companies/{self.other_company.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.patch(f"/employees/{self.employees['Unmanaged'].id}/", {'name': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(f"/employees/{self.employees['Side'].id}/").status_code, status.HTTP_200_OK)
+
+    def test_writes_only_point_into_scope(self):
+        response = self.client.post('/departments/', {'name': 'New', 'company': self.other_company.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(
+            f"/employees/{self.employees['Side'].id}/",
+            {'company': self.other_company.id, 'department': self.other_department.id}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/companies/', {'name': 'Created Co'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(response.data['id'], self.ids('/companies/'))
+
+    def test_dashboard_export_and_trends_are_scoped(self):
+        response = self.client.get('/dashboard/')
+        # Managed Co, and Other Co through its Side department.
+        self.assertEqual((response.data['total_companies'], response.data['total_departments']), (2, 2))
+        self.assertEqual(response.data['total_employees'], 2)
+        self.assertEqual({d['id'] for d in response.data['departments']}, {self.department.id, self.side_department.id})
+
+        lines = b''.join(self.client.get('/employees/export/', {'format': 'ndjson'}).streaming_content).splitlines()
+        self.assertEqual(len(lines), 2)
+
+        series = self.client.get('/dashboard/status-timeseries/').data['series']
+        self.assertEqual(series[-1]['headcount']['Application Received'], 2)
+
+    def test_jobs_are_scoped(self):
+        def job(task, created_by=None, **payload):
+            return Job.objects.create(task=task, payload=payload, created_by=created_by).pk
+
+        visible = [
+            job('delete_company', created_by=self.manager_user, company_id=self.other_company.id),
+            job('delete_company', company_id=self.company.id),
+            job('delete_department', department_id=self.department.id),
+            job('move_department_employees', department_id=self.side_department.id),
+        ]
+        hidden = job('delete_department', department_id=self.other_department.id)
+        job('delete_company', company_id=self.other_company.id)
+
+        self.assertEqual(self.ids('/jobs/'), sorted(visible))
+        self.assertEqual(self.client.get(f'/jobs/{hidden}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(self.admin_user)
+        self.assertEqual(len(self.ids('/jobs/')), 6)
+
+    def test_manager_without_scopes_sees_nothing_until_granted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = User.objects.create_user(email='newcomer@example.com', password='x', role='Manager')
+        self.client.force_authenticate(newcomer)
+        self.assertEqual(self.ids('/employees/'), [])
+        etag = self.client.get('/dashboard/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.manage(self.other_company, user=newcomer)
+        response = self.client.get('/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_employees'], 2)
+
+    def test_dashboard_totals_leave_out_departments_being_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(company=self.company, name='Doomed').mark_deleting()
+        self.assertEqual(self.client.get('/dashboard/').data['total_departments'], 2)
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get('/dashboard/')
+        self.assertEqual((response.data['total_companies'], response.data['total_departments']), (2, 3))
+
+    def test_dashboard_totals_for_department_manager(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            lead = User.objects.create_user(email='lead@example.com', password='x', role='Manager')
+            self.manage(self.other_department, user=lead)
+        self.client.force_authenticate(lead)
+        response = self.client.get('/dashboard/')
+        self.assertEqual((response.data['total_companies'], response.data['total_departments']), (1, 1))
+        self.assertEqual(response.data['total_employees'], 1)
+
+
+class AdminChangelistTests(APITestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_user(
+            email='root@example.com', password='x', role='Admin', is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(self.superuser)
+        self.company = Company.objects.create(name='Admin Co')
+        self.other_company = Company.objects.create(name='Other Admin Co')
+        self.departments = [
+            Department.objects.create(company=company, name=f'Dept {company.name}')
+            for company in (self.company, self.other_company)
+        ]
+        self.add_employees(4)
+
+    def add_employees(self, count):
+        start = Employee.objects.count()
+        for n in range(start, start + count):
+            department = self.departments[n % 2]
+            Employee.objects.create(
+                company=department.company, department=department, name=f'Admin {n}',
+                user=User.objects.create_user(email=f'admin{n}@example.com', password='x'),
+                email=f'admin{n}@example.com', mobile='1', address='Street', designation='Clerk',
+            )
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/core/employee/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        before = self.changelist_queries()
+        self.add_employees(6)
+        self.assertEqual(self.changelist_queries(), before)
+
+    def test_keyset_pages_follow_the_primary_key(self):
+        newest_first = list(Employee.objects.order_by('-pk').values_list('pk', flat=True))
+        with mock.patch.object(EmployeeAdmin, 'list_per_page', 3):
+            cl = self.client.get('/admin/core/employee/').context['cl']
+            self.assertEqual([e.pk for e in cl.result_list], newest_first[:3])
+            self.assertIn(f'after={newest_first[2]}', cl.next_url)
+
+            cl = self.client.get(f'/admin/core/employee/{cl.next_url}').context['cl']
+            self.assertEqual([e.pk for e in cl.result_list], newest_first[3:])
+            self.assertIsNone(cl.next_url)
+            self.assertNotIn('after', cl.first_url)
+
+        with mock.patch.object(EmployeeAdmin, 'list_per_page', 1):
+            cl = self.client.get('/admin/core/employee/', {'after': newest_first[1]}).context['cl']
+            self.assertEqual([e.pk for e in cl.result_list], newest_first[2:3])
+            self.assertIn(f'before={newest_first[2]}', cl.previous_url)
+            self.assertNotIn('after', cl.previous_url)
+
+            cl = self.client.get(f'/admin/core/employee/{cl.previous_url}').context['cl']
+            self.assertEqual([e.pk for e in cl.result_list], newest_first[1:2])
+            self.assertIn(f'after={newest_first[1]}', cl.next_url)
+            self.assertIn(f'before={newest_first[1]}', cl.previous_url)
+
+            cl = self.client.get(f'/admin/core/employee/{cl.previous_url}').context['cl']
+            self.assertEqual([e.pk for e in cl.result_list], newest_first[:1])
+            self.assertIsNone(cl.previous_url)
+            self.assertIsNone(cl.first_url)
+
+    def test_autocomplete_filter_narrows_the_list(self):
+        response = self.client.get('/admin/core/employee/', {'company__id__exact': self.company.id})
+        self.assertEqual({e.company_id for e in response.context['cl'].result_list}, {self.company.id})
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, 'Admin Co')
+        for path in ('/admin/core/department/', f'/admin/core/employee/{Employee.objects.first().pk}/change/',
+                     f'/admin/core/user/{self.superuser.pk}/change/'):
+            self.assertEqual(self.client.get(path).status_code, status.HTTP_200_OK, path)
+
+@skipUnless(connection.vendor != 'postgresql', "Checks the fallback on other databases.")
+class PartitioningTests(APITestCase):
+    def test_only_postgresql_is_partitioned(self):
+        self.assertIsNone(partitioning.partitioning_method())
+        with self.assertRaisesMessage(CommandError, 'needs PostgreSQL'):
+            call_command('partition_employees', method='list', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'not LIST partitioned'):
+            call_command('partition_employees', add_partitions=True, stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitioning needs PostgreSQL.")
+class PostgresPartitioningTests(APITransactionTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='partadmin@example.com', password='pass', role='Admin')
+        self.companies = [Company.objects.create(name=f'Part Co {n}') for n in range(2)]
+        self.departments = [Department.objects.create(company=company, name='Ops') for company in self.companies]
+        self.employees = [self.hire(n, self.departments[n % 2]) for n in range(4)]
+        self.client.force_authenticate(self.admin)
+
+    def tearDown(self):
+        # The flush truncates core_employee without firing the sync trigger.
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {partitioning.UNIQUE_TABLE}")
+        super().tearDown()
+
+    def hire(self, n, department):
+        user = User.objects.create_user(email=f'part{n}@example.com', password='pass')
+        return Employee.objects.create(
+            company=department.company, department=department, user=user, name=f'Part {n}',
+            email=f'part{n}@example.com', mobile='1234567890', address='Somewhere', designation='Clerk',
+        )
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF, SUMMARY OFF) {sql}", params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_list_partitioning_round_trip(self):
+        self.assertFalse(partitioning.is_partitioned())
+        call_command('partition_employees', method='list', drop_old=True, stdout=StringIO())
+        self.assertEqual(partitioning.partitioning_method(), 'list')
+        self.assertTrue(partitioning.is_partitioned())
+        # A worker that looked before the swap picks it up from the shared cache.
+        partitioning._partitioned['default'] = (None, False)
+        self.assertTrue(partitioning.is_partitioned())
+        self.assertEqual(Employee.objects.count(), 4)
+
+        # Numbering continues and uniqueness still holds across partitions.
+        newcomer = self.hire(4, self.departments[1])
+        self.assertGreater(newcomer.pk, max(employee.pk for employee in self.employees))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Employee.objects.create(
+                company=self.companies[0], department=self.departments[0], user=self.admin, name='Twin',
+                email='part1@example.com', mobile='1234567890', address='Somewhere', designation='Clerk',
+            )
+
+        # Lookups by pk read one partition.
+        employee = self.employees[1]
+        by_pk = partitioning.narrow_to_partition(Employee.objects.filter(pk=employee.pk), 'employee_id', employee.pk)
+        plan = self.explain(by_pk)
+        self.assertIn('never executed', plan)
+        self.assertEqual(self.client.get(f'/employees/{employee.pk}/').data['name'], 'Part 1')
+        response = self.client.patch(f'/employees/{employee.pk}/', {'designation': 'Lead'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Employee.objects.get(pk=employee.pk).designation, 'Lead')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.assertEqual(json.loads(self.client.get(f'/async/employees/{employee.pk}/').content)['designation'], 'Lead')
+
+        # Moving to another company moves the row to its partition.
+        moved = Employee.objects.get(pk=self.employees[0].pk)
+        moved.company, moved.department = self.companies[1], self.departments[1]
+        moved.save()
+        self.assertEqual(
+            partitioning.narrow_to_partition(Employee.objects.filter(pk=moved.pk), 'employee_id', moved.pk).get().company_id,
+            self.companies[1].pk,
+        )
+        self.assertEqual(self.client.delete(f'/employees/{moved.pk}/').status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Employee.objects.filter(pk=moved.pk).exists())
+
+        # Manager lists name their companies, so only those partitions are read.
+        manager = User.objects.create_user(email='partmanager@example.com', password='pass', role='Manager')
+        ManagerScope.objects.create(user=manager, department=self.departments[0])
+        self.client.force_authenticate(manager)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/employees/')
+        self.assertEqual({row['id'] for row in response.data['results']}, {self.employees[2].pk})
+        self.assertTrue(any(
+            f'"company_id" IN ({self.companies[0].pk})' in query['sql'] for query in queries.captured_queries
+        ))
+
+        late = Company.objects.create(name='Part Co Late')
+        self.hire(5, Department.objects.create(company=late, name='Ops'))
+        self.assertEqual(partitioning.add_company_partitions(), [late.pk])
+        self.assertEqual(Employee.objects.filter(company=late).count(), 1)
+
@@ -0,0 +1,112 @@
+"""
+Per-request timing: query count and time, serialization time and view time.
+
+The middleware in core.middleware starts a `RequestTimer` for each request
+and stores it in a context variable, which also reaches the threads the
+async ORM runs queries in. Queries are recorded by an execute wrapper that
+is only installed once `enable_query_recording()` has been called.
+Serialization is recorded by the core serializers through
+`measure('serialize')`.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_timer = ContextVar('core_request_timer', default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.queries = []
+        self.view = None
+        self.view_started = None
+        self.view_finished = None
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    @property
+    def db_time(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def slowest_queries(self, limit):
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:limit]
+
+
+def resolve_view(view_func, method):
+    """
+    `(view, action)` for a resolved view: the class name and the viewset
+    action (or the lowercase method), or the function name and ''.
+    """
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__qualname__', repr(view_func)), ''
+    return cls.__name__, getattr(view_func, 'actions', {}).get(method.lower()) or method.lower()
+
+
+def view_label(view_func, method):
+    """`EmployeeViewSet.list`-style name for a resolved view."""
+    return '.'.join(filter(None, resolve_view(view_func, method)))
+
+
+def active():
+    """The current request's timer, or None when timing is off."""
+    return _timer.get()
+
+
+@contextmanager
+def timing():
+    """Time the block; joins the timer of an enclosing `timing()` if there is one."""
+    if _timer.get() is not None:
+        yield _timer.get()
+        return
+    timer = RequestTimer()
+    token = _timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _timer.reset(token)
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block to `name` on the current timer, if any."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper recording each query's duration on the current timer."""
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.queries.append((time.perf_counter() - started, sql))
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """`connection_created` receiver: add `record_query` to the connection once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def enable_query_recording():
+    """Record queries on every current and future connection of this process."""
+    connection_created.connect(install_query_recorder, dispatch_uid='core.timing')
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(None, connection)
@@ -0,0 +1,71 @@
+"""
+Set-based workflow transitions for many employees at once.
+
+The allowed transitions come from the `django_fsm` declarations on
+`Employee`, so the bulk path cannot drift from the per-object methods. Each
+chunk locks its eligible rows, then moves them with a single UPDATE that
+also sets `hired_on` the way `Employee.hire` / `Employee.save` would, and
+logs one status event per row (see core.events).
+"""
+from itertools import islice
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import events, versioning
+from .models import Employee
+
+CHUNK_SIZE = 1000
+
+
+def employee_transitions():
+    """Return `{name: (sources, target)}`; `sources` is None for `'*'`."""
+    transitions = {}
+    for item in Employee._meta.get_field('status').get_all_transitions(Employee):
+        if item.conditions:
+            # Python-level conditions cannot be checked in SQL.
+            continue
+        sources, target = transitions.get(item.name, (set(), item.target))
+        transitions[item.name] = (None if item.source == '*' or sources is None else sources | {item.source}, target)
+    return transitions
+
+
+def bulk_transition(queryset, name):
+    """
+    Apply transition `name` to every employee in `queryset` whose current
+    status allows it. Returns `(updated_ids, rejected_ids)`.
+    """
+    sources, target = employee_transitions()[name]
+    hired_on = now().date() if target == 'Hired' else None
+
+    updated, rejected = [], []
+    ids = queryset.order_by('id').values_list('id', flat=True).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(ids, CHUNK_SIZE))
+        if not chunk:
+            break
+        with transaction.atomic():
+            rows = Employee.objects.select_for_update().filter(id__in=chunk)
+            if sources is not None:
+                rows = rows.filter(status__in=sources)
+            else:
+                # A `'*'` transition does not move rows already in its target.
+                rows = rows.exclude(status=target)
+            rows = list(rows.values_list('id', 'company_id', 'department_id', 'status', 'status_changed_at'))
+            eligible = {row[0] for row in rows}
+            changed_at = now()
+            Employee.objects.filter(id__in=eligible).update(
+                status=target, hired_on=hired_on, status_changed_at=changed_at,
+            )
+            for pk, company_id, department_id, status, status_changed_at in rows:
+                events.record(
+                    employee_id=pk, company_id=company_id, department_id=department_id,
+                    from_company_id=company_id, from_department_id=department_id,
+                    from_status=status, to_status=target, occurred_at=changed_at,
+                    stage_seconds=(changed_at - status_changed_at).total_seconds() if status_changed_at else None,
+                )
+            # Status changes leave headcounts alone; only cached reads go stale.
+            versioning.bump(Employee)
+        updated.extend(sorted(eligible))
+        rejected.extend(pk for pk in chunk if pk not in eligible)
+    return updated, rejected
@@ -1,10 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import AsyncCompanyView, AsyncDashboardView, AsyncDepartmentView, AsyncEmployeeView
 from .views import (
     CompanyViewSet,
     DepartmentViewSet,
     EmployeeViewSet,
+    JobViewSet,
     DashboardAnalyticsView,
+    DatabasePoolView,
+    MetricsView,
+    StatusTimeSeriesView,
     CustomTokenObtainPairView
 )
 
@@ -12,9 +17,21 @@ router = DefaultRouter()
 router.register('companies', CompanyViewSet)
 router.register('departments', DepartmentViewSet)
 router.register('employees', EmployeeViewSet)
+router.register('jobs', JobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', DashboardAnalyticsView.as_view(), name='dashboard'),
+    path('dashboard/status-timeseries/', StatusTimeSeriesView.as_view(), name='status-timeseries'),
+    path('db-pool/', DatabasePoolView.as_view(), name='db-pool'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('jwt/create/', CustomTokenObtainPairView.as_view(), name='jwt-create'),
+    # Async (ASGI) variants of the read endpoints.
+    path('async/companies/', AsyncCompanyView.as_view(), name='async-company-list'),
+    path('async/companies/<int:pk>/', AsyncCompanyView.as_view(), name='async-company-detail'),
+    path('async/departments/', AsyncDepartmentView.as_view(), name='async-department-list'),
+    path('async/departments/<int:pk>/', AsyncDepartmentView.as_view(), name='async-department-detail'),
+    path('async/employees/', AsyncEmployeeView.as_view(), name='async-employee-list'),
+    path('async/employees/<int:pk>/', AsyncEmployeeView.as_view(), name='async-employee-detail'),
+    path('async/dashboard/', AsyncDashboardView.as_view(), name='async-dashboard'),
 ]
@@ -0,0 +1,122 @@
+"""
+Per-table change counters kept in the Django cache.
+
+Every committed write to a tracked model bumps that model's counter, so a
+tuple of versions is a cheap, exact key for anything derived from those
+tables: a cached value built under old versions is simply never read again.
+Single rows can be versioned the same way (`get_row_version`, `bump_rows`),
+for caches that should only drop the rows that changed.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import deferred
+
+
+def _key(model):
+    return f'core:version:{model._meta.label_lower}'
+
+
+def _row_key(model, pk):
+    return f'{_key(model)}:{pk}'
+
+
+def _initial_version():
+    # Seed from the clock so a counter that was evicted from the cache
+    # never restarts at a value an older snapshot was stored under.
+    return int(time.time() * 1000)
+
+
+def get_versions(*models):
+    """Return the current version of each model, in order."""
+    keys = [_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+async def aget_versions(*models):
+    """Async counterpart of `get_versions`."""
+    keys = [_key(model) for model in models]
+    versions = await cache.aget_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        versions.update(await cache.aget_many(list(missing)))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+def _row_version():
+    # A fresh token rather than a counter: rows are bumped in batches with one
+    # set_many, and a token is never reused even after its key was evicted.
+    return uuid.uuid4().hex
+
+
+def get_row_version(model, pk):
+    """Return the current version of one row of `model`."""
+    key = _row_key(model, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _row_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_row_version(model, pk):
+    """Async counterpart of `get_row_version`."""
+    key = _row_key(model, pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _row_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+class _PendingBumps:
+    def __init__(self, using):
+        self.using = using
+        self.models = set()
+        self.rows = set()
+
+    def flush(self):
+        deferred.discard(self.using, self)
+        models, self.models = self.models, set()
+        rows, self.rows = self.rows, set()
+        if rows:
+            cache.set_many({_row_key(model, pk): _row_version() for model, pk in rows}, timeout=None)
+        for model in models:
+            key = _key(model)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _initial_version(), timeout=None)
+
+
+def bump(*models, using=DEFAULT_DB_ALIAS):
+    """
+    Mark the tables of `models` as changed once the current transaction
+    commits (immediately in autocommit mode). Bumps are coalesced, so each
+    table is bumped at most once per transaction.
+    """
+    if not models:
+        return
+    buffer = deferred.pending(using, 'versions', lambda: _PendingBumps(using))
+    buffer.models.update(models)
+    if not connections[using].in_atomic_block:
+        buffer.flush()
+
+
+def bump_rows(model, pks, using=DEFAULT_DB_ALIAS):
+    """Mark the rows of `model` with primary keys `pks` as changed, as `bump` does tables."""
+    if not pks:
+        return
+    buffer = deferred.pending(using, 'versions', lambda: _PendingBumps(using))
+    buffer.rows.update((model, pk) for pk in pks)
+    if not connections[using].in_atomic_block:
+        buffer.flush()
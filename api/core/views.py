@@ -1,17 +1,50 @@
-from django.db import models, transaction
-from rest_framework.viewsets import ModelViewSet
+import hmac
+
+from django.conf import settings
+from datetime import timedelta
+
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from django.utils.timezone import now
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, APIException
-from .models import Company, Department, Employee, User
+from .models import Company, Department, Employee, EmployeeStatusRollup, Job, ManagerScope, User
 from .serializers import (
     CompanySerializer,
     DepartmentSerializer,
+    BulkTransitionSerializer,
     EmployeeSerializer,
+    JobSerializer,
     UserSerializer,
 )
-from .permissions import IsManager , IsAdminManagerOrReadOwnData
+from .permissions import (
+    IsManager,
+    IsAdminManagerOrReadOwnData,
+    dashboard_scope,
+    request_role,
+    scope_companies,
+    scope_departments,
+    scope_employees,
+    scope_jobs,
+    scope_placements,
+)
+from . import jobs, partitioning
+from .importers import FORMATS, EmployeeImporter, iter_rows
+from .exporters import CSVRenderer, NDJSONRenderer, stream_employees
+from .analytics import dashboard_snapshot, status_timeseries
+from .dbpool import all_pool_stats
+from .metrics import exposition
+from .conditional import ConditionalGetMixin, conditional_get
+from .fieldsets import ShapedQuerysetMixin
+from .filters import EmployeeFilter, EmployeeOrderingFilter, EmployeeSearchFilter, parse_date_param
+from .routers import ReplicaReadMixin
+from .transitions import bulk_transition
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import CustomTokenObtainPairSerializer
 
@@ -31,84 +64,126 @@ class UserViewSet(ModelViewSet):
         return super().handle_exception(exc)
 
 
-class CompanyViewSet(ModelViewSet):
+class CompanyViewSet(ReplicaReadMixin, ConditionalGetMixin, ShapedQuerysetMixin, ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     permission_classes = [IsManager]
+    etag_models = (Company, Department, Employee, User, ManagerScope)
+
+    def get_queryset(self):
+        return scope_companies(super().get_queryset(), self.request)
 
     def perform_create(self, serializer):
         try:
             with transaction.atomic():
                 company = serializer.save()
-                company.update_department_count()
-                company.update_employee_count()
+                # Managers manage the companies they create.
+                if request_role(self.request) == 'Manager':
+                    ManagerScope.objects.create(user=self.request.user, company=company)
         except Exception as exc:
             raise APIException(f"Failed to create company: {str(exc)}")
 
     def perform_update(self, serializer):
         try:
             with transaction.atomic():
-                company = serializer.save()
-                company.update_department_count()
-                company.update_employee_count()
+                serializer.save()
         except Exception as exc:
             raise APIException(f"Failed to update company: {str(exc)}")
 
     def destroy(self, request, *args, **kwargs):
+        """
+        Delete the company and everything under it. Large companies are
+        hidden at once and deleted in batches by a background job; the
+        response is then 202 with the job, which reports its progress.
+        """
         instance = self.get_object()
         try:
             with transaction.atomic():
-                instance.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+                instance.mark_deleting()
+                job = jobs.run_or_enqueue(
+                    'delete_company', instance.num_departments + instance.num_employees,
+                    created_by=request.user, company_id=instance.pk,
+                )
         except Exception as exc:
             raise APIException(f"Failed to delete company: {str(exc)}")
+        if job is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
-class DepartmentViewSet(ModelViewSet):
+class DepartmentViewSet(ReplicaReadMixin, ConditionalGetMixin, ShapedQuerysetMixin, ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsManager]
+    etag_models = (Department, ManagerScope)
+    keyset_ordering = ('company_id', 'id')
+
+    def get_queryset(self):
+        return scope_departments(super().get_queryset(), self.request)
 
     def perform_create(self, serializer):
         try:
             with transaction.atomic():
-                department = serializer.save()
-                department.company.update_department_count()
+                serializer.save()
         except Exception as exc:
             raise APIException(f"Failed to create department: {str(exc)}")
 
     def perform_update(self, serializer):
         try:
             with transaction.atomic():
+                previous_company_id = serializer.instance.company_id
                 department = serializer.save()
-                department.company.update_department_count()
+                if department.company_id != previous_company_id:
+                    # Large departments move their employees in a background job.
+                    jobs.run_or_enqueue(
+                        'move_department_employees', department.num_employees,
+                        created_by=self.request.user, department_id=department.pk,
+                    )
         except Exception as exc:
             raise APIException(f"Failed to update department: {str(exc)}")
 
-    def perform_destroy(self, instance):
+    def destroy(self, request, *args, **kwargs):
+        """
+        Delete the department and its employees, through a background job
+        for large departments as for companies.
+        """
+        instance = self.get_object()
         try:
             with transaction.atomic():
-                company = instance.company
-                instance.delete()
-                company.update_department_count()
+                instance.mark_deleting()
+                job = jobs.run_or_enqueue(
+                    'delete_department', instance.num_employees, created_by=request.user, department_id=instance.pk,
+                )
         except Exception as exc:
             raise APIException(f"Failed to delete department: {str(exc)}")
+        if job is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
-class EmployeeViewSet(ModelViewSet):
-    queryset = Employee.objects.all()
+class EmployeeViewSet(ReplicaReadMixin, ConditionalGetMixin, ShapedQuerysetMixin, ModelViewSet):
+    queryset = Employee.objects.select_related('user')
     serializer_class = EmployeeSerializer
     permission_classes = [IsAdminManagerOrReadOwnData]
+    filter_backends = [EmployeeFilter, EmployeeSearchFilter, EmployeeOrderingFilter]
+    etag_models = (Employee, User, ManagerScope)
+
+    def etag_scope(self):
+        # `days_employed` grows by a day without any write.
+        return str(now().date())
 
     def get_queryset(self):
         """
         Restrict the queryset based on user role.
         - Employees see only their own data.
-        - Admins and Managers see all data.
+        - Managers see the employees of the companies and departments they manage.
+        - Admins see all data.
         """
-        if self.request.user.role == 'Employee':
-            return self.queryset.filter(user=self.request.user)
-        return self.queryset
+        queryset = scope_employees(super().get_queryset().with_tenure(), self.request)
+        if str(self.kwargs.get('pk', '')).isdigit():
+            # Detail, update and delete read one partition of a partitioned table.
+            queryset = partitioning.narrow_to_partition(queryset, 'employee_id', self.kwargs['pk'])
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -121,9 +196,7 @@ class EmployeeViewSet(ModelViewSet):
                 user_serializer.is_valid(raise_exception=True)
                 user = user_serializer.save()
 
-                employee = serializer.save(user=user)
-                employee.company.update_employee_count()
-                employee.department.update_employee_count()
+                serializer.save(user=user)
         except ValidationError as exc:
             raise ValidationError({"detail": exc.detail})
         except Exception as exc:
@@ -145,52 +218,185 @@ class EmployeeViewSet(ModelViewSet):
                     user_serializer.is_valid(raise_exception=True)
                     user_serializer.save()
 
-                # Handle department updates if changed
-                old_department = self.get_object().department
-                new_department = employee.department
-                if old_department != new_department:
-                    old_department.update_employee_count()
-                    new_department.update_employee_count()
-
-                # Update company employee count
-                employee.company.update_employee_count()
-
         except ValidationError as exc:
             raise ValidationError({"detail": exc.detail})
         except Exception as exc:
             raise APIException(f"Failed to update employee: {str(exc)}")
 
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[IsManager], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Bulk-create employees and their users from an uploaded CSV or NDJSON
+        `file`. The format comes from `format` or the file extension. Rows are
+        streamed and written in batches; the response reports per-row errors
+        and how many passwords were dropped (passwords are never imported).
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({"file": "An uploaded CSV or NDJSON file is required."})
+        format = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        if format not in FORMATS:
+            raise ValidationError({"format": f"Expected one of: {', '.join(FORMATS)}."})
+        try:
+            batch_size = int(request.data.get('batch_size', 1000))
+        except ValueError:
+            raise ValidationError({"batch_size": "A valid integer is required."})
+
+        report = EmployeeImporter(
+            batch_size=max(1, min(batch_size, 5000)),
+            departments=scope_departments(Department.objects.all(), request),
+        ).run(iter_rows(upload, format))
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='transition', permission_classes=[IsManager])
+    def bulk_transition(self, request):
+        """
+        Apply one workflow transition (e.g. `hire`) to many employees, chosen
+        by `ids` or by `filter`. Rows whose status does not allow it, or that
+        do not exist, are reported in `rejected_ids`.
+        """
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = self.get_queryset()
+        if 'ids' in data:
+            queryset = queryset.filter(id__in=data['ids'])
+        else:
+            queryset = EmployeeFilter().apply(queryset, data['filter'])
+
+        updated, rejected = bulk_transition(queryset, data['transition'])
+        if 'ids' in data:
+            found = set(updated) | set(rejected)
+            rejected += sorted({pk for pk in data['ids'] if pk not in found})
+        return Response({
+            'transition': data['transition'],
+            'updated_count': len(updated),
+            'rejected_ids': rejected,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream every employee visible to the user as CSV (default) or NDJSON,
+        selected with `?format=`. Rows come from a server-side cursor.
+        """
+        format = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset())
+        # The rows are read after the view returns and request routing has
+        # ended, so pin the database it picked now.
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(
+            stream_employees(queryset, format),
+            content_type=request.accepted_renderer.media_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="employees.{format}"'
+        return response
+
     def perform_destroy(self, instance):
         """
         Handles deletion of Employee and updates counts accordingly.
         """
         try:
             with transaction.atomic():
-                company = instance.company
-                department = instance.department
-                instance.user.delete()
+                user = instance.user
                 instance.delete()
-                company.update_employee_count()
-                department.update_employee_count()
+                user.delete()
         except Exception as exc:
             raise APIException(f"Failed to delete employee: {str(exc)}")
 
 
-class DashboardAnalyticsView(APIView):
+class JobViewSet(ReadOnlyModelViewSet):
+    """Status of background jobs, e.g. a company deletion answered with 202."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsManager]
+
+    def get_queryset(self):
+        return scope_jobs(super().get_queryset(), self.request)
+
+
+class DashboardAnalyticsView(ReplicaReadMixin, APIView):
     permission_classes = [IsManager]
 
     def get(self, request):
-        try:
-            total_companies = Company.objects.count()
-            total_departments = Department.objects.count()
-            total_employees = Employee.objects.count()
-            status_breakdown = Employee.objects.values('status').annotate(count=models.Count('status'))
+        return conditional_get(
+            request, (Company, Department, Employee, ManagerScope), lambda: self.build_response(request),
+        )
 
+    def build_response(self, request):
+        try:
+            payload, computed_at = dashboard_snapshot(**dashboard_scope(request))
             return Response({
-                'total_companies': total_companies,
-                'total_departments': total_departments,
-                'total_employees': total_employees,
-                'employee_status_breakdown': status_breakdown,
+                **payload,
+                'computed_at': computed_at,
+                'snapshot_age_seconds': round((now() - computed_at).total_seconds(), 3),
             }, status=status.HTTP_200_OK)
         except Exception as exc:
             raise APIException(f"Failed to fetch dashboard analytics: {str(exc)}")
+
+
+class DatabasePoolView(APIView):
+    """Connection pool metrics for the worker process that serves the request."""
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        return Response({'pools': all_pool_stats()}, status=status.HTTP_200_OK)
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. Scrapers do not hold JWTs; they send
+    `Authorization: Bearer <METRICS_TOKEN>` instead. Not found unless
+    METRICS is on and METRICS_TOKEN is set.
+    """
+    http_method_names = ['get']
+
+    def get(self, request):
+        if not (settings.METRICS and settings.METRICS_TOKEN):
+            raise Http404
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED, headers={'WWW-Authenticate': 'Bearer'})
+        body, content_type = exposition()
+        return HttpResponse(body, content_type=content_type)
+
+
+class StatusTimeSeriesView(ReplicaReadMixin, APIView):
+    """
+    Daily headcount per status and a time-in-stage funnel between `start`
+    and `end` (YYYY-MM-DD, default the last 30 days), optionally for one
+    `company` or `department`. Served from the daily status rollups.
+    """
+    permission_classes = [IsManager]
+    max_days = 366
+
+    def get(self, request):
+        today = now().date()
+        params, errors = {}, {}
+        for name in ('start', 'end'):
+            value = request.query_params.get(name)
+            params[name] = parse_date_param(value) if value else None
+            if value and params[name] is None:
+                errors[name] = ["Expected a date in YYYY-MM-DD format."]
+        for name in ('company', 'department'):
+            value = request.query_params.get(name, '')
+            if value and not value.isdigit():
+                errors[name] = ["Expected an id."]
+            params[name] = int(value) if value.isdigit() else None
+        if errors:
+            raise ValidationError(errors)
+
+        end = params['end'] or today
+        start = params['start'] or end - timedelta(days=29)
+        if not start <= end < start + timedelta(days=self.max_days):
+            raise ValidationError({'start': [f"Expected start <= end, at most {self.max_days} days apart."]})
+
+        # The default range moves with the date, so the ETag has to as well.
+        rollups = scope_placements(EmployeeStatusRollup.objects.all(), request)
+        return conditional_get(
+            request, (EmployeeStatusRollup, ManagerScope),
+            lambda: Response(status_timeseries(start, end, params['company'], params['department'], rollups)),
+            scope=str(today),
+        )
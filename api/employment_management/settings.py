@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import sys
 from datetime import timedelta
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 env = environ.Env()
 environ.Env.read_env()
 
@@ -36,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'drf_yasg',
     'djoser',
@@ -47,6 +50,8 @@ INSTALLED_APPS = [
 CORS_ALLOW_ALL_ORIGINS = True
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -88,9 +93,92 @@ DATABASES = {
         'PASSWORD': env('DATABASE_PASSWORD'),
         'HOST': env('DATABASE_HOST'),
         'PORT': env('DATABASE_PORT'),
+        # Drop broken connections before a request uses them.
+        'CONN_HEALTH_CHECKS': env.bool('DATABASE_HEALTH_CHECKS', default=True),
     }
 }
 
+# Connection reuse: persistent per-thread connections kept for
+# DATABASE_CONN_MAX_AGE seconds (the default), or, with DATABASE_POOL=true,
+# a psycopg 3 connection pool per worker process. Django cannot combine the two.
+if env.bool('DATABASE_POOL', default=False):
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured("DATABASE_POOL=true needs psycopg 3 and psycopg-pool (pip install 'psycopg[pool]').")
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+            # Seconds a request may wait for a free connection before failing.
+            'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10.0),
+            'max_idle': env.float('DATABASE_POOL_MAX_IDLE', default=600.0),
+            'max_lifetime': env.float('DATABASE_POOL_MAX_LIFETIME', default=3600.0),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = env.int('DATABASE_CONN_MAX_AGE', default=60)
+
+# Partitioning of core_employee on company_id: '' (off), 'hash' or 'list'.
+# Only `manage.py partition_employees` converts the table (this is its
+# default method); setting it also enables partitionwise plans. See
+# core.partitioning.
+EMPLOYEE_PARTITIONING = env.str('EMPLOYEE_PARTITIONING', default='')
+EMPLOYEE_HASH_PARTITIONS = env.int('EMPLOYEE_HASH_PARTITIONS', default=16)
+if EMPLOYEE_PARTITIONING:
+    # Aggregate and join per partition (e.g. the dashboard's GROUP BY company).
+    DATABASES['default'].setdefault('OPTIONS', {})['options'] = (
+        '-c enable_partitionwise_aggregate=on -c enable_partitionwise_join=on'
+    )
+
+# Read replicas: comma-separated host[:port] list, sharing the primary's
+# name and credentials. See core.routers for how reads are routed.
+DATABASE_REPLICAS = []
+for number, address in enumerate(env.list('DATABASE_REPLICA_HOSTS', default=[]), start=1):
+    host, _, port = address.partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+if not DATABASE_REPLICAS and sys.argv[1:2] == ['test']:
+    # A stand-in replica for the routing tests: a separate, unreplicated test
+    # database. Nothing routes to it unless a test lists it in DATABASE_REPLICAS.
+    DATABASES['replica_1'] = {
+        **DATABASES['default'],
+        'OPTIONS': {},
+        'TEST': {'NAME': f"test_{DATABASES['default']['NAME']}_replica"},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Replicas further behind than this (seconds) are skipped until they catch up.
+DATABASE_REPLICA_MAX_LAG = env.float('DATABASE_REPLICA_MAX_LAG', default=5.0)
+DATABASE_REPLICA_CHECK_INTERVAL = env.float('DATABASE_REPLICA_CHECK_INTERVAL', default=5.0)
+# How long a user reads from the primary after writing.
+DATABASE_PIN_PRIMARY_SECONDS = env.float('DATABASE_PIN_PRIMARY_SECONDS', default=DATABASE_REPLICA_MAX_LAG)
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Use a shared backend (e.g. redis:// or memcache://) when running several
+# workers, so table versions and dashboard snapshots are seen by all of them.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Server worker processes (gunicorn and uvicorn read it too). The core.E001
+# check refuses more than one on a per-process cache such as locmem.
+WEB_CONCURRENCY = env.int('WEB_CONCURRENCY', default=1)
+
+DASHBOARD_CACHE_TTL = env.int('DASHBOARD_CACHE_TTL', default=300)
+
+# Admin changelists count rows exactly below this many (planner estimate) and
+# show PostgreSQL's estimate above; see core.changelists.
+ADMIN_EXACT_COUNT_LIMIT = env.int('ADMIN_EXACT_COUNT_LIMIT', default=10000)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -135,19 +223,47 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': env.int('API_PAGE_SIZE', default=50),
+    'MAX_PAGE_SIZE': env.int('API_MAX_PAGE_SIZE', default=500),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.serializers.CustomTokenObtainPairSerializer',
 }
 
+# Per-process cache of authenticated users; see core.authentication.
+AUTH_USER_CACHE_SIZE = env.int('AUTH_USER_CACHE_SIZE', default=10000)
+AUTH_USER_CACHE_TTL = env.int('AUTH_USER_CACHE_TTL', default=60)
+
+# Server-Timing headers and slow-request logging; see core.middleware.
+REQUEST_TIMING = env.bool('REQUEST_TIMING', default=False)
+REQUEST_TIMING_SLOW_MS = env.float('REQUEST_TIMING_SLOW_MS', default=500)
+REQUEST_TIMING_SLOW_QUERIES = env.int('REQUEST_TIMING_SLOW_QUERIES', default=50)
+REQUEST_TIMING_LOG_QUERIES = env.int('REQUEST_TIMING_LOG_QUERIES', default=3)
+
+# Background jobs; see core.jobs. Work touching more rows than
+# JOBS_INLINE_LIMIT goes to `manage.py run_worker` instead of the request.
+JOBS_INLINE_LIMIT = env.int('JOBS_INLINE_LIMIT', default=500)
+JOBS_MAX_ATTEMPTS = env.int('JOBS_MAX_ATTEMPTS', default=5)
+JOBS_RETRY_DELAY = env.float('JOBS_RETRY_DELAY', default=10)
+JOBS_STALE_AFTER = env.int('JOBS_STALE_AFTER', default=600)
+# Rows deleted (or moved) per transaction by the deletion and department move jobs.
+JOBS_DELETE_BATCH_SIZE = env.int('JOBS_DELETE_BATCH_SIZE', default=1000)
+
+# Prometheus metrics at /metrics; see core.metrics. Off unless enabled, and
+# not served until METRICS_TOKEN is set too.
+METRICS = env.bool('METRICS', default=False)
+METRICS_TOKEN = env.str('METRICS_TOKEN', default='')
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'USER_ID_FIELD': 'id',
@@ -0,0 +1,20 @@
+import os
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    # Fail before forking if the workers would not share one cache (core.E001).
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'employment_management.settings')
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('check')
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's in-flight gauge from the merged /metrics output.
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,4 +1,5 @@
 import { createApi, fetchBaseQuery } from '@reduxjs/toolkit/query/react';
+import { fetchAllPages } from '../fetchAllPages';
 
 export const companiesApi = createApi({
   reducerPath: 'companiesApi',
@@ -15,11 +16,11 @@ export const companiesApi = createApi({
   tagTypes: ['Company'],
   endpoints: (builder) => ({
     fetchCompanies: builder.query({
-      query: () => '/companies/',
+      queryFn: (arg, api, extraOptions, baseQuery) => fetchAllPages('/companies/', baseQuery),
       providesTags: ['Company'],
     }),
     fetchCompanyById: builder.query({
-      query: (id) => `/companies/${id}`,
+      query: (id) => `/companies/${id}/?expand=departments,employees`,
       providesTags: (result, error, id) => [{ type: 'Company', id }],
     }),
     addCompany: builder.mutation({
@@ -1,4 +1,5 @@
 import { createApi, fetchBaseQuery } from '@reduxjs/toolkit/query/react';
+import { fetchAllPages } from '../fetchAllPages';
 
 export const departmentsApi = createApi({
   reducerPath: 'departmentsApi',
@@ -14,7 +15,7 @@ export const departmentsApi = createApi({
   }),
   endpoints: (builder) => ({
     fetchDepartments: builder.query({
-      query: () => '/departments/',
+      queryFn: (arg, api, extraOptions, baseQuery) => fetchAllPages('/departments/', baseQuery),
     }),
     fetchDepartmentById: builder.query({
       query: (id) => `/departments/${id}`,
@@ -1,5 +1,8 @@
 import { createApi, fetchBaseQuery } from '@reduxjs/toolkit/query/react';
 
+// List endpoints return opaque `next`/`previous` links; keep only the cursor token.
+const cursorFromUrl = (url) => (url ? new URL(url).searchParams.get('cursor') : null);
+
 export const employeesApi = createApi({
   reducerPath: 'employeesApi',
   baseQuery: fetchBaseQuery({
@@ -14,7 +17,21 @@ export const employeesApi = createApi({
   }),
   endpoints: (builder) => ({
     fetchEmployees: builder.query({
-      query: () => '/employees/',
+      // Extra keys (status, company, department, designation, hired_on_after,
+      // hired_on_before, ordering, q) are passed through as server-side filters.
+      query: ({ cursor, pageSize, ...filters } = {}) => ({
+        url: '/employees/',
+        params: {
+          ...filters,
+          ...(cursor && { cursor }),
+          ...(pageSize && { page_size: pageSize }),
+        },
+      }),
+      transformResponse: (response) => ({
+        results: response.results,
+        nextCursor: cursorFromUrl(response.next),
+        previousCursor: cursorFromUrl(response.previous),
+      }),
     }),
     fetchEmployeeById: builder.query({
       query: (id) => `/employees/${id}`,
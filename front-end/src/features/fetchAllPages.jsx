@@ -0,0 +1,15 @@
+// Lookup lists (dropdowns, tables) need every row: follow the cursor `next`
+// links until there are none left, taking the largest page the API allows.
+export const fetchAllPages = async (url, baseQuery) => {
+  const results = [];
+  let next = `${url}?page_size=500`;
+  while (next) {
+    const response = await baseQuery(next);
+    if (response.error) {
+      return { error: response.error };
+    }
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return { data: results };
+};
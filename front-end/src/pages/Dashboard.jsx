@@ -19,6 +19,7 @@ const Dashboard = () => {
         <p><strong>Total Companies:</strong> {data.total_companies}</p>
         <p><strong>Total Departments:</strong> {data.total_departments}</p>
         <p><strong>Total Employees:</strong> {data.total_employees}</p>
+        <p><em>Snapshot taken {Math.round(data.snapshot_age_seconds)}s ago</em></p>
       </div>
       <h2>Employee Status Breakdown</h2>
       <ul>
@@ -28,6 +29,18 @@ const Dashboard = () => {
           </li>
         ))}
       </ul>
+      <h2>By Company</h2>
+      <ul>
+        {data.companies.map((company) => (
+          <li key={company.id}>
+            {company.name}: {company.total_employees} (
+            {Object.entries(company.status_breakdown)
+              .map(([status, count]) => `${status}: ${count}`)
+              .join(', ')}
+            )
+          </li>
+        ))}
+      </ul>
     </div>
   );
 };
@@ -1,10 +1,11 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { Link } from 'react-router-dom';
-import { Table, Button, Popconfirm } from 'antd';
+import { Table, Button, Popconfirm, Space } from 'antd';
 import { useFetchEmployeesQuery, useDeleteEmployeeMutation } from '../features/employees/employeesApi';
 
 const ListEmployeesPage = () => {
-  const { data: employees, isLoading } = useFetchEmployeesQuery();
+  const [cursor, setCursor] = useState(null);
+  const { data: employees, isLoading, isFetching } = useFetchEmployeesQuery({ cursor, pageSize: 10 });
   const [deleteEmployee] = useDeleteEmployeeMutation();
 
   if (isLoading) {
@@ -72,11 +73,26 @@ const ListEmployeesPage = () => {
         </Button>
       </Link>
       <Table
-        dataSource={employees}
+        dataSource={employees?.results || []}
         columns={columns}
         rowKey="id"
-        pagination={{ pageSize: 10 }}
+        loading={isFetching}
+        pagination={false}
       />
+      <Space style={{ marginTop: '16px' }}>
+        <Button
+          disabled={!employees?.previousCursor}
+          onClick={() => setCursor(employees.previousCursor)}
+        >
+          Previous
+        </Button>
+        <Button
+          disabled={!employees?.nextCursor}
+          onClick={() => setCursor(employees.nextCursor)}
+        >
+          Next
+        </Button>
+      </Space>
     </div>
   );
 };